@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -53,6 +54,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -136,6 +138,12 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media/'
 STATIC_ROOT = '/vol/web/static/'
 
+# Stream every upload to a temporary file in chunks instead of keeping
+# small ones in memory.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -143,10 +151,75 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
 
+# JSON is encoded and decoded with orjson when installed, MessagePack
+# is offered when msgpack is installed.
+API_RENDERER_CLASSES = [
+    'core.renderers.FastJSONRenderer',
+    'rest_framework.renderers.BrowsableAPIRenderer',
+]
+API_PARSER_CLASSES = [
+    'core.parsers.FastJSONParser',
+    'rest_framework.parsers.FormParser',
+    'rest_framework.parsers.MultiPartParser',
+]
+if find_spec('msgpack'):
+    API_RENDERER_CLASSES.append('core.renderers.MessagePackRenderer')
+    API_PARSER_CLASSES.append('core.parsers.MessagePackParser')
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': API_RENDERER_CLASSES,
+    'DEFAULT_PARSER_CLASSES': API_PARSER_CLASSES,
+    'DEFAULT_THROTTLE_RATES': {
+        'login': os.environ.get('LOGIN_THROTTLE_RATE', '10/min'),
+    },
 }
 
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
+
+# Cache alias sharing the fighting styles catalog between processes,
+# the catalog is only cached in process memory when unset.
+FIGHTING_STYLES_CACHE = os.environ.get('FIGHTING_STYLES_CACHE') or None
+
+# Token authentication lookups are cached per process, up to the size,
+# and evicted in the process changing a user or deleting a token. Other
+# processes keep them until the TTL, unless the alias names a cache
+# shared by every process, such as Redis or Memcached.
+TOKEN_AUTH_CACHE = os.environ.get('TOKEN_AUTH_CACHE') or None
+TOKEN_AUTH_CACHE_SIZE = int(os.environ.get('TOKEN_AUTH_CACHE_SIZE', 10000))
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 60))
+
+# Logins verifying passwords at once, further logins are rejected with
+# a 429. Logins are not limited when 0.
+LOGIN_CONCURRENCY = int(
+    os.environ.get('LOGIN_CONCURRENCY', os.cpu_count() or 1)
+)
+
+# Threads generating the variants of uploaded cat images, images are
+# processed in the request when there are no workers.
+CAT_IMAGE_WORKERS = int(os.environ.get('CAT_IMAGE_WORKERS', 2))
+
+# Threads rebuilding the documents of the cats of a changed ability or
+# fighting style, rebuilt after the commit of the request when 0.
+CAT_DOCUMENT_WORKERS = int(os.environ.get('CAT_DOCUMENT_WORKERS', 1))
+
+# Cache alias of rendered cat list and detail responses, keyed by the
+# version stamp of the user so writes make old entries unreachable.
+# Responses are not cached when unset.
+CAT_RESPONSE_CACHE = os.environ.get('CAT_RESPONSE_CACHE', 'default')
+CAT_RESPONSE_CACHE_TTL = int(os.environ.get('CAT_RESPONSE_CACHE_TTL', 300))
+
+# Responses are compressed with zstd, brotli or gzip as negotiated,
+# bodies under the minimum size are sent as they are. Streaming
+# responses are flushed to the client every flush size of input.
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_FLUSH_SIZE = int(
+    os.environ.get('COMPRESSION_FLUSH_SIZE', 64 * 1024)
+)
+
+# Seconds between sweeps of the matchmaking loop, which widens the
+# rating window of waiting cats. Without an interval there is no loop
+# and cats are matched against the database when they are queued.
+MATCHMAKING_INTERVAL = float(os.environ.get('MATCHMAKING_INTERVAL', 1))
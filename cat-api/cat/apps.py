@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CatConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cat'
+
+    def ready(self):
+        from cat import signals  # noqa: F401
@@ -0,0 +1,202 @@
+"""
+Batched writes of cats with their nested relations.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Cat, CatFacet, FightingStyles, ResourceVersion
+from cat.documents import refresh_documents
+from cat.search import trait_keys
+from cat.serializers import (
+    get_or_create_abilities,
+    resolve_fighting_styles,
+)
+
+
+RELATED_FIELDS = ['abilities', 'fighting_styles']
+
+
+def _style_key(style):
+    """Return a hashable key for fighting style data."""
+    return tuple(sorted(style.items()))
+
+
+class CatBulkWriter:
+    """Write validated cat data in batches for one user.
+
+    Abilities and fighting styles are resolved through in-memory maps
+    which are kept between calls, so a long import only looks up each
+    name once.
+    """
+
+    def __init__(self, user, batch_size=1000):
+        self.user = user
+        self.batch_size = batch_size
+        self.ability_ids = {}
+        self.fighting_style_ids = {}
+
+    def _resolve_abilities(self, items):
+        """Fill the ability map with the names used by items."""
+        names = {
+            ability['name']
+            for item in items
+            for ability in item.get('abilities') or []
+        } - self.ability_ids.keys()
+        abilities = get_or_create_abilities(
+            self.user, [{'name': name} for name in names]
+        )
+        self.ability_ids.update((obj.name, obj.id) for obj in abilities)
+
+    def _resolve_fighting_styles(self, items):
+        """Fill the fighting style map with the styles used by items."""
+        styles = {
+            _style_key(style): style
+            for item in items
+            for style in item.get('fighting_styles') or []
+        }
+        for key in self.fighting_style_ids.keys() & styles.keys():
+            del styles[key]
+        if not styles:
+            return
+
+        resolved = resolve_fighting_styles(list(styles.values()))
+        self.fighting_style_ids.update(
+            (key, obj.id) for key, obj in zip(styles, resolved)
+        )
+
+    def _bump_versions(self):
+        """Invalidate cached copies, bulk writes send no signals."""
+        ResourceVersion.objects.bump(ResourceVersion.user_scope(self.user.pk))
+
+    def _relation_keys(self, item):
+        """Return the (facet, value) keys of the relations of an item."""
+        return {
+            *(
+                ('abilities', str(self.ability_ids[ability['name']]))
+                for ability in item.get('abilities') or []
+            ),
+            *(
+                ('fighting_styles',
+                 str(self.fighting_style_ids[_style_key(style)]))
+                for style in item.get('fighting_styles') or []
+            ),
+        }
+
+    def _count_facets(self, deltas):
+        """Add the (facet, value) count deltas of the user.
+
+        The cat counts of fighting styles move with their facet values.
+        """
+        CatFacet.objects.shift({
+            (self.user.pk, *key): delta for key, delta in deltas.items()
+        })
+        if FightingStyles.objects.shift_cat_counts({
+            int(value): delta for (facet, value), delta in deltas.items()
+            if facet == 'fighting_styles'
+        }):
+            ResourceVersion.objects.bump(
+                ResourceVersion.ASSIGNED_FIGHTING_STYLES
+            )
+
+    def _link(self, cats, items):
+        """Insert the through rows linking cats to their relations."""
+        self._resolve_abilities(items)
+        self._resolve_fighting_styles(items)
+        ability_links = Cat.abilities.through
+        style_links = Cat.fighting_styles.through
+
+        ability_links.objects.bulk_create(
+            [
+                ability_links(
+                    cat_id=cat.id,
+                    ability_id=self.ability_ids[ability['name']],
+                )
+                for cat, item in zip(cats, items)
+                for ability in item.get('abilities') or []
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        style_links.objects.bulk_create(
+            [
+                style_links(
+                    cat_id=cat.id,
+                    fightingstyles_id=self.fighting_style_ids[
+                        _style_key(style)
+                    ],
+                )
+                for cat, item in zip(cats, items)
+                for style in item.get('fighting_styles') or []
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+
+    def create(self, items):
+        """Create cats from validated data and return them."""
+        cats = [
+            Cat(
+                user=self.user,
+                **{k: v for k, v in item.items() if k not in RELATED_FIELDS}
+            )
+            for item in items
+        ]
+        with transaction.atomic():
+            Cat.objects.bulk_create(cats, batch_size=self.batch_size)
+            self._link(cats, items)
+            facets = Counter()
+            for cat, item in zip(cats, items):
+                facets.update(trait_keys(cat))
+                facets.update(self._relation_keys(item))
+            self._count_facets(facets)
+            refresh_documents(
+                [cat.id for cat in cats], batch_size=self.batch_size
+            )
+            self._bump_versions()
+
+        return cats
+
+    def update(self, cats, items):
+        """Apply validated partial data to cats and return them."""
+        fields = {'updated_at'}
+        now = timezone.now()
+        # Facet counts move from the loaded fields to the new ones.
+        facets = Counter()
+        for cat, item in zip(cats, items):
+            facets.subtract(trait_keys(cat))
+            cat.updated_at = now
+            for attr, value in item.items():
+                if attr not in RELATED_FIELDS:
+                    setattr(cat, attr, value)
+                    fields.add(attr)
+            facets.update(trait_keys(cat))
+
+        with transaction.atomic():
+            Cat.objects.bulk_update(
+                cats, sorted(fields), batch_size=self.batch_size
+            )
+            for field_name, column in [
+                ('abilities', 'ability_id'),
+                ('fighting_styles', 'fightingstyles_id'),
+            ]:
+                replaced = getattr(Cat, field_name).through.objects.filter(
+                    cat_id__in=[
+                        cat.id for cat, item in zip(cats, items)
+                        if field_name in item
+                    ]
+                )
+                unlinked = list(replaced.values_list(column, flat=True))
+                facets.subtract((field_name, str(pk)) for pk in unlinked)
+                replaced.delete()
+            self._link(cats, items)
+            for item in items:
+                facets.update(self._relation_keys(item))
+            self._count_facets(facets)
+            refresh_documents(
+                [cat.id for cat in cats], batch_size=self.batch_size
+            )
+            self._bump_versions()
+
+        return cats
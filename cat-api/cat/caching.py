@@ -0,0 +1,87 @@
+"""
+Caching of cat API responses.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework import status
+from rest_framework.response import Response
+
+
+# Query parameters listing ids, their order does not change the result.
+ID_LIST_PARAMS = ('abilities', 'fighting_styles')
+
+
+def normalize_query_params(query_params):
+    """Return the query parameters in a canonical order."""
+    params = []
+    for key in sorted(query_params):
+        values = query_params.getlist(key)
+        if key in ID_LIST_PARAMS:
+            values = [
+                ','.join(sorted(set(value.split(',')), key=str))
+                for value in values
+            ]
+        params.append((key, sorted(values)))
+
+    return params
+
+
+class ResponseCacheMixin:
+    """Serve repeated reads of a user from a shared cache.
+
+    Entries are keyed by the user, action, object, normalized query
+    parameters and the version stamps of the view, see
+    `ConditionalGetMixin`. Every write bumps a version, so a stale
+    entry is never read again and expires after
+    `CAT_RESPONSE_CACHE_TTL` seconds.
+    """
+    cached_actions = ('list', 'retrieve')
+
+    def get_response_cache(self):
+        """Return the response cache, None when caching is disabled."""
+        alias = getattr(settings, 'CAT_RESPONSE_CACHE', None)
+        return caches[alias] if alias else None
+
+    def get_response_cache_key(self, request):
+        """Return the cache key of the response to request."""
+        stamps = getattr(self, 'version_stamps', None)
+        if stamps is None:
+            stamps = self.version_stamps = self.get_version_stamps()
+        digest = hashlib.sha1(repr((
+            request.build_absolute_uri('/'),
+            self.kwargs.get(self.lookup_url_kwarg or self.lookup_field),
+            normalize_query_params(request.query_params),
+            request.accepted_renderer.format,
+            stamps,
+        )).encode()).hexdigest()
+
+        return (
+            f'response:{self.basename}:{self.action}:'
+            f'{request.user.pk}:{digest}'
+        )
+
+    def _cached(self, handler, request, *args, **kwargs):
+        """Return the cached response of handler, caching it on a miss."""
+        cache = self.get_response_cache()
+        if cache is None:
+            return handler(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.CAT_RESPONSE_CACHE_TTL)
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,151 @@
+"""
+Process wide cache of the fighting styles catalog.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+
+from core.models import FightingStyles
+
+
+CACHE_KEY = 'cat:fighting_styles:catalog'
+
+
+class FightingStylesCatalog:
+    """Cached copy of the global fighting styles table.
+
+    Rows are kept in process memory for `FIGHTING_STYLES_LOCAL_TTL`
+    seconds, or until invalidated, so changes made by other processes
+    are picked up. When `FIGHTING_STYLES_CACHE` names a cache alias, the
+    rows are also shared through that cache so that processes load the
+    table once.
+
+    A transaction changing the styles reads a copy of its own until it
+    commits, as its rows may still be rolled back.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = None
+        self._transaction = threading.local()
+
+    def _shared_cache(self):
+        """Return the shared cache, if configured."""
+        alias = getattr(settings, 'FIGHTING_STYLES_CACHE', None)
+        return caches[alias] if alias else None
+
+    def _load(self):
+        """Read the catalog from the database."""
+        rows = [
+            {'id': pk, 'name': name, 'ground_allowed': ground_allowed}
+            for pk, name, ground_allowed in FightingStyles.objects.order_by(
+                '-name', 'id'
+            ).values_list('id', 'name', 'ground_allowed')
+        ]
+        index = {}
+        for row in rows:
+            index.setdefault((row['name'], row['ground_allowed']), row)
+            index.setdefault((row['name'], None), row)
+
+        return {'rows': rows, 'index': index}
+
+    def _transaction_catalog(self):
+        """Return the copy of a transaction changing the styles.
+
+        None when the transaction changed no style. The copy is loaded
+        again once a savepoint was left, as it may have been rolled back
+        along with the change.
+        """
+        state = self._transaction
+        connection = transaction.get_connection()
+        if not getattr(state, 'changed', False):
+            return None
+        if not connection.in_atomic_block:
+            # The transaction was rolled back.
+            state.changed = False
+            state.catalog = None
+            return None
+
+        savepoints = list(connection.savepoint_ids)
+        catalog = state.catalog
+        if catalog is None or catalog['savepoints'] != savepoints:
+            catalog = {**self._load(), 'savepoints': savepoints}
+            state.catalog = catalog
+
+        return catalog
+
+    def _get(self):
+        """Return the catalog, loading it on a miss."""
+        catalog = self._transaction_catalog()
+        if catalog is not None:
+            return catalog
+
+        local = self._local
+        if local is not None and time.monotonic() < local['expires']:
+            return local
+
+        shared = self._shared_cache()
+        with self._lock:
+            catalog = shared.get(CACHE_KEY) if shared is not None else None
+            if catalog is None:
+                catalog = self._load()
+                if shared is not None:
+                    shared.set(CACHE_KEY, catalog, None)
+            ttl = getattr(settings, 'FIGHTING_STYLES_LOCAL_TTL', 5)
+            self._local = {**catalog, 'expires': time.monotonic() + ttl}
+
+            return self._local
+
+    def rows(self):
+        """Return the fighting styles as dicts ordered by name desc."""
+        return self._get()['rows']
+
+    def lookup(self, name, ground_allowed=None):
+        """Return the id of a fighting style, None when it is missing.
+
+        When ground_allowed is None any style with the name matches.
+        """
+        row = self._get()['index'].get((name, ground_allowed))
+        return row['id'] if row else None
+
+    def get(self, name, ground_allowed=None):
+        """Return a fighting style instance, None when it is missing."""
+        row = self._get()['index'].get((name, ground_allowed))
+        if row is None:
+            return None
+
+        return FightingStyles.from_db(
+            router.db_for_read(FightingStyles), list(row), list(row.values())
+        )
+
+    def _drop(self):
+        """Drop the cached catalog in this process and the shared cache."""
+        with self._lock:
+            self._local = None
+        shared = self._shared_cache()
+        if shared is not None:
+            shared.delete(CACHE_KEY)
+
+    def _committed(self):
+        """Drop the cached catalog once a change is committed."""
+        self._transaction.changed = False
+        self._transaction.catalog = None
+        self._drop()
+
+    def invalidate(self):
+        """Drop the cached catalog now and once the change is committed.
+
+        Dropping it again after the commit discards a catalog loaded
+        meanwhile without the uncommitted change.
+        """
+        self._drop()
+        if transaction.get_connection().in_atomic_block:
+            self._transaction.changed = True
+            self._transaction.catalog = None
+        transaction.on_commit(self._committed, robust=True)
+
+
+fighting_styles_catalog = FightingStylesCatalog()
@@ -0,0 +1,110 @@
+"""
+Conditional GET of cat API resources.
+"""
+import hashlib
+
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from core.models import ResourceVersion
+
+
+class NotModified(APIException):
+    """The copy held by the client is current."""
+    status_code = status.HTTP_304_NOT_MODIFIED
+
+
+def _strip_weak(etag):
+    """Return an entity tag without its weak indicator."""
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+class ConditionalGetMixin:
+    """Answer reads with 304 while the resource versions are unchanged.
+
+    The ETag hashes the request path with the versions of the scopes
+    returned by `get_version_scopes`, so stale copies are detected with
+    one indexed lookup before the queryset is evaluated.
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def get_version_scopes(self):
+        """Return the version scopes the response depends on."""
+        return [ResourceVersion.user_scope(self.request.user.pk)]
+
+    def get_version_stamps(self):
+        """Return (scope, version, updated_at) the response depends on."""
+        return ResourceVersion.objects.stamps(self.get_version_scopes())
+
+    def _version_stamp(self, request):
+        """Return the ETag and last modification time of the response."""
+        stamps = self.version_stamps = self.get_version_stamps()
+        digest = hashlib.sha1(repr((
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            stamps,
+        )).encode()).hexdigest()
+        last_modified = max(
+            (updated_at for _, _, updated_at in stamps if updated_at),
+            default=None,
+        )
+
+        return f'"{digest}"', last_modified
+
+    def _is_current(self, request, etag, last_modified):
+        """Return whether the client copy matches the stamp."""
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return '*' in etags or _strip_weak(etag) in map(
+                _strip_weak, etags
+            )
+
+        # Dates are sent in whole seconds, so the stamp is compared with
+        # its fraction, a change in the same second is not current.
+        if_modified_since = parse_http_date_safe(
+            request.headers.get('If-Modified-Since', '')
+        )
+        return (
+            if_modified_since is not None and last_modified is not None
+            and last_modified.timestamp() <= if_modified_since
+        )
+
+    def _set_stamp_headers(self, response, etag, last_modified):
+        """Add the validators of the stamp to a response."""
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        response['Cache-Control'] = 'private, no-cache'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.version_stamp = None
+        if request.method in ('GET', 'HEAD') and (
+            self.action in self.conditional_actions
+        ):
+            self.version_stamp = self._version_stamp(request)
+            if self._is_current(request, *self.version_stamp):
+                raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            self._set_stamp_headers(response, *self.version_stamp)
+            return response
+
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if getattr(self, 'version_stamp', None) and (
+            response.status_code == status.HTTP_200_OK
+        ):
+            self._set_stamp_headers(response, *self.version_stamp)
+
+        return response
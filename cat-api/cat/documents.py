@@ -0,0 +1,123 @@
+"""
+Materialized JSON documents of cats.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from rest_framework import serializers
+
+from core.models import Cat, ResourceVersion
+from cat.fast_serializers import FastReadSerializer
+from cat.serializers import CatDetailSerializer, CatSerializer
+from cat.workers import WorkerPool
+
+
+cat_document_reader = FastReadSerializer(CatDetailSerializer)
+
+
+def build_documents(queryset):
+    """Return the detail representation of each cat of queryset."""
+    return cat_document_reader.many(queryset)
+
+
+def get_document(cat):
+    """Return the stored document of a cat, building a missing one."""
+    if cat.document:
+        return cat.document
+
+    return build_documents(Cat.objects.filter(pk=cat.pk))[0]
+
+
+def refresh_documents(cat_ids, batch_size=1000):
+    """Store freshly built documents of the cats."""
+    cat_ids = sorted(set(cat_ids))
+    for start in range(0, len(cat_ids), batch_size):
+        documents = build_documents(
+            Cat.objects.filter(pk__in=cat_ids[start:start + batch_size])
+        )
+        Cat.objects.bulk_update(
+            [Cat(pk=document['id'], document=document)
+             for document in documents],
+            ['document'],
+            batch_size=batch_size,
+        )
+
+
+def refresh_stale_documents(cat_ids, batch_size=1000):
+    """Refresh documents left stale, bumping the versions of their users.
+
+    Run in the background, so each batch bumps the versions once its
+    documents are stored and readers of a new version see them.
+    """
+    cat_ids = sorted(set(cat_ids))
+    for start in range(0, len(cat_ids), batch_size):
+        batch = cat_ids[start:start + batch_size]
+        with transaction.atomic():
+            refresh_documents(batch, batch_size)
+            user_ids = set(Cat.objects.filter(pk__in=batch).values_list(
+                'user_id', flat=True
+            ))
+            ResourceVersion.objects.bump(
+                *map(ResourceVersion.user_scope, user_ids)
+            )
+
+
+# Threads rebuilding the documents of the cats of changed relations.
+document_workers = WorkerPool('CAT_DOCUMENT_WORKERS', 'cat-document')
+
+
+class CatDocumentSerializer(serializers.BaseSerializer):
+    """Read only serializer returning stored cat documents.
+
+    Documents hold the fields of `CatDetailSerializer`, subclasses pick
+    the fields they render.
+    """
+    document_fields = CatDetailSerializer.Meta.fields
+
+    def to_representation(self, instance):
+        document = get_document(instance)
+        return {field: document[field] for field in self.document_fields}
+
+
+class CatListDocumentSerializer(CatDocumentSerializer):
+    """Read only serializer returning cat documents for lists."""
+    document_fields = CatSerializer.Meta.fields
+
+
+class DocumentRefresher(threading.local):
+    """Refresh documents of changed cats, at once or in a batch.
+
+    Inside `deferred` the changed cats are collected and refreshed once
+    when the block exits, so a write touching a cat and its relations
+    builds its document a single time.
+    """
+
+    def __init__(self):
+        self.pending = None
+
+    def mark(self, cat_ids):
+        """Refresh the documents of cats, or queue them when deferred."""
+        if self.pending is None:
+            refresh_documents(cat_ids)
+        else:
+            self.pending.update(cat_ids)
+
+    @contextmanager
+    def deferred(self):
+        """Refresh the documents of the cats changed in the block."""
+        if self.pending is not None:
+            yield
+            return
+
+        self.pending = set()
+        try:
+            yield
+            cat_ids = self.pending
+        finally:
+            self.pending = None
+        refresh_documents(cat_ids)
+
+
+cat_documents = DocumentRefresher()
@@ -0,0 +1,90 @@
+"""
+Streaming export of cats.
+"""
+import csv
+import json
+
+from rest_framework import renderers
+
+
+CAT_FIELDS = ['id', 'name', 'description', 'weight', 'color', 'dangerous']
+CSV_HEADER = CAT_FIELDS + ['abilities', 'fighting_styles']
+
+
+def _dumps(data):
+    """Encode data as compact JSON."""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """Renderer for newline delimited JSON.
+
+    Exported rows are streamed by the view, the renderer only encodes
+    other responses such as errors.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (_dumps(data) + '\n').encode(self.charset)
+
+
+class CSVRenderer(NDJSONRenderer):
+    """Renderer for comma separated values."""
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+def cat_rows(queryset, chunk_size=1000):
+    """Yield a dict per cat, reading the queryset in chunks."""
+    queryset = queryset.prefetch_related('abilities', 'fighting_styles')
+    for cat in queryset.iterator(chunk_size=chunk_size):
+        row = {field: getattr(cat, field) for field in CAT_FIELDS}
+        row['abilities'] = [
+            {'id': ability.id, 'name': ability.name}
+            for ability in cat.abilities.all()
+        ]
+        row['fighting_styles'] = [
+            {
+                'id': style.id,
+                'name': style.name,
+                'ground_allowed': style.ground_allowed,
+            }
+            for style in cat.fighting_styles.all()
+        ]
+        yield row
+
+
+def stream_ndjson(rows):
+    """Yield rows as lines of JSON."""
+    for row in rows:
+        yield _dumps(row) + '\n'
+
+
+class _Echo:
+    """File-like object returning what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    """Yield rows as CSV lines, relations joined by names."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    for row in rows:
+        yield writer.writerow(
+            [row[field] for field in CAT_FIELDS] + [
+                '|'.join(ability['name'] for ability in row['abilities']),
+                '|'.join(style['name'] for style in row['fighting_styles']),
+            ]
+        )
+
+
+STREAMS = {
+    NDJSONRenderer.format: stream_ndjson,
+    CSVRenderer.format: stream_csv,
+}
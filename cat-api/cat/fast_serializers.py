@@ -0,0 +1,145 @@
+"""
+Read only serializers building representations from `.values()` rows.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.functional import cached_property
+
+from rest_framework import serializers
+
+
+def _identity(value):
+    return value
+
+
+# Conversions matching `to_representation` of common fields.
+CONVERTERS = {
+    serializers.IntegerField: int,
+    serializers.CharField: str,
+    serializers.FloatField: float,
+    serializers.ReadOnlyField: _identity,
+}
+
+
+class FastReadSerializer:
+    """Read only counterpart of a `ModelSerializer` class.
+
+    The fields of `Meta.fields` are read once from the serializer class.
+    Rows come from `.values()` and every nested many relation is loaded
+    with one query on its through table, so output is built from plain
+    dicts and matches the DRF serializer field for field.
+    """
+
+    def __init__(self, serializer_class, relation_ordering='pk'):
+        self.serializer_class = serializer_class
+        self.relation_ordering = relation_ordering
+
+    @cached_property
+    def _plan(self):
+        """Return the (name, column, converter) and relations to render."""
+        serializer = self.serializer_class()
+        model = serializer.Meta.model
+        fields, relations = [], []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if '.' in field.source or field.source == '*':
+                raise ImproperlyConfigured(
+                    f'{self.serializer_class.__name__}.{name} has a '
+                    f'source {field.source!r} fast serializers cannot read.'
+                )
+
+            if isinstance(field, serializers.ListSerializer):
+                relations.append((
+                    name,
+                    model._meta.get_field(field.source),
+                    FastReadSerializer(
+                        type(field.child), self.relation_ordering
+                    ),
+                ))
+                fields.append((name, None, None))
+                continue
+
+            converter = CONVERTERS.get(type(field), field.to_representation)
+            fields.append((name, field.source, converter))
+
+        return model, fields, relations
+
+    @property
+    def columns(self):
+        """Return the columns read from the rows."""
+        model, fields, _ = self._plan
+        columns = [column for _, column, _ in fields if column]
+        if model._meta.pk.attname not in columns:
+            columns.insert(0, model._meta.pk.attname)
+
+        return columns
+
+    def values(self, queryset):
+        """Return queryset reading the columns of the representation."""
+        return queryset.values(*self.columns)
+
+    def _related(self, relation, child, pks):
+        """Return the representations of the related rows per pk.
+
+        pks is a list of primary keys or a queryset selecting them.
+        """
+        through = relation.remote_field.through
+        source = relation.m2m_field_name()
+        target = relation.m2m_reverse_field_name()
+        ordering = f'{target}__{self.relation_ordering}'
+        links = through.objects.filter(
+            **{f'{source}__in': pks}
+        ).order_by(ordering).values(
+            f'{source}_id', *(f'{target}__{c}' for c in child.columns)
+        )
+
+        rows = []
+        owners = []
+        prefix = len(target) + 2
+        for link in links:
+            owners.append(link.pop(f'{source}_id'))
+            rows.append({key[prefix:]: value for key, value in link.items()})
+
+        related = {}
+        for owner, data in zip(owners, child.serialize(rows)):
+            related.setdefault(owner, []).append(data)
+
+        return related
+
+    def serialize(self, rows, pks=None):
+        """Return the representation of each `.values()` row.
+
+        Relations are loaded for pks, a queryset selecting the primary
+        keys of the rows, or for the keys listed in the rows.
+        """
+        model, fields, relations = self._plan
+        rows = list(rows)
+        pk = model._meta.pk.attname
+        if pks is None:
+            pks = [row[pk] for row in rows]
+        related = {
+            name: self._related(relation, child, pks)
+            for name, relation, child in relations
+        } if rows else {}
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, converter in fields:
+                if column is None:
+                    item[name] = related[name].get(row[pk], [])
+                else:
+                    value = row[column]
+                    item[name] = None if value is None else converter(value)
+            data.append(item)
+
+        return data
+
+    def many(self, queryset):
+        """Return the representation of each object of queryset."""
+        if queryset.query.is_sliced:
+            return self.serialize(self.values(queryset))
+
+        return self.serialize(
+            self.values(queryset), queryset.order_by().values('pk')
+        )
@@ -0,0 +1,176 @@
+"""
+Monte Carlo fight simulation of cats.
+"""
+import numpy as np
+
+from django.db.models import Count
+
+from core.models import Cat
+
+
+# Fighters packed from cats, one record of 9 bytes per cat.
+FIGHTER_DTYPE = np.dtype([
+    ('weight', np.float32),
+    ('abilities', np.uint16),
+    ('striking', np.uint8),
+    ('grappling', np.uint8),
+    ('dangerous', np.bool_),
+])
+
+ROUNDS = 3
+# Edge of a fighter per unit of log weight, per ability (diminishing)
+# and when dangerous, in standard deviations of a round score.
+WEIGHT_EDGE = 0.8
+ABILITY_EDGE = 0.15
+DANGEROUS_EDGE = 0.3
+# Edge per style, at most two styles of a kind count.
+STYLE_EDGE = 0.25
+MAX_STYLES = 2
+# Chance a round goes to the ground when a fighter knows a style with
+# ground fighting allowed.
+GROUND_CHANCE = 0.4
+# Rounds scored closer than the margin are drawn.
+DRAW_MARGIN = 0.1
+# Round scores drawn per step, bounding memory to a few megabytes.
+CHUNK_SIZE = 1 << 19
+
+
+def pack_cats(queryset):
+    """Return the ids of the cats of queryset and their fighters.
+
+    Styles with ground fighting allowed count as grappling, the others
+    as striking. Reads the cats, their ability counts and their styles
+    with three queries.
+    """
+    rows = list(
+        queryset.order_by('pk').values_list('pk', 'weight', 'dangerous')
+    )
+    ids = np.fromiter((row[0] for row in rows), np.int64, len(rows))
+    fighters = np.zeros(len(rows), FIGHTER_DTYPE)
+    if not rows:
+        return ids, fighters
+
+    fighters['weight'] = [row[1] or 0.0 for row in rows]
+    fighters['dangerous'] = [row[2] for row in rows]
+
+    pks = queryset.order_by().values('pk')
+    counts = Cat.abilities.through.objects.filter(
+        cat_id__in=pks
+    ).values_list('cat_id').annotate(count=Count('*'))
+    for cat_id, count in counts:
+        fighters['abilities'][np.searchsorted(ids, cat_id)] = count
+
+    styles = Cat.fighting_styles.through.objects.filter(
+        cat_id__in=pks
+    ).values_list('cat_id', 'fightingstyles__ground_allowed')
+    for cat_id, ground_allowed in styles:
+        field = 'grappling' if ground_allowed else 'striking'
+        fighters[field][np.searchsorted(ids, cat_id)] += 1
+
+    return ids, fighters
+
+
+def strengths(fighters):
+    """Return the standing and ground strength of each fighter."""
+    base = (
+        WEIGHT_EDGE * np.log1p(fighters['weight'])
+        + ABILITY_EDGE * np.sqrt(fighters['abilities'], dtype=np.float32)
+        + DANGEROUS_EDGE * fighters['dangerous']
+    )
+    striking = np.minimum(fighters['striking'], MAX_STYLES)
+    grappling = np.minimum(fighters['grappling'], MAX_STYLES)
+
+    return (
+        (base + STYLE_EDGE * striking).astype(np.float32),
+        (base + STYLE_EDGE * grappling).astype(np.float32),
+        grappling > 0,
+    )
+
+
+def _bouts(standing, ground, grounded, bouts, rng):
+    """Return the wins and losses of each pairing over bouts."""
+    shape = (len(standing), bouts, ROUNDS)
+    score = rng.standard_normal(shape, dtype=np.float32)
+    if grounded.any():
+        on_ground = rng.random(shape, dtype=np.float32) < GROUND_CHANCE
+        on_ground &= grounded[:, None, None]
+        score += np.where(
+            on_ground, ground[:, None, None], standing[:, None, None]
+        )
+    else:
+        score += standing[:, None, None]
+
+    won = np.count_nonzero(score > DRAW_MARGIN, axis=2)
+    lost = np.count_nonzero(score < -DRAW_MARGIN, axis=2)
+
+    return (
+        np.count_nonzero(won > lost, axis=1),
+        np.count_nonzero(lost > won, axis=1),
+    )
+
+
+def simulate(fighters, opponents, bouts, seed=None, chunk_size=CHUNK_SIZE):
+    """Return the win, loss and draw counts of each pairing.
+
+    fighters and opponents are arrays of FIGHTER_DTYPE of the same
+    length, pairing i opposes fighters[i] to opponents[i] over bouts of
+    ROUNDS rounds. A bout goes to the fighter winning more rounds, a
+    round to the higher score: the edge of the strengths plus unit
+    normal noise. The counts are an array of shape (pairings, 3).
+    """
+    rng = np.random.default_rng(seed)
+    standing, ground, grounded = strengths(fighters)
+    opponent_standing, opponent_ground, opponent_grounded = strengths(
+        opponents
+    )
+    standing -= opponent_standing
+    ground -= opponent_ground
+    grounded |= opponent_grounded
+
+    counts = np.zeros((len(fighters), 3), np.int64)
+    bout_step = max(1, min(bouts, chunk_size // ROUNDS))
+    pair_step = max(1, chunk_size // (bout_step * ROUNDS))
+    for start in range(0, len(fighters), pair_step):
+        pairs = slice(start, start + pair_step)
+        for done in range(0, bouts, bout_step):
+            wins, losses = _bouts(
+                standing[pairs], ground[pairs], grounded[pairs],
+                min(bout_step, bouts - done), rng,
+            )
+            counts[pairs, 0] += wins
+            counts[pairs, 1] += losses
+    counts[:, 2] = bouts - counts[:, 0] - counts[:, 1]
+
+    return counts
+
+
+def fight_odds(queryset, cat_id, opponent_ids, bouts, seed=None):
+    """Return the simulated odds of a cat against each opponent.
+
+    Cats are read from queryset, Cat.DoesNotExist is raised when the
+    cat or an opponent is missing.
+    """
+    ids, fighters = pack_cats(queryset.filter(pk__in=[cat_id, *opponent_ids]))
+    missing = {cat_id, *opponent_ids}.difference(ids.tolist())
+    if missing:
+        raise Cat.DoesNotExist(
+            'Cats not found: ' + ', '.join(map(str, sorted(missing)))
+        )
+
+    opponents = fighters[np.searchsorted(ids, opponent_ids)]
+    fighter = fighters[np.searchsorted(ids, [cat_id])]
+    counts = simulate(
+        np.repeat(fighter, len(opponents)), opponents, bouts, seed
+    )
+
+    return [
+        {
+            'opponent': opponent_id,
+            'win': wins / bouts,
+            'loss': losses / bouts,
+            'draw': draws / bouts,
+        }
+        for opponent_id, (wins, losses, draws) in zip(
+            opponent_ids, counts.tolist()
+        )
+    ]
@@ -0,0 +1,32 @@
+"""
+Filters for cat APIs.
+"""
+from django.db.models import Exists, OuterRef
+
+from core.models import Cat
+
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+MATCH_MODES = [MATCH_ANY, MATCH_ALL]
+
+
+def filter_by_related(queryset, field_name, ids, match=MATCH_ANY):
+    """Filter cats linked to ids through an M2M field with EXISTS."""
+    field = Cat._meta.get_field(field_name)
+    through = field.remote_field.through
+    links = through.objects.filter(
+        **{field.m2m_field_name(): OuterRef('pk')}
+    )
+    target = field.m2m_reverse_field_name()
+
+    if match == MATCH_ALL:
+        for related_id in set(ids):
+            queryset = queryset.filter(
+                Exists(links.filter(**{target: related_id}))
+            )
+        return queryset
+
+    return queryset.filter(
+        Exists(links.filter(**{f'{target}__in': ids}))
+    )
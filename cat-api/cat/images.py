@@ -0,0 +1,105 @@
+"""
+Background processing of cat images.
+"""
+import logging
+import os
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Cat, ImageBlob, ResourceVersion
+from cat.documents import refresh_documents
+from cat.workers import WorkerPool
+
+
+logger = logging.getLogger(__name__)
+
+# Largest width and height of each variant.
+VARIANTS = {
+    'thumbnail': (200, 200),
+    'web': (1280, 1280),
+}
+
+
+def variant_name(name, variant):
+    """Return the storage name of a variant of an image."""
+    filename = os.path.splitext(os.path.basename(name))[0]
+    return os.path.join(
+        'uploads', 'cat', 'variants', f'{filename}_{variant}.jpg'
+    )
+
+
+def render_variant(image, size):
+    """Return JPEG bytes of the image shrunk to fit size."""
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    buffer = BytesIO()
+    variant.save(
+        buffer, format='JPEG', quality=85, optimize=True, progressive=True
+    )
+
+    return buffer.getvalue()
+
+
+def process_cat_image(cat_id):
+    """Generate the variants of a cat image and mark it ready."""
+    cat = Cat.objects.filter(pk=cat_id).first()
+    if cat is None or not cat.image:
+        return
+
+    name = cat.image.name
+    try:
+        with cat.image.open('rb') as file:
+            image = ImageOps.exif_transpose(Image.open(file))
+            image = image.convert('RGB')
+        rendered = {
+            variant: render_variant(image, size)
+            for variant, size in VARIANTS.items()
+        }
+        # The variants are saved in the transaction referencing them. The
+        # image may have been replaced while processing, unreferenced
+        # variants are then left to the garbage collection.
+        with transaction.atomic():
+            storage = cat.image.storage
+            variants = {
+                variant: storage.save(
+                    variant_name(name, variant), ContentFile(content)
+                )
+                for variant, content in rendered.items()
+            }
+            if Cat.objects.filter(pk=cat_id, image=name).update(
+                image_status=Cat.IMAGE_READY,
+                image_variants=variants,
+                updated_at=timezone.now(),
+            ):
+                ImageBlob.objects.retain(variants.values())
+                refresh_documents([cat_id])
+                ResourceVersion.objects.bump(
+                    ResourceVersion.user_scope(cat.user_id)
+                )
+    except Exception:
+        logger.exception('Processing image of cat %s failed.', cat_id)
+        with transaction.atomic():
+            if Cat.objects.filter(pk=cat_id, image=name).update(
+                image_status=Cat.IMAGE_FAILED,
+                updated_at=timezone.now(),
+            ):
+                refresh_documents([cat_id])
+                ResourceVersion.objects.bump(
+                    ResourceVersion.user_scope(cat.user_id)
+                )
+
+
+# Threads processing uploaded images.
+image_workers = WorkerPool('CAT_IMAGE_WORKERS', 'cat-image')
+
+
+def schedule_image_processing(cat):
+    """Process the cat image once the upload is committed."""
+    transaction.on_commit(
+        lambda: image_workers.submit(process_cat_image, cat.id)
+    )
@@ -0,0 +1,366 @@
+"""
+Matchmaking of cats of similar rating and weight.
+"""
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import MatchTicket
+
+
+logger = logging.getLogger(__name__)
+
+# Upper weights of the weight classes, heavier cats are in the last one.
+WEIGHT_CLASSES = (3.0, 4.5, 6.0)
+# Rating difference accepted at once, widened by the growth per second
+# of waiting up to the largest window.
+BASE_WINDOW = 50.0
+WINDOW_GROWTH = 10.0
+MAX_WINDOW = 400.0
+# Rating points per bucket of the queue.
+BUCKET_WIDTH = 25.0
+
+
+def weight_class(weight):
+    """Return the weight class of a weight."""
+    return bisect.bisect_left(WEIGHT_CLASSES, weight or 0.0)
+
+
+def tolerance(waited):
+    """Return the rating window after waiting a number of seconds."""
+    return min(BASE_WINDOW + WINDOW_GROWTH * max(waited, 0.0), MAX_WINDOW)
+
+
+def _span(window):
+    """Return the number of buckets searched each side for a window."""
+    return int(window // BUCKET_WIDTH) + 1
+
+
+class Ticket:
+    """Waiting ticket held by the queue."""
+    __slots__ = (
+        'id', 'user_id', 'cat_id', 'rating', 'weight_class', 'queued_at',
+        'span',
+    )
+
+    def __init__(self, id, user_id, cat_id, rating, weight_class,
+                 queued_at):
+        self.id = id
+        self.user_id = user_id
+        self.cat_id = cat_id
+        self.rating = rating
+        self.weight_class = weight_class
+        self.queued_at = queued_at
+        # Buckets searched each side by the last attempt to match.
+        self.span = -1
+
+    @classmethod
+    def from_model(cls, ticket):
+        """Return the queue ticket of a MatchTicket."""
+        return cls(
+            ticket.id, ticket.user_id, ticket.cat_id, ticket.rating,
+            ticket.weight_class, ticket.created_at.timestamp(),
+        )
+
+
+class RatingQueue:
+    """Waiting tickets indexed by weight class and rating bucket.
+
+    A ticket is matched with the oldest ticket of another user in the
+    nearest bucket within the rating window of either of them, so a
+    match looks at the few buckets of the largest window instead of the
+    whole queue. Waiting tickets are tried again by `sweep` as their
+    window widens.
+    """
+
+    def __init__(self):
+        # Tickets by id, and by (weight class, bucket), oldest first.
+        self.tickets = {}
+        self.buckets = defaultdict(dict)
+
+    def __len__(self):
+        return len(self.tickets)
+
+    def _bucket(self, ticket):
+        """Return the (weight class, bucket) key of a ticket."""
+        return ticket.weight_class, int(ticket.rating // BUCKET_WIDTH)
+
+    def add(self, ticket):
+        """Queue a ticket."""
+        self.tickets[ticket.id] = ticket
+        self.buckets[self._bucket(ticket)][ticket.id] = ticket
+
+    def remove(self, ticket_id):
+        """Remove and return a queued ticket, None when missing."""
+        ticket = self.tickets.pop(ticket_id, None)
+        if ticket is not None:
+            key = self._bucket(ticket)
+            del self.buckets[key][ticket_id]
+            if not self.buckets[key]:
+                del self.buckets[key]
+
+        return ticket
+
+    def find(self, ticket, window, now):
+        """Return the opponent of ticket, None if none.
+
+        A rating difference within the window of either ticket matches,
+        so the buckets of the largest window are searched.
+        """
+        klass, center = self._bucket(ticket)
+        ticket.span = _span(window)
+        for distance in range(_span(MAX_WINDOW) + 1):
+            for bucket in {center - distance, center + distance}:
+                for other in self.buckets.get((klass, bucket), {}).values():
+                    if other.user_id != ticket.user_id and abs(
+                        other.rating - ticket.rating
+                    ) <= max(window, tolerance(now - other.queued_at)):
+                        return other
+
+        return None
+
+    def match(self, ticket, now):
+        """Return the opponent of a new ticket, or queue the ticket.
+
+        The opponent is removed from the queue.
+        """
+        opponent = self.find(
+            ticket, tolerance(now - ticket.queued_at), now
+        )
+        if opponent is None:
+            self.add(ticket)
+            return None
+
+        return self.remove(opponent.id)
+
+    def sweep(self, now):
+        """Match the tickets whose window reached new buckets.
+
+        Older tickets are matched first. Returns the (ticket, opponent)
+        pairs removed from the queue.
+        """
+        pairs = []
+        for ticket in list(self.tickets.values()):
+            if ticket.id not in self.tickets:
+                continue
+            window = tolerance(now - ticket.queued_at)
+            if _span(window) == ticket.span:
+                continue
+
+            opponent = self.find(ticket, window, now)
+            if opponent is not None:
+                pairs.append((
+                    self.remove(ticket.id), self.remove(opponent.id)
+                ))
+
+        return pairs
+
+
+def load_waiting(after_id=0, ids=None):
+    """Return queue tickets of the waiting tickets after an id, or ids."""
+    tickets = MatchTicket.objects.filter(status=MatchTicket.WAITING)
+    if ids is not None:
+        tickets = tickets.filter(pk__in=ids)
+    else:
+        tickets = tickets.filter(pk__gt=after_id)
+
+    return [Ticket.from_model(ticket) for ticket in tickets.order_by('id')]
+
+
+def store_match(ticket_id, opponent_id):
+    """Match two waiting tickets, return whether both were waiting."""
+    with transaction.atomic():
+        cats = dict(MatchTicket.objects.select_for_update().filter(
+            pk__in=[ticket_id, opponent_id], status=MatchTicket.WAITING
+        ).values_list('id', 'cat_id'))
+        if len(cats) < 2:
+            return False
+
+        now = timezone.now()
+        for own, other in [(ticket_id, opponent_id), (opponent_id, ticket_id)]:
+            MatchTicket.objects.filter(pk=own).update(
+                status=MatchTicket.MATCHED,
+                opponent_id=cats[other],
+                matched_at=now,
+            )
+
+    return True
+
+
+# Waiting tickets read to match a ticket against the database.
+FALLBACK_CANDIDATES = 100
+
+
+def match_in_database(ticket):
+    """Match a new ticket with a waiting one found in the database.
+
+    Used when the loop is off, waiting tickets in the largest window are
+    read from the waiting index and the oldest one whose own window
+    covers the rating difference is taken.
+    """
+    now = timezone.now()
+    candidates = MatchTicket.objects.filter(
+        ~Q(user_id=ticket.user_id),
+        status=MatchTicket.WAITING,
+        weight_class=ticket.weight_class,
+        rating__range=(
+            ticket.rating - MAX_WINDOW, ticket.rating + MAX_WINDOW
+        ),
+    ).order_by('id').values_list(
+        'id', 'rating', 'created_at'
+    )[:FALLBACK_CANDIDATES]
+    for candidate_id, rating, created_at in candidates:
+        window = tolerance((now - created_at).total_seconds())
+        if abs(rating - ticket.rating) <= window and (
+            store_match(ticket.id, candidate_id)
+        ):
+            return True
+
+    return False
+
+
+def _with_connection(func, *args):
+    """Run func in an executor thread with a usable connection."""
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+class MatchmakingService:
+    """Asyncio loop matching tickets in memory on a background thread.
+
+    Tickets are saved before they are queued, so the loop reloads the
+    waiting ones when it (re)starts and picks up the tickets of other
+    processes every sweep. Matches are stored with a conditional update,
+    a ticket matched or cancelled elsewhere is never matched twice.
+    """
+
+    def __init__(self, store=store_match, load=load_waiting):
+        self.store = store
+        self.load = load
+        self.queue = RatingQueue()
+        self.loop = None
+        # Newest ticket id synced, and ids submitted locally since.
+        self.synced_id = 0
+        self.submitted = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def running(self):
+        """Return whether the loop thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the loop, once the waiting tickets are loaded."""
+        with self._lock:
+            if self.running:
+                return
+
+            self.queue = RatingQueue()
+            self.synced_id = 0
+            self.submitted = set()
+            ready = threading.Event()
+            self._thread = threading.Thread(
+                target=asyncio.run,
+                args=(self._main(ready),),
+                name='matchmaking',
+                daemon=True,
+            )
+            self._thread.start()
+            ready.wait()
+
+    def submit(self, ticket):
+        """Match or queue a ticket in the loop."""
+        self.start()
+        self.loop.call_soon_threadsafe(self._submit, ticket)
+
+    def cancel(self, ticket_id):
+        """Drop a ticket from the queue."""
+        if self.running:
+            self.loop.call_soon_threadsafe(self.queue.remove, ticket_id)
+
+    async def _main(self, ready):
+        self.loop = asyncio.get_running_loop()
+        try:
+            await self._sync()
+        except Exception:
+            logger.exception('Loading the matchmaking queue failed.')
+        finally:
+            ready.set()
+
+        while True:
+            await asyncio.sleep(settings.MATCHMAKING_INTERVAL)
+            try:
+                await self._sync()
+                await self._store(self.queue.sweep(time.time()))
+            except Exception:
+                logger.exception('Matchmaking sweep failed.')
+
+    async def _db(self, func, *args):
+        """Run a database call in the default executor."""
+        return await self.loop.run_in_executor(
+            None, _with_connection, func, *args
+        )
+
+    async def _sync(self):
+        """Queue the tickets saved since the last sync."""
+        tickets = await self._db(self.load, self.synced_id)
+        pairs = []
+        for ticket in tickets:
+            self.synced_id = max(self.synced_id, ticket.id)
+            if ticket.id in self.submitted or ticket.id in self.queue.tickets:
+                continue
+            opponent = self.queue.match(ticket, time.time())
+            if opponent is not None:
+                pairs.append((ticket, opponent))
+        self.submitted = {
+            ticket_id for ticket_id in self.submitted
+            if ticket_id > self.synced_id
+        }
+        await self._store(pairs)
+
+    def _submit(self, ticket):
+        """Match or queue a ticket, in the loop."""
+        self.submitted.add(ticket.id)
+        opponent = self.queue.match(ticket, time.time())
+        if opponent is not None:
+            self.loop.create_task(self._store([(ticket, opponent)]))
+
+    async def _store(self, pairs):
+        """Store matches, queueing again the tickets still waiting."""
+        for ticket, opponent in pairs:
+            if await self._db(self.store, ticket.id, opponent.id):
+                continue
+            for waiting in await self._db(
+                self.load, 0, [ticket.id, opponent.id]
+            ):
+                self.queue.add(waiting)
+
+
+matchmaker = MatchmakingService()
+
+
+def enqueue(ticket):
+    """Match a new MatchTicket, in the loop or in the database.
+
+    The loop runs with a `MATCHMAKING_INTERVAL`, without it tickets are
+    matched against the database at once.
+    """
+    if not settings.MATCHMAKING_INTERVAL:
+        return match_in_database(ticket)
+
+    transaction.on_commit(
+        lambda: matchmaker.submit(Ticket.from_model(ticket))
+    )
+    return False
@@ -0,0 +1,44 @@
+"""
+Pagination for cat APIs.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class CatCursorPagination(CursorPagination):
+    """Keyset pagination for cats, newest first."""
+    ordering = '-id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class AbilityCursorPagination(CursorPagination):
+    """Keyset pagination for abilities, ordered by name descending."""
+    ordering = ('-name', '-id')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class TournamentCursorPagination(CursorPagination):
+    """Keyset pagination for tournaments, newest first."""
+    ordering = '-id'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class TournamentMatchCursorPagination(CursorPagination):
+    """Keyset pagination for the matches of a round, in played order."""
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class MatchTicketCursorPagination(CursorPagination):
+    """Keyset pagination for matchmaking tickets, newest first."""
+    ordering = '-id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
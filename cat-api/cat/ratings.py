@@ -0,0 +1,120 @@
+"""
+Elo ratings of cats.
+"""
+from collections import Counter
+
+import numpy as np
+
+from core.models import CatRating, RatingBucket
+
+
+# Rating points moved by a match between equally rated cats.
+K_FACTOR = 32
+
+
+class RatingLedger:
+    """Ratings of a set of cats, updated in memory and stored at once.
+
+    Matches are recorded a round at a time, each cat playing at most
+    once per round, and `save` writes the changed ratings with one
+    upsert and shifts the rating buckets of the leaderboard.
+    """
+
+    def __init__(self, rows):
+        """Build from (cat_id, user_id, rating, matches) rows.
+
+        A rating of None marks a cat without a stored rating.
+        """
+        cat_ids, user_ids, ratings, matches = zip(*rows) if rows else (
+            (), (), (), ()
+        )
+        self.cat_ids = list(cat_ids)
+        self.user_ids = list(user_ids)
+        self.stored = [rating is not None for rating in ratings]
+        self.initial = np.array(
+            [CatRating.INITIAL if r is None else r for r in ratings], float
+        )
+        self.ratings = self.initial.copy()
+        self.matches = np.array([m or 0 for m in matches], np.int64)
+        self.changed = np.zeros(len(self.cat_ids), bool)
+        self._positions = {
+            cat_id: position for position, cat_id in enumerate(self.cat_ids)
+        }
+
+    @classmethod
+    def load(cls, cats, fresh=False):
+        """Return the ledger of the cats of a queryset.
+
+        Stored ratings are ignored when fresh, as when replaying every
+        match from the start.
+        """
+        if fresh:
+            rows = [
+                (cat_id, user_id, None, None)
+                for cat_id, user_id in cats.order_by().values_list(
+                    'id', 'user_id'
+                )
+            ]
+        else:
+            rows = list(cats.order_by().values_list(
+                'id', 'user_id', 'rating__rating', 'rating__matches'
+            ))
+
+        return cls(rows)
+
+    def positions(self, cat_ids):
+        """Return the ledger positions of cat ids."""
+        return np.array(
+            [self._positions[cat_id] for cat_id in cat_ids], np.int64
+        )
+
+    def record(self, a, b, outcome):
+        """Update the ratings after matches between positions a and b.
+
+        outcome is 1 where a won, -1 where b won and 0 for a draw.
+        """
+        score = (np.asarray(outcome) + 1) / 2
+        expected = 1 / (1 + 10 ** ((self.ratings[b] - self.ratings[a]) / 400))
+        change = K_FACTOR * (score - expected)
+        self.ratings[a] += change
+        self.ratings[b] -= change
+        self.matches[a] += 1
+        self.matches[b] += 1
+        self.changed[a] = self.changed[b] = True
+
+    def save(self, batch_size=1000):
+        """Store the changed ratings and shift their buckets."""
+        changed = np.flatnonzero(self.changed).tolist()
+        ratings = self.ratings.tolist()
+        matches = self.matches.tolist()
+        CatRating.objects.bulk_create(
+            [
+                CatRating(
+                    cat_id=self.cat_ids[i],
+                    user_id=self.user_ids[i],
+                    rating=ratings[i],
+                    matches=matches[i],
+                )
+                for i in changed
+            ],
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['cat'],
+            update_fields=['rating', 'matches', 'updated_at'],
+        )
+
+        deltas = Counter()
+        for i in changed:
+            user_id = self.user_ids[i]
+            if self.stored[i]:
+                deltas[user_id, CatRating.bucket(self.initial[i])] -= 1
+            deltas[user_id, CatRating.bucket(ratings[i])] += 1
+        RatingBucket.objects.shift(deltas)
+
+        self.initial = self.ratings.copy()
+        self.stored = [
+            stored or changed for stored, changed in zip(
+                self.stored, self.changed.tolist()
+            )
+        ]
+        self.changed[:] = False
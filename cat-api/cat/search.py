@@ -0,0 +1,225 @@
+"""
+Faceted search of cats.
+"""
+from collections import Counter
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connection
+from django.db.models import (
+    BigIntegerField,
+    Case,
+    CharField,
+    Count,
+    F,
+    IntegerField,
+    Q,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast
+
+from core.models import Cat, CatFacet
+from cat.filters import filter_by_related
+from cat.matchmaking import WEIGHT_CLASSES, weight_class
+
+
+# Text search configuration, the GIN index of core 0017 is built on the
+# same vector so the search is answered from it.
+SEARCH_CONFIG = 'english'
+SEARCH_VECTOR = SearchVector('name', 'description', config=SEARCH_CONFIG)
+
+FACETS = ('weight_class', 'color', 'dangerous', 'abilities',
+          'fighting_styles')
+# Columns grouped to count the facets with their types, see facet_rows.
+FACET_COLUMNS = {
+    'weight_class': IntegerField,
+    'color': CharField,
+    'dangerous': IntegerField,
+    'ability': BigIntegerField,
+    'style': BigIntegerField,
+}
+
+
+def search_text(queryset, text):
+    """Filter cats whose name or description match text.
+
+    Postgres matches the words with full-text search, other databases
+    require each word in the name or description.
+    """
+    if connection.vendor == 'postgresql':
+        return queryset.alias(search=SEARCH_VECTOR).filter(
+            search=SearchQuery(
+                text, config=SEARCH_CONFIG, search_type='websearch'
+            )
+        )
+
+    return queryset.filter(*[
+        Q(name__icontains=word) | Q(description__icontains=word)
+        for word in text.split()
+    ])
+
+
+def is_filtered(filters):
+    """Return whether validated search filters narrow the cats."""
+    return any(
+        value not in (None, '', [])
+        for name, value in filters.items() if name != 'match'
+    )
+
+
+def search_cats(queryset, filters):
+    """Filter cats by the validated search filters."""
+    if filters.get('q'):
+        queryset = search_text(queryset, filters['q'])
+    if filters.get('weight_min') is not None:
+        queryset = queryset.filter(weight__gte=filters['weight_min'])
+    if filters.get('weight_max') is not None:
+        queryset = queryset.filter(weight__lte=filters['weight_max'])
+    if filters.get('color'):
+        queryset = queryset.filter(color__in=filters['color'])
+    if filters.get('dangerous') is not None:
+        queryset = queryset.filter(dangerous=filters['dangerous'])
+    for field in ['abilities', 'fighting_styles']:
+        if filters.get(field):
+            queryset = filter_by_related(
+                queryset, field, filters[field], filters['match']
+            )
+
+    return queryset
+
+
+def trait_keys(cat):
+    """Return the (facet, value) keys of the fields of a cat."""
+    keys = [
+        ('weight_class', str(weight_class(cat.weight))),
+        ('dangerous', str(int(cat.dangerous))),
+    ]
+    if cat.color:
+        keys.append(('color', cat.color))
+
+    return keys
+
+
+def _weight_class():
+    """Return the weight class of a cat as a database expression."""
+    return Case(
+        *[
+            When(weight__lte=upper, then=Value(klass))
+            for klass, upper in enumerate(WEIGHT_CLASSES)
+        ],
+        default=Value(len(WEIGHT_CLASSES)),
+    )
+
+
+def _grouped(queryset, **columns):
+    """Return queryset grouped by the facet columns, missing ones null.
+
+    Every column is annotated in the same order and missing ones are
+    nulls cast to the column type, so the branches of a union select
+    them alike. Postgres types untyped nulls as text otherwise.
+    """
+    return queryset.annotate(**{
+        f'facet_{name}': columns.get(name, Cast(Value(None), field()))
+        for name, field in FACET_COLUMNS.items()
+    }).values_list(
+        *[f'facet_{name}' for name in FACET_COLUMNS]
+    ).annotate(count=Count('*'))
+
+
+def facet_rows(queryset):
+    """Return the grouped facet rows of the cats of a queryset.
+
+    Rows are (weight_class, color, dangerous, ability, style, count).
+    The fields of the cats are grouped together and each relation
+    apart, in the branches of one UNION ALL query.
+    """
+    cats = queryset.order_by()
+    pks = cats.values('pk')
+
+    return _grouped(
+        cats,
+        weight_class=_weight_class(),
+        color=F('color'),
+        dangerous=Case(When(dangerous=True, then=Value(1)), default=Value(0)),
+    ).union(
+        _grouped(
+            Cat.abilities.through.objects.filter(cat_id__in=pks),
+            ability=F('ability_id'),
+        ),
+        _grouped(
+            Cat.fighting_styles.through.objects.filter(cat_id__in=pks),
+            style=F('fightingstyles_id'),
+        ),
+        all=True,
+    )
+
+
+def facet_keys(queryset):
+    """Return the Counter of (facet, value) keys of a queryset's cats.
+
+    Values are text as stored by CatFacet.
+    """
+    keys = Counter()
+    for klass, color, dangerous, ability, style, count in facet_rows(
+        queryset
+    ):
+        if ability is not None:
+            keys['abilities', str(ability)] += count
+        elif style is not None:
+            keys['fighting_styles', str(style)] += count
+        else:
+            keys['weight_class', str(klass)] += count
+            keys['dangerous', str(dangerous)] += count
+            if color:
+                keys['color', color] += count
+
+    return keys
+
+
+def _facets(rows):
+    """Return the facets of (facet, value, count) rows.
+
+    Values of each facet are sorted by count, then value.
+    """
+    bounds = (None, *WEIGHT_CLASSES, None)
+    facets = {facet: [] for facet in FACETS}
+    for facet, value, count in rows:
+        if not count:
+            continue
+        if facet == 'weight_class':
+            klass = int(value)
+            facets[facet].append({
+                'value': klass,
+                'min': bounds[klass],
+                'max': bounds[klass + 1],
+                'count': count,
+            })
+        elif facet == 'color':
+            facets[facet].append({'value': value, 'count': count})
+        elif facet == 'dangerous':
+            facets[facet].append({'value': value == '1', 'count': count})
+        else:
+            facets[facet].append({'value': int(value), 'count': count})
+    for values in facets.values():
+        values.sort(key=lambda item: (-item['count'], item['value']))
+
+    return facets
+
+
+def facet_counts(queryset):
+    """Return the counts per facet value of the cats of a queryset."""
+    return _facets(
+        (facet, value, count)
+        for (facet, value), count in facet_keys(queryset).items()
+    )
+
+
+def stored_facet_counts(user):
+    """Return the counts per facet value of every cat of a user.
+
+    Read from the CatFacet counts kept up to date by cat.signals and
+    CatBulkWriter, instead of grouping the cats.
+    """
+    return _facets(CatFacet.objects.filter(user=user).values_list(
+        'facet', 'value', 'count'
+    ))
@@ -1,9 +1,103 @@
 """
 Serializers for cat APIs.
 """
+from django.core.files.storage import default_storage
+from django.db import transaction
+
 from rest_framework import serializers
 
-from core.models import Ability, Cat, FightingStyles
+from core.models import (
+    Ability,
+    Cat,
+    FightingStyles,
+    MatchTicket,
+    ResourceVersion,
+    Tournament,
+    TournamentEntry,
+    TournamentMatch,
+)
+from cat.catalog import fighting_styles_catalog
+from cat.filters import MATCH_ANY, MATCH_MODES
+
+
+def get_or_create_abilities(user, abilities):
+    """Return the user abilities by name, creating missing ones in bulk."""
+    names = list(dict.fromkeys(ability['name'] for ability in abilities))
+    if not names:
+        return []
+
+    found = {}
+    for ability in Ability.objects.filter(
+        user=user, name__in=names
+    ).order_by('id'):
+        found.setdefault(ability.name, ability)
+    missing = [
+        Ability(user=user, name=name) for name in names if name not in found
+    ]
+    for ability in Ability.objects.bulk_create(missing):
+        found[ability.name] = ability
+    if missing:
+        ResourceVersion.objects.bump(ResourceVersion.user_scope(user.pk))
+
+    return [found[name] for name in names]
+
+
+def get_or_create_fighting_style(style):
+    """Return the first fighting style matching data, creating it.
+
+    Styles missing from the catalog may have been created meanwhile by
+    another process, they are looked up before one is created.
+    """
+    lookup = {'name': style['name']}
+    if style.get('ground_allowed') is not None:
+        lookup['ground_allowed'] = style['ground_allowed']
+    style_obj = FightingStyles.objects.filter(**lookup).order_by('id').first()
+    if style_obj is None:
+        style_obj = FightingStyles(**style)
+        style_obj.clean_fields()
+        style_obj.save()
+
+    return style_obj
+
+
+def resolve_fighting_styles(fighting_styles):
+    """Return a fighting style per item of data, creating missing ones."""
+    styles = []
+    missing = {}
+    for style in fighting_styles:
+        style_obj = fighting_styles_catalog.get(
+            style['name'], style.get('ground_allowed')
+        )
+        if style_obj is None:
+            key = (style['name'], style.get('ground_allowed'))
+            if key not in missing:
+                missing[key] = get_or_create_fighting_style(style)
+            style_obj = missing[key]
+        styles.append(style_obj)
+
+    return styles
+
+
+def get_or_create_fighting_styles(fighting_styles):
+    """Return fighting styles matching the data, creating missing ones."""
+    if not fighting_styles:
+        return []
+
+    return list(dict.fromkeys(resolve_fighting_styles(fighting_styles)))
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Field returning the URLs of the processed image variants.
+
+    URLs are relative to the site so that the representation does not
+    depend on the request.
+    """
+
+    def to_representation(self, value):
+        return {
+            variant: default_storage.url(name)
+            for variant, name in value.items()
+        }
 
 
 class FightingStylesSerializer(serializers.ModelSerializer):
@@ -35,28 +129,22 @@ class CatSerializer(serializers.ModelSerializer):
     def _get_or_create_abilities(self, abilities, cat):
         """Handle getting or creating abilities."""
         auth_user = self.context['request'].user
-        for ability in abilities:
-            ability_obj, created = Ability.objects.get_or_create(
-                user=auth_user,
-                **ability
-            )
-            cat.abilities.add(ability_obj)
+        cat.abilities.add(*get_or_create_abilities(auth_user, abilities))
 
     def _get_or_create_fighting_styles(self, fighting_styles, cat):
         """Handle getting or creating fighting styles."""
-        for style in fighting_styles:
-            style_obj, created = FightingStyles.objects.get_or_create(
-                **style
-            )
-            cat.fighting_styles.add(style_obj)
+        cat.fighting_styles.add(
+            *get_or_create_fighting_styles(fighting_styles)
+        )
 
     def create(self, validated_data):
         """Create and return a cat object."""
         abilities = validated_data.pop('abilities', [])
         fighting_styles = validated_data.pop('fighting_styles', [])
-        cat = Cat.objects.create(**validated_data)
-        self._get_or_create_abilities(abilities, cat)
-        self._get_or_create_fighting_styles(fighting_styles, cat)
+        with transaction.atomic():
+            cat = Cat.objects.create(**validated_data)
+            self._get_or_create_abilities(abilities, cat)
+            self._get_or_create_fighting_styles(fighting_styles, cat)
 
         return cat
 
@@ -64,32 +152,245 @@ class CatSerializer(serializers.ModelSerializer):
         """Update and return a cat object."""
         abilities = validated_data.pop('abilities', None)
         fighting_styles = validated_data.pop('fighting_styles', None)
-        if abilities is not None:
-            instance.abilities.clear()
-            self._get_or_create_abilities(abilities, instance)
+        auth_user = self.context['request'].user
+        with transaction.atomic():
+            if abilities is not None:
+                instance.abilities.set(
+                    get_or_create_abilities(auth_user, abilities)
+                )
+
+            if fighting_styles is not None:
+                instance.fighting_styles.set(
+                    get_or_create_fighting_styles(fighting_styles)
+                )
 
-        if fighting_styles is not None:
-            instance.fighting_styles.clear()
-            self._get_or_create_fighting_styles(fighting_styles, instance)
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
 
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
+            instance.save()
 
-        instance.save()
         return instance
 
 
 class CatDetailSerializer(CatSerializer):
     """Serializer for cat detail."""
+    image_variants = ImageVariantsField()
 
     class Meta(CatSerializer.Meta):
-        fields = CatSerializer.Meta.fields + ['description', 'weight', 'color']
+        fields = CatSerializer.Meta.fields + [
+            'description',
+            'weight',
+            'color',
+            'image_status',
+            'image_variants',
+        ]
+        read_only_fields = CatSerializer.Meta.read_only_fields + [
+            'image_status',
+        ]
+
+class CatCreateSerializer(CatDetailSerializer):
+    """Serializer for cats created in batches, with a required weight."""
+
+    class Meta(CatDetailSerializer.Meta):
+        extra_kwargs = {'weight': {'required': True}}
+
 
 class CatImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading images to cats."""
 
     class Meta:
         model = Cat
-        fields = ['id', 'image']
-        read_only_fields = ['id']
+        fields = ['id', 'image', 'image_status']
+        read_only_fields = ['id', 'image_status']
         extra_kwargs = {'image': {'required': True}}
+
+
+def _comma_separated_ids(value):
+    """Return the IDs of a comma separated list."""
+    try:
+        return list(dict.fromkeys(
+            int(str_id) for str_id in value.split(',')
+        ))
+    except ValueError:
+        raise serializers.ValidationError(
+            'Must be a comma separated list of IDs.'
+        )
+
+
+class FightSimulationSerializer(serializers.Serializer):
+    """Serializer for the query of a fight simulation."""
+    opponents = serializers.CharField()
+    bouts = serializers.IntegerField(
+        min_value=1, max_value=100000, default=10000
+    )
+    seed = serializers.IntegerField(min_value=0, required=False)
+
+    def validate_opponents(self, value):
+        """Return the opponent IDs of a comma separated list."""
+        ids = _comma_separated_ids(value)
+        if len(ids) > 100:
+            raise serializers.ValidationError('At most 100 opponents.')
+
+        return ids
+
+
+class FightOddsSerializer(serializers.Serializer):
+    """Serializer for the simulated odds against an opponent."""
+    opponent = serializers.IntegerField()
+    win = serializers.FloatField()
+    loss = serializers.FloatField()
+    draw = serializers.FloatField()
+
+
+class FightSimulationResultSerializer(serializers.Serializer):
+    """Serializer for the result of a fight simulation."""
+    cat = serializers.IntegerField()
+    bouts = serializers.IntegerField()
+    results = FightOddsSerializer(many=True)
+
+
+class TournamentSerializer(serializers.ModelSerializer):
+    """Serializer for tournaments."""
+
+    class Meta:
+        model = Tournament
+        fields = [
+            'id', 'name', 'format', 'seed', 'bouts', 'rounds', 'winner',
+            'created_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+
+class TournamentEntrySerializer(serializers.ModelSerializer):
+    """Serializer for the standing of a cat in a tournament."""
+
+    class Meta:
+        model = TournamentEntry
+        fields = ['cat', 'seed', 'rank', 'points', 'wins', 'losses', 'draws']
+        read_only_fields = fields
+
+
+class TournamentDetailSerializer(TournamentSerializer):
+    """Serializer for tournament detail with the standings."""
+    standings = TournamentEntrySerializer(
+        source='entries', many=True, read_only=True
+    )
+
+    class Meta(TournamentSerializer.Meta):
+        fields = TournamentSerializer.Meta.fields + ['standings']
+        read_only_fields = fields
+
+
+class TournamentMatchSerializer(serializers.ModelSerializer):
+    """Serializer for tournament matches, bout counts are of cat."""
+
+    class Meta:
+        model = TournamentMatch
+        fields = ['id', 'round', 'cat', 'opponent', 'wins', 'losses', 'draws']
+        read_only_fields = fields
+
+
+class LeaderboardQuerySerializer(serializers.Serializer):
+    """Serializer for the query of a leaderboard."""
+    cat = serializers.IntegerField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+    around = serializers.IntegerField(min_value=0, max_value=100, default=5)
+
+
+class LeaderboardEntrySerializer(serializers.Serializer):
+    """Serializer for a ranked cat rating."""
+    rank = serializers.IntegerField()
+    cat = serializers.IntegerField(source='cat_id')
+    rating = serializers.FloatField()
+    matches = serializers.IntegerField()
+
+
+class CatSearchSerializer(serializers.Serializer):
+    """Serializer for the query of a cat search."""
+    q = serializers.CharField(required=False, max_length=200)
+    weight_min = serializers.FloatField(min_value=0, required=False)
+    weight_max = serializers.FloatField(min_value=0, required=False)
+    color = serializers.CharField(required=False)
+    dangerous = serializers.BooleanField(required=False, allow_null=True)
+    abilities = serializers.CharField(required=False)
+    fighting_styles = serializers.CharField(required=False)
+    match = serializers.ChoiceField(MATCH_MODES, default=MATCH_ANY)
+
+    def validate_color(self, value):
+        """Return the colors of a comma separated list."""
+        return list(dict.fromkeys(
+            color.strip() for color in value.split(',') if color.strip()
+        ))
+
+    def validate_abilities(self, value):
+        return _comma_separated_ids(value)
+
+    def validate_fighting_styles(self, value):
+        return _comma_separated_ids(value)
+
+    def validate(self, attrs):
+        """Check the weight range is not empty."""
+        if attrs.get('weight_max', float('inf')) < attrs.get(
+            'weight_min', 0
+        ):
+            raise serializers.ValidationError(
+                {'weight_max': ['Must not be less than weight_min.']}
+            )
+
+        return attrs
+
+
+class FacetValueSerializer(serializers.Serializer):
+    """Serializer for the count of cats with a facet value."""
+    value = serializers.JSONField()
+    count = serializers.IntegerField()
+
+
+class WeightClassFacetSerializer(FacetValueSerializer):
+    """Serializer for the count of cats in a weight class."""
+    value = serializers.IntegerField()
+    min = serializers.FloatField(allow_null=True)
+    max = serializers.FloatField(allow_null=True)
+
+
+class CatFacetsSerializer(serializers.Serializer):
+    """Serializer for the facet counts of a cat search."""
+    weight_class = WeightClassFacetSerializer(many=True)
+    color = FacetValueSerializer(many=True)
+    dangerous = FacetValueSerializer(many=True)
+    abilities = FacetValueSerializer(many=True)
+    fighting_styles = FacetValueSerializer(many=True)
+
+
+class CatSearchResultSerializer(serializers.Serializer):
+    """Serializer for a page of a cat search."""
+    next = serializers.URLField(allow_null=True)
+    previous = serializers.URLField(allow_null=True)
+    results = CatSerializer(many=True)
+    facets = CatFacetsSerializer()
+
+
+class MatchTicketSerializer(serializers.ModelSerializer):
+    """Serializer for matchmaking tickets."""
+
+    class Meta:
+        model = MatchTicket
+        fields = [
+            'id', 'cat', 'opponent', 'status', 'rating', 'weight_class',
+            'created_at', 'matched_at',
+        ]
+        read_only_fields = [
+            'id', 'opponent', 'status', 'rating', 'weight_class',
+            'created_at', 'matched_at',
+        ]
+
+    def validate_cat(self, cat):
+        """Check the cat is one of the user's and not queued yet."""
+        if cat.user_id != self.context['request'].user.id:
+            raise serializers.ValidationError('Cat not found.')
+        if MatchTicket.objects.filter(
+            cat=cat, status=MatchTicket.WAITING
+        ).exists():
+            raise serializers.ValidationError('Cat is already queued.')
+
+        return cat
@@ -0,0 +1,346 @@
+"""
+Signal handlers for cat APIs.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from core.models import (
+    Ability,
+    Cat,
+    CatFacet,
+    CatRating,
+    FightingStyles,
+    ImageBlob,
+    RatingBucket,
+    ResourceVersion,
+)
+from cat.catalog import fighting_styles_catalog
+from cat.documents import (
+    cat_documents,
+    document_workers,
+    refresh_stale_documents,
+)
+from cat.search import trait_keys
+
+
+@receiver(post_save, sender=FightingStyles)
+@receiver(post_delete, sender=FightingStyles)
+def invalidate_fighting_styles_catalog(sender, **kwargs):
+    """Drop the cached fighting styles catalog."""
+    fighting_styles_catalog.invalidate()
+
+
+def _stored_files(cat):
+    """Return the names of the files referenced by a cat."""
+    names = set(cat.image_variants.values())
+    if cat.image:
+        names.add(cat.image.name)
+
+    return names
+
+
+@receiver(post_init, sender=Cat)
+def remember_stored_files(sender, instance, **kwargs):
+    """Keep the files referenced by a loaded cat to diff them on save."""
+    if not {'image', 'image_variants'} & instance.get_deferred_fields():
+        instance._stored_files = _stored_files(instance)
+
+
+@receiver(post_save, sender=Cat)
+def count_stored_files(sender, instance, created, **kwargs):
+    """Update the references of the files added or removed on save."""
+    previous = set() if created else getattr(instance, '_stored_files', None)
+    if previous is None:
+        return
+
+    current = _stored_files(instance)
+    ImageBlob.objects.retain(current - previous)
+    ImageBlob.objects.release(previous - current, instance.image.storage)
+    instance._stored_files = current
+
+
+@receiver(post_delete, sender=Cat)
+def release_stored_files(sender, instance, **kwargs):
+    """Release the files referenced by a deleted cat."""
+    ImageBlob.objects.release(
+        getattr(instance, '_stored_files', _stored_files(instance)),
+        instance.image.storage,
+    )
+
+
+def _shift_style_counts(deltas):
+    """Add cat count deltas of styles, versioning which are assigned."""
+    if FightingStyles.objects.shift_cat_counts(deltas):
+        ResourceVersion.objects.bump(
+            ResourceVersion.ASSIGNED_FIGHTING_STYLES
+        )
+
+
+@receiver(pre_delete, sender=Cat)
+def remember_fighting_styles(sender, instance, **kwargs):
+    """Keep the styles of a deleted cat, its links go with it."""
+    instance._style_ids = list(
+        instance.fighting_styles.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Cat)
+def count_deleted_cat_styles(sender, instance, **kwargs):
+    """Remove a deleted cat from the counts of its styles."""
+    _shift_style_counts({
+        pk: -1 for pk in getattr(instance, '_style_ids', [])
+    })
+
+
+@receiver(post_delete, sender=CatRating)
+def uncount_deleted_rating(sender, instance, **kwargs):
+    """Remove a deleted rating from the leaderboard buckets."""
+    RatingBucket.objects.shift({
+        (instance.user_id, CatRating.bucket(instance.rating)): -1,
+    })
+
+
+def _shift_facets(keys, sign=1):
+    """Count (user_id, facet, value) keys of cats in or out."""
+    CatFacet.objects.shift({
+        key: sign * count for key, count in Counter(keys).items()
+    })
+
+
+@receiver(post_init, sender=Cat)
+def remember_facet_traits(sender, instance, **kwargs):
+    """Keep the facet values of a loaded cat to diff them on save."""
+    if not {'weight', 'color', 'dangerous'} & instance.get_deferred_fields():
+        instance._facet_traits = trait_keys(instance)
+
+
+@receiver(post_save, sender=Cat)
+def count_facet_traits(sender, instance, created, **kwargs):
+    """Move a saved cat to the facet values of its fields."""
+    previous = [] if created else getattr(instance, '_facet_traits', None)
+    if previous is None:
+        return
+
+    current = trait_keys(instance)
+    deltas = Counter(current)
+    deltas.subtract(previous)
+    CatFacet.objects.shift({
+        (instance.user_id, *key): delta for key, delta in deltas.items()
+    })
+    instance._facet_traits = current
+
+
+@receiver(pre_delete, sender=Cat)
+def remember_abilities(sender, instance, **kwargs):
+    """Keep the abilities of a deleted cat, its links go with it."""
+    instance._ability_ids = list(
+        instance.abilities.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Cat)
+def uncount_deleted_cat_facets(sender, instance, **kwargs):
+    """Remove a deleted cat from the counts of its facet values."""
+    keys = [
+        *getattr(instance, '_facet_traits', []),
+        *(('abilities', str(pk)) for pk in instance._ability_ids),
+        *(('fighting_styles', str(pk)) for pk in instance._style_ids),
+    ]
+    _shift_facets([(instance.user_id, *key) for key in keys], -1)
+
+
+def _links(sender, field, instance, reverse, pk_set=None):
+    """Return the (user_id, related_id) links of an m2m change."""
+    if reverse:
+        links = sender.objects.filter(**{field: instance.pk})
+        if pk_set is not None:
+            links = links.filter(cat_id__in=pk_set)
+    else:
+        links = sender.objects.filter(cat_id=instance.pk)
+        if pk_set is not None:
+            links = links.filter(**{f'{field}__in': pk_set})
+
+    return list(links.values_list('cat__user_id', field))
+
+
+@receiver(m2m_changed, sender=Cat.abilities.through)
+@receiver(m2m_changed, sender=Cat.fighting_styles.through)
+def count_linked_facets(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    """Count the cats gaining or losing abilities and fighting styles.
+
+    The links are read before they are removed, as the removed ids may
+    not all have been linked.
+    """
+    if sender is Cat.abilities.through:
+        facet, field = 'abilities', 'ability_id'
+    else:
+        facet, field = 'fighting_styles', 'fightingstyles_id'
+    unlinked = f'_unlinked_{facet}'
+
+    if action in ('pre_remove', 'pre_clear'):
+        setattr(instance, unlinked, _links(
+            sender, field, instance, reverse, pk_set
+        ))
+        return
+    if action == 'post_add':
+        links, sign = _links(sender, field, instance, reverse, pk_set), 1
+    elif action in ('post_remove', 'post_clear'):
+        links, sign = getattr(instance, unlinked, []), -1
+    else:
+        return
+
+    _shift_facets(
+        [(user_id, facet, str(pk)) for user_id, pk in links], sign
+    )
+    if facet == 'fighting_styles':
+        _shift_style_counts({
+            pk: sign * count
+            for pk, count in Counter(pk for _, pk in links).items()
+        })
+
+
+@receiver(post_delete, sender=Ability)
+@receiver(post_delete, sender=FightingStyles)
+def drop_deleted_facet_values(sender, instance, **kwargs):
+    """Drop the counts of a deleted ability or fighting style."""
+    if sender is Ability:
+        values = CatFacet.objects.filter(
+            user_id=instance.user_id, facet='abilities'
+        )
+    else:
+        values = CatFacet.objects.filter(facet='fighting_styles')
+    values.filter(value=str(instance.pk)).delete()
+
+
+# Documents are refreshed before the versions are bumped, so that a
+# reader seeing a new version also sees the new documents.
+@receiver(post_save, sender=Cat)
+def refresh_cat_document(sender, instance, update_fields=None, **kwargs):
+    """Rebuild the document of a saved cat."""
+    if update_fields is not None and set(update_fields) <= {'document'}:
+        return
+
+    cat_documents.mark([instance.pk])
+
+
+@receiver(m2m_changed, sender=Cat.abilities.through)
+@receiver(m2m_changed, sender=Cat.fighting_styles.through)
+def refresh_linked_documents(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    """Rebuild the documents of cats gaining or losing relations."""
+    if action == 'pre_clear' and reverse:
+        instance._cleared_cat_ids = set(
+            instance.cat_set.values_list('pk', flat=True)
+        )
+    if not action.startswith('post_'):
+        return
+
+    if not reverse:
+        cat_ids = [instance.pk]
+    elif action == 'post_clear':
+        cat_ids = getattr(instance, '_cleared_cat_ids', set())
+    else:
+        cat_ids = pk_set
+    cat_documents.mark(cat_ids)
+
+
+def _refresh_documents_later(cat_ids):
+    """Rebuild documents in the background once the write commits.
+
+    A relation may be shown by every cat, so its request does not wait
+    for their documents.
+    """
+    transaction.on_commit(
+        lambda: document_workers.submit(refresh_stale_documents, cat_ids)
+    )
+
+
+@receiver(post_save, sender=Ability)
+@receiver(post_save, sender=FightingStyles)
+def refresh_related_documents(sender, instance, created, **kwargs):
+    """Rebuild the documents of the cats showing a changed relation."""
+    if not created:
+        # Evaluated by the worker, with the links committed then.
+        _refresh_documents_later(instance.cat_set.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Ability)
+@receiver(pre_delete, sender=FightingStyles)
+def remember_related_cats(sender, instance, **kwargs):
+    """Keep the cats of a deleted relation, their links go with it."""
+    instance._related_cat_ids = list(
+        instance.cat_set.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Ability)
+@receiver(post_delete, sender=FightingStyles)
+def refresh_unlinked_documents(sender, instance, **kwargs):
+    """Rebuild the documents of the cats of a deleted relation."""
+    _refresh_documents_later(getattr(instance, '_related_cat_ids', []))
+
+
+@receiver(post_save, sender=Cat)
+@receiver(post_save, sender=Ability)
+def bump_user_version(sender, instance, **kwargs):
+    """Invalidate the cached copies of the user cats and abilities."""
+    ResourceVersion.objects.bump(ResourceVersion.user_scope(instance.user_id))
+
+
+@receiver(post_delete, sender=Cat)
+@receiver(post_delete, sender=Ability)
+def bump_versions_on_delete(sender, instance, **kwargs):
+    """Invalidate the copies listing the deleted row or its links."""
+    ResourceVersion.objects.bump(ResourceVersion.user_scope(instance.user_id))
+
+
+@receiver(post_save, sender=FightingStyles)
+@receiver(post_delete, sender=FightingStyles)
+def bump_fighting_styles_version(sender, **kwargs):
+    """Invalidate the cached copies showing fighting styles.
+
+    The copies of the cats showing the style are invalidated once their
+    documents are rebuilt, see refresh_stale_documents.
+    """
+    ResourceVersion.objects.bump(ResourceVersion.FIGHTING_STYLES)
+
+
+@receiver(m2m_changed, sender=Cat.abilities.through)
+def bump_version_on_abilities_change(sender, instance, action, **kwargs):
+    """Invalidate the copies of a user when cats and abilities link."""
+    if action.startswith('post_'):
+        ResourceVersion.objects.bump(
+            ResourceVersion.user_scope(instance.user_id)
+        )
+
+
+@receiver(m2m_changed, sender=Cat.fighting_styles.through)
+def bump_version_on_fighting_styles_change(sender, instance, action,
+                                           reverse, pk_set, **kwargs):
+    """Invalidate the copies of the users whose cats changed styles."""
+    if action == 'pre_clear' and reverse:
+        instance._cleared_user_ids = set(
+            instance.cat_set.values_list('user_id', flat=True)
+        )
+    if not action.startswith('post_'):
+        return
+
+    if not reverse:
+        user_ids = {instance.user_id}
+    elif action == 'post_clear':
+        user_ids = getattr(instance, '_cleared_user_ids', set())
+    else:
+        user_ids = set(Cat.objects.filter(
+            pk__in=pk_set
+        ).values_list('user_id', flat=True))
+    ResourceVersion.objects.bump(*map(ResourceVersion.user_scope, user_ids))
@@ -56,7 +56,7 @@ class PrivateAbilitiesApiTests(TestCase):
         abilities = Ability.objects.all().order_by('-name')
         serializer = AbilitySerializer(abilities, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_abilities_limited_to_user(self):
         """Test list of abilities is limited to authenticated user."""
@@ -66,9 +66,9 @@ class PrivateAbilitiesApiTests(TestCase):
 
         res = self.client.get(ABILITIES_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ability.name)
-        self.assertEqual(res.data[0]['id'], ability.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ability.name)
+        self.assertEqual(res.data['results'][0]['id'], ability.id)
 
     def test_update_ability(self):
         """Test updating a ability."""
@@ -109,8 +109,8 @@ class PrivateAbilitiesApiTests(TestCase):
 
         s1 = AbilitySerializer(a1)
         s2 = AbilitySerializer(a2)
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertNotIn(s2.data, res.data['results'])
 
     def test_filtered_abilities_unique(self):
         """Test filtered abilities return a unique list."""
@@ -137,4 +137,24 @@ class PrivateAbilitiesApiTests(TestCase):
 
         res = self.client.get(ABILITIES_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
\ No newline at end of file
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_paging_same_names(self):
+        """Test abilities of the same name are paged once each."""
+        abilities = [
+            Ability.objects.create(user=self.user, name=name)
+            for name in ['Bite', 'Bite', 'Claw', 'Bite']
+        ]
+
+        ids = []
+        res = self.client.get(ABILITIES_URL, {'page_size': 1})
+        while True:
+            ids.extend(row['id'] for row in res.data['results'])
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(ids, [
+            abilities[2].id, abilities[3].id, abilities[1].id,
+            abilities[0].id,
+        ])
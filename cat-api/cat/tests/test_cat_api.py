@@ -1,15 +1,25 @@
 """
 Tests for cat API.
 """
+import csv
+import gzip
+import io
+import json
 import tempfile
 import os
+from datetime import timedelta
+from unittest import mock
 
 from PIL import Image
 
 from django.forms.models import model_to_dict
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -18,6 +28,7 @@ from core.models import (
     Cat,
     Ability,
     FightingStyles,
+    ResourceVersion,
 )
 
 from cat.serializers import (
@@ -34,6 +45,11 @@ def detail_url(cat_id):
     """Create and return a cat detail url."""
     return reverse('cat:cat-detail', args=[cat_id])
 
+
+BULK_URL = reverse('cat:cat-bulk')
+EXPORT_URL = reverse('cat:cat-export')
+
+
 def image_upload_url(cat_id):
     """Create and return an image upload url."""
     return reverse('cat:cat-upload-image', args=[cat_id])
@@ -87,7 +103,7 @@ class PrivateCatApiTests(TestCase):
         cats = Cat.objects.all().order_by('-id')
         serializer = CatSerializer(cats, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_cat_list_limted_to_user(self):
         """Test list of cats is limited to authentication user."""
@@ -100,7 +116,7 @@ class PrivateCatApiTests(TestCase):
         cats = Cat.objects.filter(user=self.user)
         serializer = CatSerializer(cats, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_get_cat_detail(self):
         """Test get cat detail."""
@@ -298,6 +314,47 @@ class PrivateCatApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(cat.abilities.count(), 0)
 
+    def test_create_cat_abilities_in_bulk(self):
+        """Test nested abilities cost the same queries whatever the count."""
+        Ability.objects.create(user=self.user, name='Ability 0')
+        counts = []
+        for size in [2, 20]:
+            data = {
+                'name': 'Bulk Cat',
+                'weight': 5,
+                'abilities': [{'name': f'Ability {i}'} for i in range(size)],
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(CAT_URL, data, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            cat = Cat.objects.get(id=res.data['id'])
+            self.assertEqual(cat.abilities.count(), size)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(
+            Ability.objects.filter(user=self.user).count(), 20
+        )
+
+    def test_update_abilities_keeps_unchanged_links(self):
+        """Test updating abilities only changes the differing links."""
+        a1 = Ability.objects.create(user=self.user, name='Fire Punch')
+        a2 = Ability.objects.create(user=self.user, name='Ice Shield')
+        cat = create_cat(user=self.user)
+        cat.abilities.add(a1, a2)
+        link = Cat.abilities.through.objects.get(cat=cat, ability=a1)
+
+        data = {'abilities': [{'name': 'Fire Punch'}, {'name': 'Earthquake'}]}
+        res = self.client.patch(detail_url(cat.id), data, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(
+            Cat.abilities.through.objects.filter(id=link.id).exists()
+        )
+        names = set(cat.abilities.values_list('name', flat=True))
+        self.assertEqual(names, {'Fire Punch', 'Earthquake'})
+
     def test_create_cat_with_new_fighting_style(self):
         """Test creating a cat with new fighting style."""
         data = {
@@ -398,9 +455,45 @@ class PrivateCatApiTests(TestCase):
         s1 = CatSerializer(c1)
         s2 = CatSerializer(c2)
         s3 = CatSerializer(c3)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
+
+    def test_filter_by_abilities_unique(self):
+        """Test a cat matching several abilities is listed once."""
+        cat = create_cat(user=self.user)
+        a1 = Ability.objects.create(user=self.user, name='Fireball')
+        a2 = Ability.objects.create(user=self.user, name='Hypnosis')
+        cat.abilities.add(a1, a2)
+
+        params = {'abilities': f'{a1.id},{a2.id}'}
+        res = self.client.get(CAT_URL, params)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_filter_by_all_abilities(self):
+        """Test filtering cats having every listed ability."""
+        a1 = Ability.objects.create(user=self.user, name='Fireball')
+        a2 = Ability.objects.create(user=self.user, name='Hypnosis')
+        c1 = create_cat(user=self.user, name='Big Brown')
+        c1.abilities.add(a1, a2)
+        c2 = create_cat(user=self.user, name='Slim Shady')
+        c2.abilities.add(a1)
+
+        params = {'abilities': f'{a1.id},{a2.id}', 'match': 'all'}
+        res = self.client.get(CAT_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # The abilities of c1 are listed in no set order.
+        ids = [cat['id'] for cat in res.data['results']]
+        self.assertIn(c1.id, ids)
+        self.assertNotIn(c2.id, ids)
+
+    def test_filter_invalid_match_mode(self):
+        """Test an unknown match mode returns a bad request."""
+        res = self.client.get(CAT_URL, {'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
     def filter_by_fighting_styles(self):
         """Test filtering cats by fighting styles"""
@@ -418,10 +511,578 @@ class PrivateCatApiTests(TestCase):
         s1 = CatSerializer(c1)
         s2 = CatSerializer(c2)
         s3 = CatSerializer(c3)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
+
+class CatPaginationTests(TestCase):
+    """Test cursor pagination of the cat list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+
+    def _collect_ids(self, params):
+        """Follow next links and return the ids of all listed cats."""
+        ids = []
+        res = self.client.get(CAT_URL, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(cat['id'] for cat in res.data['results'])
+            if not res.data['next']:
+                return ids
+            res = self.client.get(res.data['next'])
+
+    def test_cats_paginated_by_cursor(self):
+        """Test walking every page returns all cats newest first."""
+        cats = [create_cat(user=self.user) for _ in range(5)]
+
+        ids = self._collect_ids({'page_size': 2})
+
+        self.assertEqual(ids, sorted([cat.id for cat in cats], reverse=True))
+
+    def test_cursor_keeps_filters(self):
+        """Test next links keep the abilities filter."""
+        ability = Ability.objects.create(user=self.user, name='Fireball')
+        matching = []
+        for _ in range(3):
+            cat = create_cat(user=self.user)
+            cat.abilities.add(ability)
+            matching.append(cat.id)
+            create_cat(user=self.user)
+
+        ids = self._collect_ids({'page_size': 1, 'abilities': ability.id})
+
+        self.assertEqual(ids, sorted(matching, reverse=True))
+
+
+class CatBulkApiTests(TestCase):
+    """Test the bulk cat API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_cats(self):
+        """Test creating several cats with nested relations."""
+        existing = Ability.objects.create(user=self.user, name='Fireball')
+        payload = [
+            {
+                'name': f'Cat {i}',
+                'weight': 4 + i,
+                'abilities': [{'name': 'Fireball'}, {'name': f'Trick {i}'}],
+                'fighting_styles': [{'name': 'BX', 'ground_allowed': False}],
+            }
+            for i in range(3)
+        ]
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['errors'], [])
+        self.assertEqual(len(res.data['results']), 3)
+        cats = Cat.objects.filter(user=self.user)
+        self.assertEqual(cats.count(), 3)
+        self.assertEqual(FightingStyles.objects.count(), 1)
+        for cat in cats:
+            self.assertIn(existing, cat.abilities.all())
+            self.assertEqual(cat.abilities.count(), 2)
+            self.assertEqual(cat.fighting_styles.count(), 1)
+
+    def test_bulk_create_reports_item_errors(self):
+        """Test invalid items are reported without aborting the batch."""
+        payload = [
+            {'name': 'Good Cat', 'weight': 4},
+            {'name': 'Bad Cat', 'weight': 'heavy'},
+        ]
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['results'][0]['index'], 0)
+        self.assertEqual(res.data['errors'][0]['index'], 1)
+        self.assertIn('weight', res.data['errors'][0]['errors'])
+        self.assertTrue(Cat.objects.filter(name='Good Cat').exists())
+        self.assertFalse(Cat.objects.filter(name='Bad Cat').exists())
+
+    def test_bulk_create_requires_weight(self):
+        """Test items without the stored weight are item errors."""
+        payload = [{'name': 'Light Cat'}, {'name': 'Cat', 'weight': 4}]
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['errors'][0]['index'], 0)
+        self.assertIn('weight', res.data['errors'][0]['errors'])
+        self.assertEqual(Cat.objects.get().name, 'Cat')
+
+    def test_bulk_create_requires_list(self):
+        """Test a payload which is not a list is rejected."""
+        res = self.client.post(BULK_URL, {'name': 'Cat'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update_cats(self):
+        """Test partially updating several cats."""
+        ability = Ability.objects.create(user=self.user, name='Fireball')
+        c1 = create_cat(user=self.user, weight=3)
+        c1.abilities.add(ability)
+        c2 = create_cat(user=self.user, weight=3)
+        other_cat = create_cat(
+            user=create_user(email='other@example.com', password='pass123')
+        )
+        payload = [
+            {'id': c1.id, 'weight': 8, 'abilities': [{'name': 'Hypnosis'}]},
+            {'id': c2.id, 'name': 'Renamed'},
+            {'id': other_cat.id, 'name': 'Stolen'},
+        ]
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertEqual(res.data['errors'][0]['index'], 2)
+        c1.refresh_from_db()
+        c2.refresh_from_db()
+        other_cat.refresh_from_db()
+        self.assertEqual(c1.weight, 8)
+        self.assertEqual(
+            list(c1.abilities.values_list('name', flat=True)), ['Hypnosis']
+        )
+        self.assertEqual(c2.name, 'Renamed')
+        self.assertNotEqual(other_cat.name, 'Stolen')
+
+    def test_bulk_update_rejects_duplicate_ids(self):
+        """Test a cat listed twice is only updated by its first item."""
+        cat = create_cat(user=self.user)
+        payload = [
+            {'id': cat.id, 'name': 'First'},
+            {'id': cat.id, 'name': 'Second'},
+        ]
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [{'index': 0, 'id': cat.id}])
+        self.assertEqual(res.data['errors'][0]['index'], 1)
+        self.assertIn('id', res.data['errors'][0]['errors'])
+        cat.refresh_from_db()
+        self.assertEqual(cat.name, 'First')
+
+
+class CatExportApiTests(TestCase):
+    """Test the cat export API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+        self.cat = create_cat(user=self.user, name='Exported')
+        self.cat.abilities.add(
+            Ability.objects.create(user=self.user, name='Fireball'),
+            Ability.objects.create(user=self.user, name='Hypnosis'),
+        )
+        self.cat.fighting_styles.add(
+            FightingStyles.objects.create(name='BX', ground_allowed=False)
+        )
+        create_cat(
+            user=create_user(email='other@example.com', password='pass123')
+        )
+
+    def test_export_ndjson(self):
+        """Test exporting cats as NDJSON."""
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertTrue(res['Content-Type'].startswith('application/x-ndjson'))
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual(row['id'], self.cat.id)
+        self.assertEqual(row['name'], 'Exported')
+        self.assertEqual(
+            sorted(ability['name'] for ability in row['abilities']),
+            ['Fireball', 'Hypnosis'],
+        )
+        self.assertEqual(row['fighting_styles'][0]['name'], 'BX')
+
+    def test_export_csv(self):
+        """Test exporting cats as CSV."""
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/csv'))
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['name'], 'Exported')
+        self.assertEqual(
+            sorted(rows[0]['abilities'].split('|')), ['Fireball', 'Hypnosis']
+        )
+        self.assertEqual(rows[0]['fighting_styles'], 'BX')
+
+    def test_export_gzip(self):
+        """Test exports are streamed gzip compressed when accepted."""
+        res = self.client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        content = gzip.decompress(b''.join(res.streaming_content))
+        self.assertEqual(json.loads(content)['id'], self.cat.id)
+
+
+class CatQueryBudgetTests(TestCase):
+    """Test the number of queries run by the cat API actions."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+
+    def _create_cats(self, count):
+        """Create cats with abilities and fighting styles."""
+        style = FightingStyles.objects.create(name='BX', ground_allowed=False)
+        cats = []
+        for i in range(count):
+            cat = create_cat(user=self.user, name=f'Cat {i}')
+            cat.abilities.add(
+                Ability.objects.create(user=self.user, name=f'Ability {i}')
+            )
+            cat.fighting_styles.add(style)
+            cats.append(cat)
+
+        return cats
+
+    def test_list_query_budget(self):
+        """Test listing cats runs a fixed number of queries."""
+        for count in [1, 10]:
+            self._create_cats(count)
+            # The version stamp lookup and the page of documents.
+            with self.assertNumQueries(2):
+                res = self.client.get(CAT_URL)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_retrieve_query_budget(self):
+        """Test retrieving a cat runs a fixed number of queries."""
+        cat = self._create_cats(1)[0]
+
+        # The version stamp lookup and the document.
+        with self.assertNumQueries(2):
+            res = self.client.get(detail_url(cat.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_partial_update_query_budget(self):
+        """Test updating a cat runs a fixed number of queries."""
+        cat = self._create_cats(1)[0]
+
+        # Including the savepoint pairs of the view and serializer
+        # transactions, the version bump, the document rebuild and the
+        # move of the cat to its new weight class facet.
+        with self.assertNumQueries(16):
+            res = self.client.patch(detail_url(cat.id), {'weight': 9})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class CatConditionalGetTests(TestCase):
+    """Test conditional requests of the cat API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+        self.cat = create_cat(user=self.user)
+
+    def test_list_not_modified(self):
+        """Test a current ETag answers 304 with one query."""
+        res = self.client.get(CAT_URL)
+        etag = res['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(CAT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['ETag'], etag)
+
+    def test_retrieve_if_modified_since(self):
+        """Test If-Modified-Since answers 304 until the cat changes."""
+        versions = ResourceVersion.objects.filter(
+            scope=ResourceVersion.user_scope(self.user.id)
+        )
+        modified = timezone.now().replace(microsecond=0)
+        versions.update(updated_at=modified)
+        res = self.client.get(detail_url(self.cat.id))
+        last_modified = res['Last-Modified']
+
+        res = self.client.get(
+            detail_url(self.cat.id), HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        versions.update(updated_at=modified + timedelta(milliseconds=500))
+        res = self.client.get(
+            detail_url(self.cat.id), HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(CAT_DOCUMENT_WORKERS=0)
+    def test_write_changes_etag(self):
+        """Test every kind of write gives the list a new ETag."""
+        ability = Ability.objects.create(user=self.user, name='Bite')
+        style = FightingStyles.objects.create(name='BX', ground_allowed=False)
+        writes = [
+            lambda: self.client.patch(detail_url(self.cat.id), {'weight': 9}),
+            lambda: self.cat.abilities.add(ability),
+            lambda: ability.cat_set.clear(),
+            lambda: style.cat_set.add(self.cat),
+            lambda: FightingStyles.objects.filter(pk=style.pk).first().save(),
+            lambda: self.client.post(
+                BULK_URL,
+                [{'name': 'Bulk', 'weight': 4, 'color': 'Red'}],
+                format='json',
+            ),
+            lambda: self.client.patch(
+                BULK_URL, [{'id': self.cat.id, 'weight': 3}], format='json'
+            ),
+        ]
+        for write in writes:
+            etag = self.client.get(CAT_URL)['ETag']
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+            res = self.client.get(CAT_URL, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_etag_per_user(self):
+        """Test the ETag of another user does not match."""
+        etag = self.client.get(CAT_URL)['ETag']
+        other = create_user(email='other@example.com', password='pass123')
+        self.client.force_authenticate(other)
+
+        res = self.client.get(CAT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_bulk_update_touches_updated_at(self):
+        """Test bulk updates set the modification time of cats."""
+        updated_at = self.cat.updated_at
+
+        self.client.patch(
+            BULK_URL, [{'id': self.cat.id, 'weight': 3}], format='json'
+        )
+
+        self.cat.refresh_from_db()
+        self.assertGreater(self.cat.updated_at, updated_at)
+
+
+class CatResponseCacheTests(TestCase):
+    """Test caching of cat API responses."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+        self.cat = create_cat(user=self.user)
+        self.ability = Ability.objects.create(user=self.user, name='Bite')
+        self.cat.abilities.add(self.ability)
+
+    def test_repeated_list_cached(self):
+        """Test an identical list only looks up the version stamp."""
+        res1 = self.client.get(CAT_URL)
+
+        with self.assertNumQueries(1):
+            res2 = self.client.get(CAT_URL)
+
+        self.assertEqual(res2.status_code, status.HTTP_200_OK)
+        self.assertEqual(res1.data, res2.data)
+
+    def test_query_params_normalized(self):
+        """Test the order of listed ids shares a cache entry."""
+        other = Ability.objects.create(user=self.user, name='Claw')
+        self.client.get(
+            CAT_URL, {'abilities': f'{self.ability.id},{other.id}'}
+        )
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                CAT_URL, {'abilities': f'{other.id},{self.ability.id}'}
+            )
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def _rename_ability(self):
+        """Rename the ability of the cat outside of the cat API."""
+        self.ability.name = 'Scratch'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ability.save()
+
+    @override_settings(CAT_DOCUMENT_WORKERS=0)
+    def test_writes_invalidate(self):
+        """Test writes through the API and related rows refresh reads."""
+        url = detail_url(self.cat.id)
+        writes = [
+            lambda: self.client.patch(url, {'name': 'Renamed'}),
+            lambda: self.client.put(url, {
+                'name': 'Replaced', 'weight': 2, 'color': 'Red',
+            }),
+            self._rename_ability,
+        ]
+        for write in writes:
+            before = self.client.get(CAT_URL).data
+            detail = self.client.get(url).data
+            write()
+
+            self.assertNotEqual(self.client.get(CAT_URL).data, before)
+            self.assertNotEqual(self.client.get(url).data, detail)
+
+        before = self.client.get(CAT_URL).data
+        self.client.post(CAT_URL, {
+            'name': 'Created', 'weight': 2, 'color': 'Red',
+        })
+
+        self.assertNotEqual(self.client.get(CAT_URL).data, before)
+
+        self.client.delete(url)
+
+        self.assertEqual(
+            self.client.get(url).status_code, status.HTTP_404_NOT_FOUND
+        )
+
+    def test_cache_per_user(self):
+        """Test users do not read each other's cached lists."""
+        self.client.get(CAT_URL)
+        other = create_user(email='other@example.com', password='pass123')
+        self.client.force_authenticate(other)
+
+        res = self.client.get(CAT_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    @override_settings(CAT_DOCUMENT_WORKERS=0)
+    def test_other_user_style_writes_keep_cache(self):
+        """Test other users linking shared styles keep cached lists."""
+        style = FightingStyles.objects.create(name='BX', ground_allowed=False)
+        style.cat_set.add(self.cat)
+        other = create_user(email='other@example.com', password='pass123')
+        self.client.get(CAT_URL)
+
+        create_cat(user=other).fighting_styles.add(style)
+        with self.assertNumQueries(1):
+            self.client.get(CAT_URL)
+
+        style.ground_allowed = True
+        with self.captureOnCommitCallbacks(execute=True):
+            style.save()
+        res = self.client.get(CAT_URL)
+
+        self.assertTrue(res.data['results'][0]['fighting_styles'][0][
+            'ground_allowed'
+        ])
+
+    @override_settings(CAT_RESPONSE_CACHE=None)
+    def test_cache_disabled(self):
+        """Test responses are rendered every time without a cache alias."""
+        self.client.get(CAT_URL)
+
+        with self.assertNumQueries(2):
+            self.client.get(CAT_URL)
+
+
+class CatDocumentTests(TestCase):
+    """Test the stored documents rendered by the cat API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
 
+    def test_documents_match_serializers(self):
+        """Test reads render what the serializers would."""
+        res = self.client.post(CAT_URL, {
+            'name': 'Tom',
+            'weight': 4,
+            'abilities': [{'name': 'Bite'}, {'name': 'Claw'}],
+            'fighting_styles': [{'name': 'BX', 'ground_allowed': False}],
+        }, format='json')
+        cat = Cat.objects.get(id=res.data['id'])
+
+        res = self.client.get(detail_url(cat.id))
+
+        self.assertEqual(res.data, CatDetailSerializer(cat).data)
+        res = self.client.get(CAT_URL)
+        self.assertEqual(res.data['results'], [CatSerializer(cat).data])
+
+    @override_settings(CAT_DOCUMENT_WORKERS=0)
+    def test_related_changes_refresh_documents(self):
+        """Test changing or deleting relations refreshes documents."""
+        cat = create_cat(user=self.user)
+        ability = Ability.objects.create(user=self.user, name='Bite')
+        style = FightingStyles.objects.create(name='BX', ground_allowed=False)
+        cat.abilities.add(ability)
+        style.cat_set.add(cat)
+
+        ability.name = 'Scratch'
+        style.ground_allowed = True
+        with self.captureOnCommitCallbacks() as callbacks:
+            ability.save()
+            style.save()
+        cat.refresh_from_db()
+
+        self.assertEqual(cat.document['abilities'][0]['name'], 'Bite')
+        for callback in callbacks:
+            callback()
+        cat.refresh_from_db()
+        self.assertEqual(cat.document['abilities'][0]['name'], 'Scratch')
+        self.assertTrue(cat.document['fighting_styles'][0]['ground_allowed'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ability.delete()
+        style.cat_set.clear()
+        cat.refresh_from_db()
+
+        self.assertEqual(cat.document['abilities'], [])
+        self.assertEqual(cat.document['fighting_styles'], [])
+
+    @override_settings(CAT_IMAGE_WORKERS=0)
+    def test_related_documents_refreshed_by_own_workers(self):
+        """Test documents are rebuilt apart from the image workers."""
+        cat = create_cat(user=self.user)
+        ability = Ability.objects.create(user=self.user, name='Bite')
+        cat.abilities.add(ability)
+
+        ability.name = 'Scratch'
+        with mock.patch('cat.signals.document_workers') as workers:
+            with self.captureOnCommitCallbacks(execute=True):
+                ability.save()
+        cat.refresh_from_db()
+
+        workers.submit.assert_called_once()
+        self.assertEqual(cat.document['abilities'][0]['name'], 'Bite')
+
+    def test_bulk_writes_build_documents(self):
+        """Test the bulk API stores documents of the cats it writes."""
+        res = self.client.post(BULK_URL, [
+            {'name': 'Bulk', 'weight': 4, 'abilities': [{'name': 'Bite'}]},
+        ], format='json')
+        cat = Cat.objects.get(id=res.data['results'][0]['id'])
+
+        self.assertEqual(cat.document, CatDetailSerializer(cat).data)
+
+    def test_missing_document_built_on_read(self):
+        """Test cats without a stored document are still rendered."""
+        cat = create_cat(user=self.user)
+        Cat.objects.filter(id=cat.id).update(document={})
+
+        res = self.client.get(detail_url(cat.id))
+
+        self.assertEqual(res.data['name'], cat.name)
+
+
+@override_settings(CAT_IMAGE_WORKERS=0)
 class ImageUploadTests(TestCase):
     """Tests for the image upload API."""
 
@@ -435,23 +1096,54 @@ class ImageUploadTests(TestCase):
         self.cat = create_cat(user=self.user)
 
     def tearDown(self):
+        self.cat.refresh_from_db()
+        for name in self.cat.image_variants.values():
+            self.cat.image.storage.delete(name)
         self.cat.image.delete()
 
-    def test_upload_image(self):
-        """Test uploading an image to a cat."""
+    def _upload(self, size=(10, 10)):
+        """Upload an image of the given size to the cat."""
         url = image_upload_url(self.cat.id)
         with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
-            img = Image.new('RGB', (10, 10))
+            img = Image.new('RGB', size)
             img.save(image_file, format='JPEG')
             image_file.seek(0)
             data = {'image': image_file}
-            res = self.client.post(url, data, format='multipart')
+            return self.client.post(url, data, format='multipart')
+
+    def test_upload_image(self):
+        """Test uploading an image to a cat."""
+        res = self._upload()
 
         self.cat.refresh_from_db()
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
         self.assertIn('image', res.data)
+        self.assertEqual(res.data['image_status'], Cat.IMAGE_PENDING)
         self.assertTrue(os.path.exists(self.cat.image.path))
 
+    def test_upload_image_processed(self):
+        """Test variants are generated once the upload is committed."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(size=(2000, 1000))
+
+        self.cat.refresh_from_db()
+        self.assertEqual(self.cat.image_status, Cat.IMAGE_READY)
+        self.assertEqual(
+            set(self.cat.image_variants), {'thumbnail', 'web'}
+        )
+        storage = self.cat.image.storage
+        with storage.open(self.cat.image_variants['thumbnail']) as file:
+            self.assertEqual(Image.open(file).size, (200, 100))
+        with storage.open(self.cat.image_variants['web']) as file:
+            self.assertEqual(Image.open(file).size, (1280, 640))
+
+        res = self.client.get(detail_url(self.cat.id))
+        self.assertEqual(res.data['image_status'], Cat.IMAGE_READY)
+        self.assertEqual(
+            res.data['image_variants']['thumbnail'],
+            storage.url(self.cat.image_variants['thumbnail']),
+        )
+
     def test_upload_image_bad_request(self):
         """Test uploading invalid image."""
         url = image_upload_url(self.cat.id)
@@ -459,3 +1151,69 @@ class ImageUploadTests(TestCase):
         res = self.client.post(url, data, format='multipart')
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+def simulate_url(cat_id):
+    """Create and return a fight simulation url."""
+    return reverse('cat:cat-simulate', args=[cat_id])
+
+
+class CatSimulateApiTests(TestCase):
+    """Test simulating fights between cats."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+        self.cat = create_cat(self.user, weight=8)
+        self.opponent = create_cat(self.user, weight=3, dangerous=False)
+
+    def test_simulate(self):
+        """Test the odds against each opponent are returned."""
+        params = {
+            'opponents': f'{self.opponent.id},{self.cat.id}',
+            'bouts': 2000,
+            'seed': 1,
+        }
+
+        res = self.client.get(simulate_url(self.cat.id), params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['cat'], self.cat.id)
+        self.assertEqual(res.data['bouts'], 2000)
+        favoured, mirror = res.data['results']
+        self.assertEqual(favoured['opponent'], self.opponent.id)
+        self.assertGreater(favoured['win'], favoured['loss'])
+        self.assertEqual(mirror['opponent'], self.cat.id)
+        for odds in res.data['results']:
+            self.assertAlmostEqual(
+                odds['win'] + odds['loss'] + odds['draw'], 1.0
+            )
+
+        again = self.client.get(simulate_url(self.cat.id), params)
+        self.assertEqual(again.data, res.data)
+
+    def test_simulate_other_users_cat_rejected(self):
+        """Test cats of other users cannot be opponents."""
+        other = create_user(email='other@example.com', password='test123')
+        stranger = create_cat(other)
+
+        res = self.client.get(
+            simulate_url(self.cat.id), {'opponents': stranger.id}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(stranger.id), res.data['opponents'][0])
+
+    def test_simulate_invalid_query(self):
+        """Test malformed opponents and bout counts are rejected."""
+        url = simulate_url(self.cat.id)
+
+        for params in [
+            {},
+            {'opponents': 'a,b'},
+            {'opponents': self.opponent.id, 'bouts': 0},
+            {'opponents': self.opponent.id, 'bouts': 1000001},
+        ]:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,249 @@
+"""
+Tests for the cat search API.
+"""
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ability, Cat, CatFacet, FightingStyles
+
+from cat.search import facet_counts, stored_facet_counts
+
+
+SEARCH_URL = reverse('cat:cat-search')
+CAT_URL = reverse('cat:cat-list')
+BULK_URL = reverse('cat:cat-bulk')
+
+
+def detail_url(cat_id):
+    """Create and return a cat detail URL."""
+    return reverse('cat:cat-detail', args=[cat_id])
+
+
+def facet(res, name):
+    """Return the {value: count} of a facet of a search response."""
+    return {item['value']: item['count'] for item in res.data['facets'][name]}
+
+
+class CatSearchApiTests(TestCase):
+    """Test cat search API requests."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.boxing = FightingStyles.objects.create(name='BX')
+        self.claws = Ability.objects.create(user=self.user, name='Claws')
+        self.tom = Cat.objects.create(
+            user=self.user, name='Tom', description='Grey alley fighter',
+            weight=2.5, color='grey', dangerous=True,
+        )
+        self.tom.abilities.add(self.claws)
+        self.tom.fighting_styles.add(self.boxing)
+        self.felix = Cat.objects.create(
+            user=self.user, name='Felix', description='Black and calm',
+            weight=4, color='black', dangerous=False,
+        )
+        self.felix.abilities.add(self.claws)
+        self.garfield = Cat.objects.create(
+            user=self.user, name='Garfield', description='Lazy orange cat',
+            weight=8, color='orange', dangerous=False,
+        )
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='test123'
+        )
+        Cat.objects.create(user=other, name='Tom', weight=3, color='grey')
+
+    def search(self, **params):
+        """Search the cats of the user and return the response."""
+        return self.client.get(SEARCH_URL, params)
+
+    def test_auth_required(self):
+        """Test auth is required to search cats."""
+        res = APIClient().get(SEARCH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_facets_of_all_cats(self):
+        """Test every cat of the user is counted in its facets."""
+        res = self.search()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [cat['id'] for cat in res.data['results']],
+            [self.garfield.id, self.felix.id, self.tom.id],
+        )
+        self.assertEqual(facet(res, 'weight_class'), {0: 1, 1: 1, 3: 1})
+        self.assertEqual(
+            facet(res, 'color'), {'black': 1, 'grey': 1, 'orange': 1}
+        )
+        self.assertEqual(facet(res, 'dangerous'), {False: 2, True: 1})
+        self.assertEqual(facet(res, 'abilities'), {self.claws.id: 2})
+        self.assertEqual(facet(res, 'fighting_styles'), {self.boxing.id: 1})
+        self.assertEqual(
+            res.data['facets']['weight_class'][-1],
+            {'value': 3, 'min': 6.0, 'max': None, 'count': 1},
+        )
+
+    def test_text_search(self):
+        """Test cats are matched by name or description."""
+        res = self.search(q='alley')
+        self.assertEqual(
+            [cat['id'] for cat in res.data['results']], [self.tom.id]
+        )
+
+        res = self.search(q='felix calm')
+        self.assertEqual(
+            [cat['id'] for cat in res.data['results']], [self.felix.id]
+        )
+
+    def test_filters_narrow_results_and_facets(self):
+        """Test filters apply to the results and their facet counts."""
+        res = self.search(
+            weight_min=3, weight_max=9, color='black,orange',
+            dangerous='false', abilities=str(self.claws.id),
+        )
+
+        self.assertEqual(
+            [cat['id'] for cat in res.data['results']], [self.felix.id]
+        )
+        self.assertEqual(facet(res, 'color'), {'black': 1})
+        self.assertEqual(facet(res, 'weight_class'), {1: 1})
+
+    def test_fighting_styles_filter(self):
+        """Test cats are filtered by fighting styles."""
+        res = self.search(fighting_styles=f'{self.boxing.id}', match='all')
+
+        self.assertEqual(
+            [cat['id'] for cat in res.data['results']], [self.tom.id]
+        )
+
+    def test_invalid_query(self):
+        """Test invalid filters are rejected."""
+        for params in [
+            {'weight_min': 5, 'weight_max': 2},
+            {'abilities': 'one'},
+            {'match': 'some'},
+        ]:
+            with self.subTest(params=params):
+                res = self.search(**params)
+                self.assertEqual(
+                    res.status_code, status.HTTP_400_BAD_REQUEST
+                )
+
+    def test_facets_take_one_query(self):
+        """Test the facet counts are read with a single query."""
+        with self.assertNumQueries(1):
+            facets = facet_counts(Cat.objects.filter(user=self.user))
+
+        self.assertEqual(facets['color'][0]['count'], 1)
+
+
+class CatFacetCountTests(TestCase):
+    """Test the stored facet counts follow the writes of cats."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertCountsCurrent(self):
+        """Assert the stored counts match the counts of the cats."""
+        self.assertEqual(
+            stored_facet_counts(self.user),
+            facet_counts(Cat.objects.filter(user=self.user)),
+        )
+
+    def create(self, **data):
+        """Create a cat through the API and return its id."""
+        data = {'name': 'Tom', 'weight': 4, 'color': 'grey', **data}
+        res = self.client.post(CAT_URL, data, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        return res.data['id']
+
+    def test_create_update_delete(self):
+        """Test counts follow cats created, updated and deleted."""
+        cat_id = self.create(
+            abilities=[{'name': 'Claws'}, {'name': 'Jump'}],
+            fighting_styles=[{'name': 'BX', 'ground_allowed': False}],
+        )
+        self.create(weight=8, dangerous=False)
+        self.assertCountsCurrent()
+        self.assertEqual(
+            stored_facet_counts(self.user)['weight_class'],
+            [
+                {'value': 1, 'min': 3.0, 'max': 4.5, 'count': 1},
+                {'value': 3, 'min': 6.0, 'max': None, 'count': 1},
+            ],
+        )
+
+        self.client.patch(detail_url(cat_id), {
+            'weight': 8, 'color': '', 'abilities': [{'name': 'Jump'}],
+            'fighting_styles': [],
+        }, format='json')
+        self.assertCountsCurrent()
+
+        self.client.delete(detail_url(cat_id))
+        self.assertCountsCurrent()
+
+    def test_bulk_writes(self):
+        """Test counts follow cats written in bulk."""
+        res = self.client.post(BULK_URL, [
+            {'name': 'Tom', 'weight': 2, 'color': 'grey',
+             'abilities': [{'name': 'Claws'}]},
+            {'name': 'Rex', 'weight': 7, 'color': 'black'},
+        ], format='json')
+        self.assertCountsCurrent()
+
+        tom, rex = [row['id'] for row in res.data['results']]
+        self.client.patch(BULK_URL, [
+            {'id': tom, 'color': 'black', 'abilities': []},
+            {'id': rex, 'dangerous': False, 'weight': 4,
+             'fighting_styles': [{'name': 'WR', 'ground_allowed': True}]},
+        ], format='json')
+        self.assertCountsCurrent()
+
+        self.client.patch(BULK_URL, [
+            {'id': tom, 'abilities': [{'name': 'Jump'}, {'name': 'Jump'}]},
+            {'id': rex, 'fighting_styles': []},
+        ], format='json')
+        self.assertCountsCurrent()
+
+    def test_relations_changed_from_either_side(self):
+        """Test counts follow links changed from a relation."""
+        cat = Cat.objects.get(pk=self.create())
+        claws = Ability.objects.create(user=self.user, name='Claws')
+        style = FightingStyles.objects.create(name='MT')
+
+        claws.cat_set.add(cat)
+        style.cat_set.add(cat)
+        cat.abilities.remove(claws, Ability.objects.create(
+            user=self.user, name='Unused'
+        ))
+        self.assertCountsCurrent()
+
+        cat.abilities.add(claws)
+        style.cat_set.clear()
+        self.assertCountsCurrent()
+
+        claws.delete()
+        self.assertCountsCurrent()
+
+    def test_unfiltered_search_reads_stored_counts(self):
+        """Test the facets of every cat come from the stored counts."""
+        self.create()
+        CatFacet.objects.filter(facet='color').update(count=5)
+
+        res = self.client.get(SEARCH_URL)
+
+        self.assertEqual(
+            res.data['facets']['color'], [{'value': 'grey', 'count': 5}]
+        )
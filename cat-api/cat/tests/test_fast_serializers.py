@@ -0,0 +1,112 @@
+"""
+Tests for fast read serializers.
+"""
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Prefetch
+from django.test import TestCase
+
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Ability, Cat, FightingStyles
+from cat.fast_serializers import FastReadSerializer
+from cat.serializers import (
+    AbilitySerializer,
+    CatDetailSerializer,
+    CatSerializer,
+    FightingStylesSerializer,
+)
+
+
+class FastReadSerializerParityTests(TestCase):
+    """Test fast serializers render exactly like the DRF serializers."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='pass123',
+        )
+        bite = Ability.objects.create(user=self.user, name='Bite')
+        claw = Ability.objects.create(user=self.user, name='Claw "ß" 🐾')
+        boxing = FightingStyles.objects.create(
+            name='BX', ground_allowed=False
+        )
+        wrestling = FightingStyles.objects.create(
+            name='WR', ground_allowed=True
+        )
+
+        plain = Cat.objects.create(user=self.user, name='Plain', weight=5)
+        full = Cat.objects.create(
+            user=self.user,
+            name='Zoë',
+            description='Multi\nline',
+            weight=4.25,
+            color='',
+            dangerous=False,
+            image_status=Cat.IMAGE_READY,
+            image_variants={'thumbnail': 'uploads/cat/variants/a.jpg'},
+        )
+        full.abilities.add(claw, bite)
+        full.fighting_styles.add(wrestling, boxing)
+        plain.abilities.add(bite)
+
+    def assertParity(self, serializer_class, queryset):
+        """Assert both serializers render queryset to the same bytes."""
+        expected = JSONRenderer().render(
+            serializer_class(queryset, many=True).data
+        )
+        fast = FastReadSerializer(serializer_class).many(queryset)
+
+        self.assertEqual(JSONRenderer().render(fast), expected)
+
+    def _cats(self):
+        """Return cats with relations in the order fast serializers use."""
+        return Cat.objects.order_by('id').prefetch_related(
+            Prefetch('abilities', queryset=Ability.objects.order_by('id')),
+            Prefetch(
+                'fighting_styles',
+                queryset=FightingStyles.objects.order_by('id'),
+            ),
+        )
+
+    def test_cat_detail_parity(self):
+        """Test parity of the cat detail serializer."""
+        self.assertParity(CatDetailSerializer, self._cats())
+
+    def test_cat_parity(self):
+        """Test parity of the cat list serializer."""
+        self.assertParity(CatSerializer, self._cats())
+
+    def test_relation_parity(self):
+        """Test parity of the ability and fighting style serializers."""
+        self.assertParity(AbilitySerializer, Ability.objects.order_by('id'))
+        self.assertParity(
+            FightingStylesSerializer, FightingStyles.objects.order_by('id')
+        )
+
+    def test_empty_queryset(self):
+        """Test no relations are queried without rows."""
+        reader = FastReadSerializer(CatDetailSerializer)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(reader.many(Cat.objects.filter(name='-')), [])
+
+    def test_queries_per_relation(self):
+        """Test rows and each relation are read with one query."""
+        reader = FastReadSerializer(CatDetailSerializer)
+
+        with self.assertNumQueries(3):
+            reader.many(Cat.objects.all())
+
+    def test_unsupported_source(self):
+        """Test fields with nested sources are rejected."""
+        class OwnerSerializer(serializers.ModelSerializer):
+            email = serializers.CharField(source='user.email')
+
+            class Meta:
+                model = Cat
+                fields = ['id', 'email']
+
+        with self.assertRaises(ImproperlyConfigured):
+            FastReadSerializer(OwnerSerializer).many(Cat.objects.all())
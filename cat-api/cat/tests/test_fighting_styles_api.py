@@ -2,6 +2,7 @@
 Test for fighting styles API.
 """
 from django.contrib.auth import get_user_model
+from django.db import DatabaseError, transaction
 from django.urls import reverse
 from django.test import TestCase
 
@@ -10,6 +11,7 @@ from rest_framework.test import APIClient
 
 from core.models import FightingStyles, Ability, Cat
 
+from cat.catalog import fighting_styles_catalog
 from cat.serializers import FightingStylesSerializer
 
 
@@ -92,4 +94,166 @@ class FightingStylesApiTests(TestCase):
 
         res = self.client.get(FIGHTING_STYLES_URL, {'assigned_only': 1 })
 
-        self.assertEqual(len(res.data), 1)
\ No newline at end of file
+        self.assertEqual(len(res.data), 1)
+
+    def test_list_served_from_catalog(self):
+        """Test listing fighting styles twice only queries once."""
+        FightingStyles.objects.create(name='WR', ground_allowed=True)
+        self.client.get(FIGHTING_STYLES_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(FIGHTING_STYLES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+
+    def test_catalog_invalidated_on_change(self):
+        """Test saving and deleting fighting styles refreshes the list."""
+        style = FightingStyles.objects.create(name='WR', ground_allowed=True)
+        self.client.get(FIGHTING_STYLES_URL)
+
+        style.ground_allowed = False
+        style.save()
+        FightingStyles.objects.create(name='BX', ground_allowed=False)
+        res = self.client.get(FIGHTING_STYLES_URL)
+
+        self.assertEqual(res.data, [
+            {'id': style.id, 'name': 'WR', 'ground_allowed': False},
+            {'id': res.data[1]['id'], 'name': 'BX', 'ground_allowed': False},
+        ])
+
+        style.delete()
+        res = self.client.get(FIGHTING_STYLES_URL)
+
+        self.assertEqual([row['name'] for row in res.data], ['BX'])
+
+    def test_catalog_drops_rolled_back_styles(self):
+        """Test styles created in a rolled back transaction are dropped."""
+        self.client.get(FIGHTING_STYLES_URL)
+        try:
+            with transaction.atomic():
+                FightingStyles.objects.create(name='WR', ground_allowed=True)
+                self.assertIsNotNone(fighting_styles_catalog.lookup('WR'))
+                raise DatabaseError
+        except DatabaseError:
+            pass
+
+        self.assertIsNone(fighting_styles_catalog.lookup('WR'))
+        res = self.client.get(FIGHTING_STYLES_URL)
+
+        self.assertEqual(res.data, [])
+
+    def test_catalog_keeps_released_styles(self):
+        """Test styles created in a released savepoint are listed."""
+        self.client.get(FIGHTING_STYLES_URL)
+        with transaction.atomic():
+            FightingStyles.objects.create(name='WR', ground_allowed=True)
+        with transaction.atomic():
+            self.assertIsNotNone(fighting_styles_catalog.lookup('WR'))
+
+        res = self.client.get(FIGHTING_STYLES_URL)
+
+        self.assertEqual([row['name'] for row in res.data], ['WR'])
+
+    def test_list_not_modified_until_change(self):
+        """Test the list answers 304 until a fighting style changes."""
+        style = FightingStyles.objects.create(name='WR', ground_allowed=True)
+        etag = self.client.get(FIGHTING_STYLES_URL)['ETag']
+
+        res = self.client.get(FIGHTING_STYLES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        style.name = 'BX'
+        style.save()
+        res = self.client.get(FIGHTING_STYLES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def _cat_counts(self):
+        """Return the maintained cat count of each style by name."""
+        return dict(FightingStyles.objects.values_list('name', 'cat_count'))
+
+    def test_cat_counts_maintained(self):
+        """Test linking, unlinking and deleting cats updates counts."""
+        boxing = FightingStyles.objects.create(name='BX')
+        wrestling = FightingStyles.objects.create(name='WR')
+        cats = [
+            Cat.objects.create(user=self.user, name=f'Cat {i}', weight=4)
+            for i in range(3)
+        ]
+
+        cats[0].fighting_styles.add(boxing, wrestling)
+        boxing.cat_set.add(cats[1], cats[2])
+        self.assertEqual(self._cat_counts(), {'BX': 3, 'WR': 1})
+
+        cats[0].fighting_styles.remove(wrestling, wrestling.pk + 100)
+        cats[1].delete()
+        self.assertEqual(self._cat_counts(), {'BX': 2, 'WR': 0})
+
+        boxing.ground_allowed = True
+        boxing.save()
+        cats[0].fighting_styles.clear()
+        boxing.cat_set.clear()
+        self.assertEqual(self._cat_counts(), {'BX': 0, 'WR': 0})
+
+    def test_cat_counts_bulk_writes(self):
+        """Test the bulk cat API updates counts."""
+        res = self.client.post(reverse('cat:cat-bulk'), [
+            {
+                'name': f'Cat {i}',
+                'weight': 4,
+                'fighting_styles': [{'name': 'BX', 'ground_allowed': False}],
+            }
+            for i in range(2)
+        ], format='json')
+        cat_id = res.data['results'][0]['id']
+
+        self.assertEqual(self._cat_counts(), {'BX': 2})
+
+        self.client.patch(reverse('cat:cat-bulk'), [{
+            'id': cat_id,
+            'fighting_styles': [{'name': 'MT', 'ground_allowed': False}],
+        }], format='json')
+
+        self.assertEqual(self._cat_counts(), {'BX': 1, 'MT': 1})
+
+    def test_assigned_only_uses_counts(self):
+        """Test assigned styles are found from the counts alone."""
+        FightingStyles.objects.create(name='WR')
+        style = FightingStyles.objects.create(name='BX')
+        Cat.objects.create(
+            user=self.user, name='Tom', weight=4
+        ).fighting_styles.add(style)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(FIGHTING_STYLES_URL, {'assigned_only': 1})
+
+        self.assertEqual([row['name'] for row in res.data], ['BX'])
+
+    def test_cat_links_keep_style_versions(self):
+        """Test cats linking styles only change the assigned list."""
+        style = FightingStyles.objects.create(name='BX')
+        cats = [
+            Cat.objects.create(user=self.user, name=f'Cat {i}', weight=4)
+            for i in range(2)
+        ]
+        params = {'assigned_only': 1}
+        etag = self.client.get(FIGHTING_STYLES_URL)['ETag']
+        assigned_etag = self.client.get(FIGHTING_STYLES_URL, params)['ETag']
+
+        cats[0].fighting_styles.add(style)
+        res = self.client.get(
+            FIGHTING_STYLES_URL, params, HTTP_IF_NONE_MATCH=assigned_etag
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        assigned_etag = res['ETag']
+
+        cats[1].fighting_styles.add(style)
+        cats[0].delete()
+        res = self.client.get(
+            FIGHTING_STYLES_URL, params, HTTP_IF_NONE_MATCH=assigned_etag
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        res = self.client.get(FIGHTING_STYLES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,104 @@
+"""
+Tests for the fight simulation.
+"""
+import numpy as np
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from core.models import Ability, Cat, FightingStyles
+
+from cat.fights import FIGHTER_DTYPE, pack_cats, simulate
+
+
+def fighters(**fields):
+    """Return one fighter per value of the fields."""
+    count = max(len(values) for values in fields.values())
+    packed = np.zeros(count, FIGHTER_DTYPE)
+    packed['weight'] = 4.0
+    for name, values in fields.items():
+        packed[name] = values
+
+    return packed
+
+
+class SimulateTests(SimpleTestCase):
+    """Test the vectorized simulation."""
+
+    def test_counts_add_up_to_bouts(self):
+        """Test every bout is a win, a loss or a draw."""
+        counts = simulate(
+            fighters(weight=[3, 4, 5]), fighters(weight=[5, 4, 3]), 1000
+        )
+
+        self.assertEqual(counts.shape, (3, 3))
+        self.assertTrue((counts.sum(axis=1) == 1000).all())
+
+    def test_seed_is_deterministic(self):
+        """Test the same seed gives the same counts."""
+        a, b = fighters(weight=[3, 6]), fighters(weight=[4, 4])
+
+        self.assertTrue((
+            simulate(a, b, 500, seed=7) == simulate(a, b, 500, seed=7)
+        ).all())
+
+    def test_mirror_match_is_even(self):
+        """Test identical fighters win as often as they lose."""
+        a = fighters(weight=[4.5], grappling=[1], dangerous=[True])
+
+        wins, losses, _ = simulate(a, a.copy(), 20000, seed=1)[0]
+
+        self.assertAlmostEqual(wins / 20000, losses / 20000, delta=0.02)
+
+    def test_stronger_fighter_favoured(self):
+        """Test weight, abilities, danger and styles give an edge."""
+        strong = fighters(
+            weight=[8], abilities=[4], striking=[1], dangerous=[True]
+        )
+        weak = fighters(weight=[3])
+
+        wins, losses, _ = simulate(strong, weak, 5000, seed=1)[0]
+
+        self.assertGreater(wins, 3 * losses)
+
+    def test_chunks_match_one_step(self):
+        """Test splitting pairings and bouts keeps every bout counted."""
+        a, b = fighters(weight=[3, 4, 5]), fighters(weight=[4, 4, 4])
+
+        counts = simulate(a, b, 1000, seed=1, chunk_size=300)
+
+        self.assertTrue((counts.sum(axis=1) == 1000).all())
+        self.assertLess(counts[0, 0], counts[2, 0])
+
+
+class PackCatsTests(TestCase):
+    """Test packing cats into fighters."""
+
+    def test_pack_cats(self):
+        """Test abilities and styles are counted per cat."""
+        user = get_user_model().objects.create_user(
+            email='user@example.com', password='pass123'
+        )
+        plain = Cat.objects.create(
+            user=user, name='Plain', weight=3, dangerous=False
+        )
+        fighter = Cat.objects.create(user=user, name='Fighter', weight=6)
+        fighter.abilities.add(
+            Ability.objects.create(user=user, name='Bite'),
+            Ability.objects.create(user=user, name='Scratch'),
+        )
+        fighter.fighting_styles.add(
+            FightingStyles.objects.create(name='BX'),
+            FightingStyles.objects.create(name='WR', ground_allowed=True),
+            FightingStyles.objects.create(name='BJJ', ground_allowed=True),
+        )
+
+        with self.assertNumQueries(3):
+            ids, packed = pack_cats(Cat.objects.all())
+
+        self.assertEqual(ids.tolist(), [plain.id, fighter.id])
+        self.assertEqual(packed['weight'].tolist(), [3.0, 6.0])
+        self.assertEqual(packed['abilities'].tolist(), [0, 2])
+        self.assertEqual(packed['striking'].tolist(), [0, 1])
+        self.assertEqual(packed['grappling'].tolist(), [0, 2])
+        self.assertEqual(packed['dangerous'].tolist(), [False, True])
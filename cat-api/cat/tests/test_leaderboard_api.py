@@ -0,0 +1,80 @@
+"""
+Tests for leaderboard API.
+"""
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Cat, CatRating, Tournament
+
+from cat.tournaments import TournamentRunner
+
+
+LEADERBOARD_URL = reverse('cat:leaderboard-list')
+
+
+class LeaderboardApiTests(TestCase):
+    """Test leaderboard API requests."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Cat.objects.bulk_create([
+            Cat(user=self.user, name=f'Cat {i}', weight=2 + i % 5)
+            for i in range(12)
+        ])
+        TournamentRunner(Tournament(
+            user=self.user, name='Cup', format=Tournament.ROUND_ROBIN,
+            seed=1,
+        )).run(Cat.objects.all())
+        self.ordered = list(CatRating.objects.top(self.user, 100))
+
+    def test_auth_required(self):
+        """Test auth is required to read the leaderboard."""
+        res = APIClient().get(LEADERBOARD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_top(self):
+        """Test the top ratings are listed with their ranks."""
+        res = self.client.get(LEADERBOARD_URL, {'limit': 3})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['rank'] for row in res.data], [1, 2, 3])
+        self.assertEqual(
+            [row['cat'] for row in res.data],
+            [rating.cat_id for rating in self.ordered[:3]],
+        )
+
+    def test_around_cat(self):
+        """Test the rank and neighbours of a cat are listed."""
+        cat_id = self.ordered[5].cat_id
+
+        with self.assertNumQueries(5):
+            res = self.client.get(
+                LEADERBOARD_URL, {'cat': cat_id, 'around': 2}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['rank'] for row in res.data], [4, 5, 6, 7, 8])
+        self.assertEqual(
+            [row['cat'] for row in res.data],
+            [rating.cat_id for rating in self.ordered[3:8]],
+        )
+
+    def test_unrated_cat_rejected(self):
+        """Test asking for a cat without rating is rejected."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='test123'
+        )
+        stranger = Cat.objects.create(user=other, name='Stranger', weight=3)
+
+        res = self.client.get(LEADERBOARD_URL, {'cat': stranger.id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,250 @@
+"""
+Tests for matchmaking.
+"""
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Cat, CatRating, MatchTicket
+
+from cat.matchmaking import (
+    BASE_WINDOW,
+    MatchmakingService,
+    RatingQueue,
+    Ticket,
+    match_in_database,
+    tolerance,
+    weight_class,
+)
+from cat.serializers import MatchTicketSerializer
+
+
+MATCHMAKING_URL = reverse('cat:matchmaking-list')
+
+
+def detail_url(ticket_id):
+    """Create and return a ticket detail URL."""
+    return reverse('cat:matchmaking-detail', args=[ticket_id])
+
+
+def ticket(ticket_id, user_id, rating, queued_at=0.0, klass=1):
+    """Return a queue ticket."""
+    return Ticket(ticket_id, user_id, ticket_id, rating, klass, queued_at)
+
+
+class RatingQueueTests(SimpleTestCase):
+    """Test the in-memory queue."""
+
+    def test_weight_classes(self):
+        """Test weights are sorted in classes."""
+        self.assertEqual(
+            [weight_class(w) for w in [2, 3, 4, 5, 9]], [0, 0, 1, 2, 3]
+        )
+
+    def test_tolerance_widens(self):
+        """Test the window widens with the wait, up to the largest."""
+        self.assertEqual(tolerance(0), BASE_WINDOW)
+        self.assertGreater(tolerance(5), tolerance(1))
+        self.assertEqual(tolerance(3600), tolerance(7200))
+
+    def test_match_close_rating_of_other_user(self):
+        """Test a ticket matches a close rating of another user."""
+        queue = RatingQueue()
+        self.assertIsNone(queue.match(ticket(1, 1, 1500), 0))
+        self.assertIsNone(queue.match(ticket(2, 1, 1510), 0))
+        self.assertIsNone(queue.match(ticket(3, 2, 1500, klass=2), 0))
+
+        opponent = queue.match(ticket(4, 2, 1530), 0)
+
+        self.assertEqual(opponent.id, 1)
+        self.assertEqual(sorted(queue.tickets), [2, 3])
+
+    def test_far_rating_waits_for_wider_window(self):
+        """Test distant ratings are matched once the window widened."""
+        queue = RatingQueue()
+        queue.match(ticket(1, 1, 1500), 0)
+        self.assertIsNone(queue.match(ticket(2, 2, 1700), 0))
+
+        self.assertEqual(queue.sweep(5), [])
+        pairs = queue.sweep(20)
+
+        self.assertEqual(
+            [(a.id, b.id) for a, b in pairs], [(1, 2)]
+        )
+        self.assertEqual(len(queue), 0)
+
+    def test_match_within_window_of_waiting_ticket(self):
+        """Test a new ticket matches a ticket whose window covers it."""
+        queue = RatingQueue()
+        queue.match(ticket(1, 1, 1500), 0)
+        self.assertEqual(queue.sweep(100), [])
+
+        opponent = queue.match(ticket(2, 2, 1800, queued_at=100), 100)
+
+        self.assertEqual(opponent.id, 1)
+        self.assertEqual(len(queue), 0)
+
+    def test_remove(self):
+        """Test removed tickets are not matched."""
+        queue = RatingQueue()
+        queue.match(ticket(1, 1, 1500), 0)
+
+        queue.remove(1)
+
+        self.assertIsNone(queue.match(ticket(2, 2, 1500), 0))
+        self.assertEqual(list(queue.tickets), [2])
+
+
+class MatchmakingServiceTests(SimpleTestCase):
+    """Test the matchmaking loop."""
+
+    @override_settings(MATCHMAKING_INTERVAL=0.01)
+    def test_loop_matches_and_reloads(self):
+        """Test waiting tickets are loaded and matches are stored."""
+        stored = []
+        matched = threading.Event()
+
+        def store(ticket_id, opponent_id):
+            stored.append((ticket_id, opponent_id))
+            matched.set()
+            return True
+
+        def load(after_id=0, ids=None):
+            return [ticket(1, 1, 1500, queued_at=1e12)] if not after_id else []
+
+        service = MatchmakingService(store=store, load=load)
+        service.submit(ticket(2, 2, 1520, queued_at=1e12))
+
+        self.assertTrue(matched.wait(5))
+        self.assertEqual(stored, [(2, 1)])
+        self.assertEqual(len(service.queue), 0)
+
+
+def create_user(email):
+    """Create and return a user."""
+    return get_user_model().objects.create_user(email=email, password='pw')
+
+
+@override_settings(MATCHMAKING_INTERVAL=0)
+class MatchTicketApiTests(TestCase):
+    """Test queueing cats, matched against the database."""
+
+    def setUp(self):
+        self.user = create_user('user@example.com')
+        self.other = create_user('other@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.cat = Cat.objects.create(user=self.user, name='Tom', weight=4)
+
+    def queue_other_cat(self, rating=1500.0, weight=4, waited=0):
+        """Queue and return a ticket of another user."""
+        cat = Cat.objects.create(user=self.other, name='Rex', weight=weight)
+        queued = MatchTicket.objects.create(
+            user=self.other, cat=cat, rating=rating,
+            weight_class=weight_class(weight),
+        )
+        MatchTicket.objects.filter(pk=queued.pk).update(
+            created_at=timezone.now() - timedelta(seconds=waited)
+        )
+        return queued
+
+    def test_queue_waits_without_opponent(self):
+        """Test a cat without opponent waits."""
+        res = self.client.post(MATCHMAKING_URL, {'cat': self.cat.id})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['status'], MatchTicket.WAITING)
+        self.assertEqual(res.data['rating'], CatRating.INITIAL)
+        self.assertEqual(res.data['weight_class'], 1)
+
+    def test_queue_matches_waiting_opponent(self):
+        """Test a cat is matched with a close waiting opponent."""
+        queued = self.queue_other_cat(rating=1530)
+
+        res = self.client.post(MATCHMAKING_URL, {'cat': self.cat.id})
+
+        self.assertEqual(res.data['status'], MatchTicket.MATCHED)
+        self.assertEqual(res.data['opponent'], queued.cat_id)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, MatchTicket.MATCHED)
+        self.assertEqual(queued.opponent_id, self.cat.id)
+
+    def test_window_widens_with_wait(self):
+        """Test distant opponents match once they waited long enough."""
+        self.queue_other_cat(rating=1700)
+        self.queue_other_cat(rating=1300, weight=9, waited=60)
+        patient = self.queue_other_cat(rating=1700, waited=30)
+
+        res = self.client.post(MATCHMAKING_URL, {'cat': self.cat.id})
+
+        self.assertEqual(res.data['opponent'], patient.cat_id)
+
+    def test_queue_rejects_other_or_queued_cats(self):
+        """Test only waiting free cats of the user can be queued."""
+        stranger = self.queue_other_cat(weight=9).cat
+        self.client.post(MATCHMAKING_URL, {'cat': self.cat.id})
+
+        for cat in [stranger, self.cat]:
+            res = self.client.post(MATCHMAKING_URL, {'cat': cat.id})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_concurrently_queued_cat_rejected(self):
+        """Test a cat queued since it was validated is rejected."""
+        MatchTicket.objects.create(
+            user=self.user, cat=self.cat, rating=1500.0, weight_class=1,
+        )
+
+        with patch.object(
+            MatchTicketSerializer, 'validate_cat', lambda self, cat: cat
+        ):
+            res = self.client.post(MATCHMAKING_URL, {'cat': self.cat.id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['cat'], ['Cat is already queued.'])
+        self.assertEqual(MatchTicket.objects.filter(cat=self.cat).count(), 1)
+
+    def test_cancel(self):
+        """Test a waiting ticket is cancelled and not matched."""
+        res = self.client.post(MATCHMAKING_URL, {'cat': self.cat.id})
+
+        cancel = self.client.delete(detail_url(res.data['id']))
+        again = self.client.delete(detail_url(res.data['id']))
+
+        self.assertEqual(cancel.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(again.status_code, status.HTTP_400_BAD_REQUEST)
+        ticket = MatchTicket.objects.get(pk=res.data['id'])
+        self.assertEqual(ticket.status, MatchTicket.CANCELLED)
+        queued = self.queue_other_cat()
+        self.assertFalse(match_in_database(queued))
+
+    def test_list_own_tickets(self):
+        """Test only the tickets of the user are listed."""
+        self.queue_other_cat()
+        self.client.post(MATCHMAKING_URL, {'cat': self.cat.id})
+
+        res = self.client.get(MATCHMAKING_URL)
+
+        self.assertEqual(
+            [item['cat'] for item in res.data['results']], [self.cat.id]
+        )
+
+    @override_settings(MATCHMAKING_INTERVAL=1)
+    def test_queue_submits_to_loop(self):
+        """Test tickets go to the loop once committed when it runs."""
+        with patch('cat.matchmaking.matchmaker.submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(
+                    MATCHMAKING_URL, {'cat': self.cat.id}
+                )
+
+        self.assertEqual(res.data['status'], MatchTicket.WAITING)
+        queued, = submit.call_args.args
+        self.assertEqual(queued.id, res.data['id'])
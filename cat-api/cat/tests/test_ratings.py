@@ -0,0 +1,135 @@
+"""
+Tests for cat ratings.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Sum
+from django.test import TestCase
+
+from core.models import Cat, CatRating, RatingBucket, Tournament
+
+from cat.ratings import K_FACTOR, RatingLedger
+from cat.tournaments import TournamentRunner
+
+
+def create_user(email='user@example.com'):
+    """Create and return a user."""
+    return get_user_model().objects.create_user(
+        email=email, password='pass123'
+    )
+
+
+def create_cats(user, count):
+    """Create and return cats of a user."""
+    return Cat.objects.bulk_create([
+        Cat(user=user, name=f'Cat {i}', weight=2 + i % 5)
+        for i in range(count)
+    ])
+
+
+class RatingLedgerTests(TestCase):
+    """Test recording matches in a ledger."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.cats = create_cats(self.user, 3)
+
+    def test_record_and_save(self):
+        """Test ratings move by the Elo update and are stored."""
+        ledger = RatingLedger.load(Cat.objects.all())
+        a, b = ledger.positions([self.cats[0].id, self.cats[1].id])
+
+        ledger.record([a], [b], [1])
+        ledger.save()
+
+        winner = CatRating.objects.get(cat=self.cats[0])
+        loser = CatRating.objects.get(cat=self.cats[1])
+        self.assertAlmostEqual(winner.rating, CatRating.INITIAL + K_FACTOR / 2)
+        self.assertAlmostEqual(loser.rating, CatRating.INITIAL - K_FACTOR / 2)
+        self.assertEqual((winner.matches, loser.matches), (1, 1))
+        self.assertEqual(winner.user, self.user)
+        self.assertFalse(CatRating.objects.filter(cat=self.cats[2]).exists())
+
+    def test_draw_between_equals(self):
+        """Test a draw between equal ratings leaves them unchanged."""
+        ledger = RatingLedger.load(Cat.objects.all())
+        a, b = ledger.positions([self.cats[0].id, self.cats[1].id])
+
+        ledger.record([a], [b], [0])
+
+        self.assertEqual(ledger.ratings[a], CatRating.INITIAL)
+        self.assertEqual(ledger.ratings[b], CatRating.INITIAL)
+
+    def test_save_shifts_buckets(self):
+        """Test stored ratings move between buckets as they change."""
+        ledger = RatingLedger.load(Cat.objects.all())
+        a, b = ledger.positions([self.cats[0].id, self.cats[1].id])
+        for _ in range(3):
+            ledger.record([a], [b], [1])
+            ledger.save()
+
+        ledger = RatingLedger.load(Cat.objects.all())
+        ledger.record([a], [b], [1])
+        ledger.save()
+
+        counts = dict(RatingBucket.objects.filter(
+            count__gt=0
+        ).values_list('bucket', 'count'))
+        expected = {}
+        for rating in CatRating.objects.values_list('rating', flat=True):
+            bucket = CatRating.bucket(rating)
+            expected[bucket] = expected.get(bucket, 0) + 1
+        self.assertEqual(counts, expected)
+
+
+class LeaderboardRankTests(TestCase):
+    """Test ranking cats from the rating buckets."""
+
+    def setUp(self):
+        self.user = create_user()
+        create_cats(create_user('other@example.com'), 4)
+        create_cats(self.user, 16)
+        TournamentRunner(Tournament(
+            user=self.user, name='Cup', format=Tournament.ROUND_ROBIN,
+            seed=3,
+        )).run(Cat.objects.filter(user=self.user))
+
+    def test_tournament_rates_cats(self):
+        """Test every cat of a tournament is rated once it is played."""
+        self.assertEqual(CatRating.objects.count(), 16)
+        self.assertEqual(
+            RatingBucket.objects.aggregate(total=Sum('count'))['total'], 16
+        )
+        self.assertEqual(
+            set(CatRating.objects.values_list('matches', flat=True)), {15}
+        )
+
+    def test_rank_matches_ordering(self):
+        """Test ranks match the position in the leaderboard ordering."""
+        ordered = list(CatRating.objects.top(self.user, 100))
+
+        for position, rating in enumerate(ordered, 1):
+            self.assertEqual(CatRating.objects.rank(rating), position)
+            before, after = CatRating.objects.neighbours(rating, 2)
+            self.assertEqual(
+                before, ordered[max(position - 3, 0):position - 1]
+            )
+            self.assertEqual(after, ordered[position:position + 2])
+
+    def test_rank_with_tied_ratings(self):
+        """Test tied ratings are ranked by cat id."""
+        CatRating.objects.update(rating=CatRating.INITIAL)
+        RatingBucket.objects.rebuild()
+        ratings = CatRating.objects.order_by('cat_id')
+
+        self.assertEqual(
+            [CatRating.objects.rank(rating) for rating in ratings],
+            list(range(1, 17)),
+        )
+
+    def test_deleted_cat_leaves_buckets(self):
+        """Test deleting a rated cat removes it from the buckets."""
+        Cat.objects.filter(user=self.user).first().delete()
+
+        self.assertEqual(
+            RatingBucket.objects.aggregate(total=Sum('count'))['total'], 15
+        )
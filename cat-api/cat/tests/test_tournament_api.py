@@ -0,0 +1,113 @@
+"""
+Tests for tournament API.
+"""
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Cat, Tournament
+
+from cat.tournaments import TournamentRunner
+
+
+TOURNAMENTS_URL = reverse('cat:tournament-list')
+
+
+def detail_url(tournament_id):
+    """Create and return a tournament detail URL."""
+    return reverse('cat:tournament-detail', args=[tournament_id])
+
+
+def matches_url(tournament_id):
+    """Create and return a tournament matches URL."""
+    return reverse('cat:tournament-matches', args=[tournament_id])
+
+
+def create_tournament(user, cats=4):
+    """Create, run and return a single elimination tournament."""
+    Cat.objects.bulk_create([
+        Cat(user=user, name=f'Cat {i}', weight=3 + i) for i in range(cats)
+    ])
+    tournament = Tournament(
+        user=user,
+        name='Cup',
+        format=Tournament.SINGLE_ELIMINATION,
+        seed=1,
+    )
+    return TournamentRunner(tournament).run(Cat.objects.filter(user=user))
+
+
+class PublicTournamentApiTests(TestCase):
+    """Test unauthenticated API requests."""
+
+    def test_auth_required(self):
+        """Test auth is required to list tournaments."""
+        res = APIClient().get(TOURNAMENTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateTournamentApiTests(TestCase):
+    """Test authenticated API requests."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_tournaments_limited_to_user(self):
+        """Test only the tournaments of the user are listed."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='test123'
+        )
+        create_tournament(other)
+        tournament = create_tournament(self.user)
+
+        res = self.client.get(TOURNAMENTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], [tournament.id]
+        )
+        item = res.data['results'][0]
+        self.assertEqual(item['winner'], tournament.winner_id)
+        self.assertNotIn('standings', item)
+
+    def test_retrieve_standings(self):
+        """Test the detail lists the standings by rank."""
+        tournament = create_tournament(self.user)
+
+        res = self.client.get(detail_url(tournament.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ranks = [entry['rank'] for entry in res.data['standings']]
+        self.assertEqual(ranks, [1, 2, 3, 4])
+        self.assertEqual(
+            res.data['standings'][0]['cat'], tournament.winner_id
+        )
+
+    def test_list_round_matches(self):
+        """Test the matches of a round are listed."""
+        tournament = create_tournament(self.user)
+
+        first = self.client.get(matches_url(tournament.id))
+        final = self.client.get(matches_url(tournament.id), {'round': 2})
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(first.data['results']), 2)
+        self.assertEqual(len(final.data['results']), 1)
+        self.assertEqual(final.data['results'][0]['round'], 2)
+
+    def test_tournament_read_only(self):
+        """Test tournaments cannot be written through the API."""
+        tournament = create_tournament(self.user)
+
+        res = self.client.delete(detail_url(tournament.id))
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertTrue(Tournament.objects.filter(pk=tournament.id).exists())
@@ -0,0 +1,183 @@
+"""
+Tests for tournaments.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from core.models import Cat, Tournament, TournamentEntry, TournamentMatch
+
+from cat.tournaments import (
+    BYE,
+    TournamentRunner,
+    elimination_bracket,
+    round_robin,
+)
+
+
+class ScheduleTests(SimpleTestCase):
+    """Test the pairings of the formats."""
+
+    def test_round_robin_pairs_everyone_once(self):
+        """Test every entry meets every other once, one match a round."""
+        for count in [2, 5, 8]:
+            pairs = set()
+            rounds = list(round_robin(count))
+            for a, b in rounds:
+                entries = [i for i in [*a, *b] if i != BYE]
+                self.assertEqual(len(entries), len(set(entries)))
+                pairs.update(
+                    frozenset(pair) for pair in zip(a.tolist(), b.tolist())
+                    if BYE not in pair
+                )
+
+            self.assertEqual(len(rounds), count - 1 + count % 2)
+            self.assertEqual(len(pairs), count * (count - 1) // 2)
+
+    def test_elimination_bracket(self):
+        """Test top seeds are spread and get the byes."""
+        self.assertEqual(
+            elimination_bracket(8).tolist(), [0, 7, 3, 4, 1, 6, 2, 5]
+        )
+        self.assertEqual(
+            elimination_bracket(6).tolist(),
+            [0, BYE, 3, 4, 1, BYE, 2, 5],
+        )
+
+
+class TournamentRunnerTests(TestCase):
+    """Test playing tournaments."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='pass123'
+        )
+        Cat.objects.bulk_create([
+            Cat(user=self.user, name=f'Cat {i}', weight=2 + i % 7)
+            for i in range(9)
+        ])
+
+    def run_tournament(self, tournament_format, **kwargs):
+        """Run and return a tournament between all cats."""
+        tournament = Tournament(
+            user=self.user, name='Cup', format=tournament_format, seed=42
+        )
+        return TournamentRunner(tournament, **kwargs).run(Cat.objects.all())
+
+    def results(self, tournament):
+        """Return the stored matches and standings of a tournament."""
+        return (
+            list(tournament.matches.order_by('id').values_list(
+                'round', 'cat', 'opponent', 'wins', 'losses', 'draws'
+            )),
+            list(tournament.entries.order_by('rank').values_list(
+                'cat', 'points', 'wins', 'losses', 'draws'
+            )),
+        )
+
+    def test_round_robin(self):
+        """Test every pair of cats fights once, with a bye a round."""
+        tournament = self.run_tournament(Tournament.ROUND_ROBIN)
+
+        self.assertEqual(tournament.rounds, 9)
+        self.assertEqual(tournament.matches.count(), 36 + 9)
+        self.assertEqual(
+            tournament.matches.filter(opponent__isnull=True).count(), 9
+        )
+        entries = tournament.entries.all()
+        self.assertEqual(len(entries), 9)
+        for entry in entries:
+            self.assertEqual(entry.wins + entry.losses + entry.draws, 8)
+        winner = tournament.entries.get(rank=1)
+        self.assertEqual(tournament.winner_id, winner.cat_id)
+        self.assertIsNotNone(tournament.finished_at)
+
+    def test_single_elimination(self):
+        """Test one cat is left unbeaten after the bracket."""
+        tournament = self.run_tournament(Tournament.SINGLE_ELIMINATION)
+
+        self.assertEqual(tournament.rounds, 4)
+        # Seven byes in the first round of a bracket of sixteen.
+        self.assertEqual(
+            tournament.matches.filter(opponent__isnull=True).count(), 7
+        )
+        self.assertEqual(tournament.matches.filter(round=4).count(), 1)
+        winner = tournament.entries.get(rank=1)
+        self.assertEqual(winner.losses, 0)
+        self.assertEqual(
+            TournamentEntry.objects.filter(
+                tournament=tournament, losses=0
+            ).count(),
+            1,
+        )
+
+    def test_swiss(self):
+        """Test Swiss rounds pair every cat but one bye per round."""
+        tournament = self.run_tournament(Tournament.SWISS)
+
+        self.assertEqual(tournament.rounds, 4)
+        for round_no in range(1, 5):
+            matches = tournament.matches.filter(round=round_no)
+            self.assertEqual(matches.count(), 5)
+            self.assertEqual(matches.filter(opponent__isnull=True).count(), 1)
+        byes = tournament.matches.filter(
+            opponent__isnull=True
+        ).values_list('cat', flat=True)
+        self.assertEqual(len(set(byes)), 4)
+
+    def test_results_do_not_depend_on_workers(self):
+        """Test the seed alone decides the results."""
+        with patch('cat.tournaments.MATCH_CHUNK', 2):
+            single = self.run_tournament(Tournament.ROUND_ROBIN)
+            pooled = self.run_tournament(Tournament.ROUND_ROBIN, workers=2)
+
+        self.assertEqual(self.results(single), self.results(pooled))
+
+    def test_rounds_committed_and_resumed(self):
+        """Test an interrupted tournament resumes from its stored rounds."""
+        rate = TournamentRunner._rate
+        calls = []
+
+        def fail_second_round(runner, results):
+            calls.append(results)
+            if len(calls) == 2:
+                raise RuntimeError('Interrupted.')
+            rate(runner, results)
+
+        formats = [
+            Tournament.ROUND_ROBIN,
+            Tournament.SWISS,
+            Tournament.SINGLE_ELIMINATION,
+        ]
+        for tournament_format in formats:
+            calls.clear()
+            with patch('cat.tournaments.GROUP_SIZE', 1):
+                played = self.run_tournament(tournament_format)
+                with patch.object(
+                    TournamentRunner, '_rate', fail_second_round
+                ), self.assertRaises(RuntimeError):
+                    self.run_tournament(tournament_format)
+                tournament = Tournament.objects.latest('id')
+
+                self.assertEqual(set(
+                    tournament.matches.values_list('round', flat=True)
+                ), {1})
+                self.assertIsNone(tournament.finished_at)
+
+                TournamentRunner(tournament).resume()
+
+            self.assertEqual(self.results(tournament), self.results(played))
+            self.assertEqual(tournament.rounds, played.rounds)
+            self.assertEqual(tournament.winner_id, played.winner_id)
+            with self.assertRaises(ValueError):
+                TournamentRunner(tournament).resume()
+
+    def test_needs_two_cats(self):
+        """Test a tournament of a single cat is refused."""
+        Cat.objects.exclude(name='Cat 0').delete()
+
+        with self.assertRaises(ValueError):
+            self.run_tournament(Tournament.ROUND_ROBIN)
+        self.assertFalse(Tournament.objects.exists())
+        self.assertFalse(TournamentMatch.objects.exists())
@@ -0,0 +1,395 @@
+"""
+Tournaments of cats simulated in a process pool.
+"""
+import math
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+
+import django
+import numpy as np
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import Cat, Tournament, TournamentEntry, TournamentMatch
+from cat.fights import pack_cats, simulate, strengths
+from cat.ratings import RatingLedger
+
+
+# Pairings simulated per task. Fixed, so that the random stream of each
+# match and so the results do not depend on the number of workers.
+MATCH_CHUNK = 4096
+# Round robin rounds do not depend on each other, they are simulated
+# together until a group holds this many pairings.
+GROUP_SIZE = 1 << 18
+# Entry index pairing an entry with nobody.
+BYE = -1
+
+
+def _play(task):
+    """Return the bout counts of a chunk of pairings."""
+    fighters, opponents, bouts, seed = task
+    return simulate(fighters, opponents, bouts, seed)
+
+
+def round_robin(count):
+    """Yield the pairings of each round of a round robin.
+
+    Pairings are two arrays of entry indexes, scheduled with the circle
+    method, BYE takes the place of the missing entry of an odd count.
+    """
+    order = np.arange(count + count % 2)
+    if count % 2:
+        order[-1] = BYE
+    half = len(order) // 2
+    for _ in range(len(order) - 1):
+        yield order[:half].copy(), order[:half - 1:-1].copy()
+        order[1:] = np.roll(order[1:], 1)
+
+
+def elimination_bracket(count):
+    """Return the entry indexes of a seeded bracket, BYE for empty slots.
+
+    Top seeds are spread so they meet last and the byes of a count that
+    is not a power of two go to them.
+    """
+    slots = [0]
+    size = 1 << max(count - 1, 0).bit_length()
+    while len(slots) < size:
+        slots = [
+            s for slot in slots for s in (slot, 2 * len(slots) - 1 - slot)
+        ]
+    bracket = np.array(slots)
+    bracket[bracket >= count] = BYE
+
+    return bracket
+
+
+class TournamentRunner:
+    """Play a tournament and store its matches and standings.
+
+    Entries are seeded from the strongest cat. Each round is split in
+    chunks of MATCH_CHUNK pairings simulated by a pool of worker
+    processes, chunk k of round r drawing from the random stream
+    SeedSequence(seed, spawn_key=(r, k)).
+
+    The rounds simulated together are stored in a transaction of their
+    own, with the standings so far and the ratings of the cats, which
+    are only locked for that update. A tournament left unfinished is
+    resumed from its last stored round.
+    """
+
+    def __init__(self, tournament, workers=1, batch_size=5000):
+        self.tournament = tournament
+        self.workers = workers
+        self.batch_size = batch_size
+
+    def run(self, cats, rounds=None):
+        """Play the tournament between the cats of a queryset.
+
+        rounds is the number of Swiss rounds, by default enough to rank
+        a single unbeaten cat.
+        """
+        ids, fighters = pack_cats(cats)
+        if len(ids) < 2:
+            raise ValueError('A tournament needs at least two cats.')
+
+        standing, ground, _ = strengths(fighters)
+        order = np.lexsort((ids, -(standing + ground)))
+        self.ids = ids[order].tolist()
+        self.fighters = fighters[order]
+        count = len(self.ids)
+        # Points, wins, losses and draws of each entry.
+        self.stats = np.zeros((4, count), np.int64)
+
+        tournament = self.tournament
+        if tournament.format == Tournament.ROUND_ROBIN:
+            tournament.rounds = count - 1 + count % 2
+        elif tournament.format == Tournament.SWISS:
+            tournament.rounds = rounds or math.ceil(math.log2(count))
+        else:
+            tournament.rounds = (count - 1).bit_length()
+        with transaction.atomic():
+            tournament.save()
+            self.entries = TournamentEntry.objects.bulk_create(
+                [
+                    TournamentEntry(
+                        tournament=tournament, cat_id=cat_id, seed=seed
+                    )
+                    for seed, cat_id in enumerate(self.ids, 1)
+                ],
+                self.batch_size,
+            )
+
+        return self._play_rounds(0)
+
+    def resume(self):
+        """Play the rounds of an unfinished tournament not stored yet."""
+        tournament = self.tournament
+        if tournament.finished_at is not None:
+            raise ValueError(f'Tournament {tournament.pk} is finished.')
+
+        self.entries = list(tournament.entries.order_by('seed'))
+        self.ids = [entry.cat_id for entry in self.entries]
+        ids, fighters = pack_cats(Cat.objects.filter(pk__in=self.ids))
+        self.fighters = fighters[np.searchsorted(ids, self.ids)]
+        self.stats = np.array([
+            [entry.points, entry.wins, entry.losses, entry.draws]
+            for entry in self.entries
+        ], np.int64).T.copy()
+        played = tournament.matches.aggregate(played=Max('round'))['played']
+
+        return self._play_rounds(played or 0)
+
+    def _play_rounds(self, played):
+        """Play the rounds after the played ones and rank the entries."""
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(self.workers, initializer=django.setup)
+            self.map = pool.map
+        else:
+            pool = nullcontext()
+            self.map = map
+        count = len(self.ids)
+        with pool:
+            if self.tournament.format == Tournament.ROUND_ROBIN:
+                self._round_robin(count, played)
+            elif self.tournament.format == Tournament.SWISS:
+                self._swiss(count, played)
+            else:
+                self._single_elimination(count, played)
+        self._finish()
+
+        return self.tournament
+
+    def _round_robin(self, count, played):
+        """Play every entry against every other."""
+        group, size = [], 0
+        rounds = islice(enumerate(round_robin(count), 1), played, None)
+        for round_no, (a, b) in rounds:
+            group.append((round_no, a, b))
+            size += len(a)
+            if size >= GROUP_SIZE:
+                self._play(group)
+                group, size = [], 0
+        if group:
+            self._play(group)
+
+    def _swiss(self, count, played):
+        """Pair entries of close points for the rounds."""
+        met = set()
+        had_bye = np.zeros(count, bool)
+        seeds = {cat_id: i for i, cat_id in enumerate(self.ids)}
+        for cat_id, opponent_id in self.tournament.matches.values_list(
+            'cat_id', 'opponent_id'
+        ):
+            if opponent_id is None:
+                had_bye[seeds[cat_id]] = True
+            else:
+                met.update([
+                    (seeds[cat_id], seeds[opponent_id]),
+                    (seeds[opponent_id], seeds[cat_id]),
+                ])
+
+        for round_no in range(played + 1, self.tournament.rounds + 1):
+            ranking = self._ranking().tolist()
+            a, b = [], []
+            if count % 2:
+                lowest = next(
+                    i for i in reversed(ranking) if not had_bye[i]
+                )
+                had_bye[lowest] = True
+                ranking.remove(lowest)
+                a.append(lowest)
+                b.append(BYE)
+
+            while ranking:
+                first = ranking.pop(0)
+                # The closest entry not met yet, else a rematch.
+                second = next(
+                    (i for i in ranking if (first, i) not in met), ranking[0]
+                )
+                ranking.remove(second)
+                met.update([(first, second), (second, first)])
+                a.append(first)
+                b.append(second)
+            self._play([(round_no, np.array(a), np.array(b))])
+
+    def _single_elimination(self, count, played):
+        """Play the bracket until one entry is left.
+
+        A drawn match goes to the higher seed.
+        """
+        bracket = elimination_bracket(count)
+        round_no = 0
+        while len(bracket) > 1:
+            round_no += 1
+            a, b = bracket[0::2], bracket[1::2]
+            if round_no <= played:
+                outcome = self._stored_outcome(round_no, a, b)
+            else:
+                outcome, = self._play([(round_no, a, b)], decisive=True)
+            bracket = np.where(outcome > 0, a, b)
+
+    def _stored_outcome(self, round_no, a, b):
+        """Return the decisive outcome of a stored elimination round."""
+        seeds = {cat_id: i for i, cat_id in enumerate(self.ids)}
+        won = {
+            seeds[cat_id]: wins > losses or (
+                wins == losses and seeds[cat_id] < seeds[opponent_id]
+            )
+            for cat_id, opponent_id, wins, losses in
+            self.tournament.matches.filter(
+                round=round_no, opponent__isnull=False
+            ).values_list('cat_id', 'opponent_id', 'wins', 'losses')
+        }
+        outcome = np.where(b == BYE, 1, -1)
+        played = (a != BYE) & (b != BYE)
+        outcome[played] = [
+            1 if won[i] else -1 for i in a[played].tolist()
+        ]
+
+        return outcome
+
+    def _play(self, rounds, decisive=False):
+        """Simulate and store rounds of (round_no, a, b) pairings.
+
+        Returns per round the outcome of each pairing for a: 1 for a
+        win or bye, -1 for a loss and 0 for a draw.
+        """
+        tournament = self.tournament
+        tasks, pairings = [], []
+        for round_no, a, b in rounds:
+            played = (a != BYE) & (b != BYE)
+            a_played, b_played = a[played], b[played]
+            pairings.append((a_played, b_played))
+            starts = range(0, len(a_played), MATCH_CHUNK)
+            for chunk, start in enumerate(starts):
+                stop = start + MATCH_CHUNK
+                tasks.append((
+                    self.fighters[a_played[start:stop]],
+                    self.fighters[b_played[start:stop]],
+                    tournament.bouts,
+                    np.random.SeedSequence(
+                        tournament.seed, spawn_key=(round_no, chunk)
+                    ),
+                ))
+        counts = np.concatenate([
+            np.zeros((0, 3), np.int64), *self.map(_play, tasks)
+        ])
+
+        outcomes, results, done = [], [], 0
+        with transaction.atomic():
+            matches = []
+            for (round_no, a, b), (a_played, b_played) in zip(
+                rounds, pairings
+            ):
+                round_counts = counts[done:done + len(a_played)]
+                done += len(a_played)
+                outcome = np.sign(round_counts[:, 0] - round_counts[:, 1])
+                results.append((a_played, b_played, outcome))
+                if decisive:
+                    outcome = outcome.copy()
+                    outcome[outcome == 0] = np.where(
+                        a_played < b_played, 1, -1
+                    )[outcome == 0]
+                self._count(a_played, b_played, outcome)
+
+                matches.extend(
+                    TournamentMatch(
+                        tournament=tournament,
+                        round=round_no,
+                        cat_id=self.ids[cat],
+                        opponent_id=self.ids[opponent],
+                        wins=wins,
+                        losses=losses,
+                        draws=draws,
+                    )
+                    for cat, opponent, (wins, losses, draws) in zip(
+                        a_played.tolist(), b_played.tolist(),
+                        round_counts.tolist(),
+                    )
+                )
+                byes = np.maximum(a, b)[(a == BYE) | (b == BYE)]
+                np.add.at(self.stats[0], byes, 2)
+                matches.extend(
+                    TournamentMatch(
+                        tournament=tournament,
+                        round=round_no,
+                        cat_id=self.ids[i],
+                    )
+                    for i in byes.tolist()
+                )
+
+                full = np.where(b == BYE, 1, -1)
+                full[(a != BYE) & (b != BYE)] = outcome
+                outcomes.append(full)
+                if len(matches) >= self.batch_size:
+                    TournamentMatch.objects.bulk_create(
+                        matches, self.batch_size
+                    )
+                    matches = []
+            TournamentMatch.objects.bulk_create(matches, self.batch_size)
+            self._store_stats()
+            self._rate(results)
+
+        return outcomes
+
+    def _rate(self, results):
+        """Update the ratings of the cats after rounds of matches.
+
+        Ratings are read locked, as other tournaments may rate the same
+        cats meanwhile, and written in the transaction of the rounds.
+        """
+        ledger = RatingLedger.load(Cat.objects.filter(
+            pk__in=self.ids
+        ).select_for_update(of=('self',)))
+        slots = ledger.positions(self.ids)
+        for a, b, outcome in results:
+            ledger.record(slots[a], slots[b], outcome)
+        ledger.save(self.batch_size)
+
+    def _store_stats(self, *fields):
+        """Store the points and results of the entries so far."""
+        for entry, (points, wins, losses, draws) in zip(
+            self.entries, self.stats.T.tolist()
+        ):
+            entry.points = points
+            entry.wins = wins
+            entry.losses = losses
+            entry.draws = draws
+        TournamentEntry.objects.bulk_update(
+            self.entries,
+            ['points', 'wins', 'losses', 'draws', *fields],
+            batch_size=self.batch_size,
+        )
+
+    def _count(self, a, b, outcome):
+        """Add the points and results of played matches to the stats."""
+        points, wins, losses, draws = self.stats
+        won, lost, drawn = outcome > 0, outcome < 0, outcome == 0
+        np.add.at(points, a, 2 * won + drawn)
+        np.add.at(points, b, 2 * lost + drawn)
+        np.add.at(wins, a, won)
+        np.add.at(wins, b, lost)
+        np.add.at(losses, a, lost)
+        np.add.at(losses, b, won)
+        np.add.at(draws, a, drawn)
+        np.add.at(draws, b, drawn)
+
+    def _ranking(self):
+        """Return the entries ordered by points, then seed."""
+        return np.lexsort((np.arange(len(self.ids)), -self.stats[0]))
+
+    def _finish(self):
+        """Store the standings, ranked by points then seed."""
+        ranking = self._ranking()
+        for rank, i in enumerate(ranking.tolist(), 1):
+            self.entries[i].rank = rank
+
+        with transaction.atomic():
+            self._store_stats('rank')
+            self.tournament.winner_id = self.ids[ranking[0]]
+            self.tournament.finished_at = timezone.now()
+            self.tournament.save()
@@ -15,6 +15,13 @@ router = DefaultRouter()
 router.register('cats', views.CatViewSet)
 router.register('abilities', views.AbilityViewSet)
 router.register('fighting_styles', views.FightingStylesViewSet)
+router.register('tournaments', views.TournamentViewSet)
+router.register(
+    'leaderboard', views.LeaderboardViewSet, basename='leaderboard'
+)
+router.register(
+    'matchmaking', views.MatchTicketViewSet, basename='matchmaking'
+)
 
 app_name = 'cat'
 
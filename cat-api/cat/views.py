@@ -7,14 +7,62 @@ from drf_spectacular.utils import (
     OpenApiParameter,
     OpenApiTypes
 )
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Prefetch
+from django.http import StreamingHttpResponse
+
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import Ability, Cat, FightingStyles
+from core.models import (
+    Ability,
+    Cat,
+    CatRating,
+    FightingStyles,
+    MatchTicket,
+    ResourceVersion,
+    Tournament,
+    TournamentEntry,
+)
+from user.authentication import CachedTokenAuthentication
 from cat import serializers
+from cat.bulk import CatBulkWriter
+from cat.caching import ResponseCacheMixin
+from cat.catalog import fighting_styles_catalog
+from cat.conditional import ConditionalGetMixin
+from cat.documents import (
+    CatDocumentSerializer,
+    CatListDocumentSerializer,
+    cat_documents,
+)
+from cat.export import STREAMS, CSVRenderer, NDJSONRenderer, cat_rows
+from cat.fast_serializers import FastReadSerializer
+from cat.fights import fight_odds
+from cat.filters import MATCH_ANY, MATCH_MODES, filter_by_related
+from cat.images import schedule_image_processing
+from cat.matchmaking import enqueue, matchmaker, weight_class
+from cat.pagination import (
+    AbilityCursorPagination,
+    CatCursorPagination,
+    MatchTicketCursorPagination,
+    TournamentCursorPagination,
+    TournamentMatchCursorPagination,
+)
+from cat.search import (
+    facet_counts,
+    is_filtered,
+    search_cats,
+    stored_facet_counts,
+)
+
+
+ability_reader = FastReadSerializer(serializers.AbilitySerializer)
+fighting_styles_reader = FastReadSerializer(
+    serializers.FightingStylesSerializer
+)
 
 
 @extend_schema_view(
@@ -29,16 +77,49 @@ from cat import serializers
                 'fighting_styles',
                 OpenApiTypes.STR,
                 description='Comma separated list of fighting styles to filter'
-            )
-        ]
-    )
+            ),
+            OpenApiParameter(
+                'match',
+                OpenApiTypes.STR, enum=MATCH_MODES,
+                description='Match cats with any (default) or all of the '
+                            'listed abilities and fighting styles.'
+            ),
+        ],
+        responses=serializers.CatSerializer(many=True),
+    ),
+    retrieve=extend_schema(responses=serializers.CatDetailSerializer),
 )
-class CatViewSet(viewsets.ModelViewSet):
+class CatViewSet(ConditionalGetMixin,
+                 ResponseCacheMixin,
+                 viewsets.ModelViewSet):
     """View for cat APIs."""
     serializer_class = serializers.CatDetailSerializer
     queryset = Cat.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = CatCursorPagination
+    bulk_max_items = 10000
+    export_chunk_size = 1000
+    cached_actions = ('list', 'retrieve', 'search')
+    conditional_actions = ('list', 'retrieve', 'search')
+
+    # Fields and relations loaded per action. Reads render the stored
+    # documents, updates are left out on purpose as UpdateModelMixin
+    # drops the prefetch cache before rendering.
+    query_plans = {
+        'list': {
+            'only': ['id', 'document'],
+        },
+        'retrieve': {
+            'only': ['id', 'document'],
+        },
+        'search': {
+            'only': ['id', 'document'],
+        },
+        'simulate': {
+            'only': ['id'],
+        },
+    }
 
     def _params_to_ints(self, qs):
         """Convert a list of strings to integers."""
@@ -48,39 +129,237 @@ class CatViewSet(viewsets.ModelViewSet):
         """Retrieve cats for authenticated user."""
         abilities = self.request.query_params.get('abilities')
         fighting_styles = self.request.query_params.get('fighting_styles')
+        match = self.request.query_params.get('match', MATCH_ANY)
+        if match not in MATCH_MODES:
+            raise ValidationError({'match': f'Must be one of {MATCH_MODES}.'})
+
         queryset = self.queryset
         if abilities:
             abilities_ids = self._params_to_ints(abilities)
-            queryset = queryset.filter(abilities__id__in=abilities_ids)
+            queryset = filter_by_related(
+                queryset, 'abilities', abilities_ids, match
+            )
         if fighting_styles:
             fighting_styles_ids = self._params_to_ints(fighting_styles)
-            queryset = queryset.filter(fighting_styles__id__in=fighting_styles_ids)
+            queryset = filter_by_related(
+                queryset, 'fighting_styles', fighting_styles_ids, match
+            )
 
-        return queryset.filter(
+        queryset = queryset.filter(
             user=self.request.user
-        ).order_by('-id').distinct()
+        ).order_by('-id')
+
+        return self._apply_query_plan(queryset)
+
+    def _apply_query_plan(self, queryset):
+        """Load the relations rendered by the serializer of the action."""
+        plan = self.query_plans.get(self.action, {})
+        if plan.get('only'):
+            queryset = queryset.only(*plan['only'])
+        if plan.get('select_related'):
+            queryset = queryset.select_related(*plan['select_related'])
+        if plan.get('prefetch_related'):
+            queryset = queryset.prefetch_related(*plan['prefetch_related'])
+
+        return queryset
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
-        if self.action == 'list':
-            return serializers.CatSerializer
+        if self.action in ('list', 'search'):
+            return CatListDocumentSerializer
+        elif self.action == 'retrieve':
+            return CatDocumentSerializer
         elif self.action == 'upload_image':
             return serializers.CatImageSerializer
+        elif self.action == 'bulk' and self.request.method == 'POST':
+            return serializers.CatCreateSerializer
 
         return serializers.CatDetailSerializer
 
     def perform_create(self, serializer):
         """Create a new cat object."""
-        serializer.save(user=self.request.user)
+        with transaction.atomic(), cat_documents.deferred():
+            serializer.save(user=self.request.user)
+
+    def perform_update(self, serializer):
+        """Update a cat object, building its document once."""
+        with transaction.atomic(), cat_documents.deferred():
+            serializer.save()
+
+    @extend_schema(request=serializers.CatDetailSerializer(many=True))
+    @action(methods=['POST', 'PATCH'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        """Create (POST) or partially update (PATCH) a list of cats."""
+        if not isinstance(request.data, list):
+            return Response(
+                {'detail': 'Expected a list of cats.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(request.data) > self.bulk_max_items:
+            return Response(
+                {'detail': f'At most {self.bulk_max_items} cats per request.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        partial = request.method == 'PATCH'
+        if partial:
+            ids = [
+                item.get('id') for item in request.data
+                if isinstance(item, dict) and isinstance(item.get('id'), int)
+            ]
+            instances = self.get_queryset().in_bulk(ids)
+
+        # A single serializer validates every item, as ListSerializer
+        # does, so the fields are only built once.
+        serializer = self.get_serializer(partial=partial)
+        valid, errors, seen = [], [], set()
+        for index, item in enumerate(request.data):
+            if partial:
+                serializer.instance = None
+                if isinstance(item, dict):
+                    serializer.instance = instances.get(item.get('id'))
+                if serializer.instance is None:
+                    errors.append({'index': index, 'errors': {
+                        'id': ['Cat not found.'],
+                    }})
+                    continue
+                if serializer.instance.pk in seen:
+                    errors.append({'index': index, 'errors': {
+                        'id': ['Cat listed more than once.'],
+                    }})
+                    continue
+                seen.add(serializer.instance.pk)
+
+            try:
+                validated_data = serializer.run_validation(item)
+            except ValidationError as exc:
+                errors.append({'index': index, 'errors': exc.detail})
+                continue
+            valid.append((index, serializer.instance, validated_data))
+
+        if not valid:
+            return Response(
+                {'results': [], 'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        writer = CatBulkWriter(request.user)
+        items = [validated_data for _, _, validated_data in valid]
+        if partial:
+            cats = writer.update([cat for _, cat, _ in valid], items)
+            response_status = status.HTTP_200_OK
+        else:
+            cats = writer.create(items)
+            response_status = status.HTTP_201_CREATED
+
+        results = [
+            {'index': index, 'id': cat.id}
+            for (index, _, _), cat in zip(valid, cats)
+        ]
+        return Response(
+            {'results': results, 'errors': errors},
+            status=response_status,
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'format',
+                OpenApiTypes.STR, enum=list(STREAMS),
+                description='Export format, NDJSON by default.'
+            ),
+        ]
+    )
+    @action(
+        methods=['GET'],
+        detail=False,
+        url_path='export',
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request):
+        """Stream every cat of the user as NDJSON or CSV."""
+        renderer = request.accepted_renderer
+        rows = cat_rows(self.get_queryset(), self.export_chunk_size)
+        response = StreamingHttpResponse(
+            STREAMS[renderer.format](rows),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="cats.{renderer.format}"'
+        )
+
+        return response
+
+    @extend_schema(
+        parameters=[serializers.CatSearchSerializer],
+        responses=serializers.CatSearchResultSerializer,
+    )
+    @action(methods=['GET'], detail=False, url_path='search')
+    def search(self, request):
+        """Search the cats of the user, with the counts of each facet."""
+        return self._cached(self._search, request)
+
+    def _search(self, request):
+        """Return a page of the matching cats and their facet counts."""
+        query = serializers.CatSearchSerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        filters = query.validated_data
+        cats = search_cats(self.queryset.filter(user=request.user), filters)
+        page = self.paginate_queryset(
+            self._apply_query_plan(cats.order_by('-id'))
+        )
+        response = self.get_paginated_response(
+            self.get_serializer(page, many=True).data
+        )
+        # Counts of every cat are kept up to date, only narrowed searches
+        # group the matching cats.
+        response.data['facets'] = (
+            facet_counts(cats) if is_filtered(filters)
+            else stored_facet_counts(request.user)
+        )
+
+        return response
+
+    @extend_schema(
+        parameters=[serializers.FightSimulationSerializer],
+        responses=serializers.FightSimulationResultSerializer,
+    )
+    @action(methods=['GET'], detail=True, url_path='simulate')
+    def simulate(self, request, pk=None):
+        """Simulate bouts of the cat against each opponent."""
+        cat = self.get_object()
+        query = serializers.FightSimulationSerializer(
+            data=request.query_params
+        )
+        query.is_valid(raise_exception=True)
+        bouts = query.validated_data['bouts']
+        try:
+            results = fight_odds(
+                Cat.objects.filter(user=request.user),
+                cat.id,
+                query.validated_data['opponents'],
+                bouts,
+                query.validated_data.get('seed'),
+            )
+        except Cat.DoesNotExist as exc:
+            raise ValidationError({'opponents': [str(exc)]})
+
+        return Response({'cat': cat.id, 'bouts': bouts, 'results': results})
 
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
+        """Upload an image to a cat and process it in the background."""
         cat = self.get_object()
         serializer = self.get_serializer(cat, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            # The stored file is referenced before the upload is committed.
+            with transaction.atomic():
+                serializer.save(
+                    image_status=Cat.IMAGE_PENDING, image_variants={}
+                )
+                schedule_image_processing(cat)
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -96,15 +375,17 @@ class CatViewSet(viewsets.ModelViewSet):
         ]
     )
 )
-class AbilityViewSet(mixins.UpdateModelMixin,
+class AbilityViewSet(ConditionalGetMixin,
+                     mixins.UpdateModelMixin,
                      mixins.ListModelMixin,
                      mixins.DestroyModelMixin,
                      viewsets.GenericViewSet):
     """Manage abilities in the database."""
     serializer_class = serializers.AbilitySerializer
     queryset = Ability.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = AbilityCursorPagination
 
     def get_queryset(self):
         """Filter queryset to authenticated user."""
@@ -113,11 +394,26 @@ class AbilityViewSet(mixins.UpdateModelMixin,
         )
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(cat__isnull=False)
+            queryset = queryset.filter(Exists(
+                Cat.abilities.through.objects.filter(
+                    ability_id=OuterRef('pk')
+                )
+            ))
 
         return queryset.filter(
             user=self.request.user
-        ).order_by('-name').distinct()
+        ).order_by('-name')
+
+    def list(self, request, *args, **kwargs):
+        """List abilities from plain rows."""
+        queryset = ability_reader.values(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(ability_reader.serialize(page))
+
+        return Response(ability_reader.serialize(queryset))
 
 
 @extend_schema_view(
@@ -131,7 +427,8 @@ class AbilityViewSet(mixins.UpdateModelMixin,
         ]
     )
 )
-class FightingStylesViewSet(mixins.UpdateModelMixin,
+class FightingStylesViewSet(ConditionalGetMixin,
+                            mixins.UpdateModelMixin,
                             mixins.ListModelMixin,
                             mixins.DestroyModelMixin,
                             viewsets.GenericViewSet):
@@ -139,6 +436,23 @@ class FightingStylesViewSet(mixins.UpdateModelMixin,
     serializer_class = serializers.FightingStylesSerializer
     queryset = FightingStyles.objects.all()
 
+    def get_version_scopes(self):
+        """Fighting styles are shared by every user."""
+        scopes = [ResourceVersion.FIGHTING_STYLES]
+        if int(self.request.query_params.get('assigned_only', 0)):
+            scopes.append(ResourceVersion.ASSIGNED_FIGHTING_STYLES)
+
+        return scopes
+
+    def get_version_stamps(self):
+        """Stamp the unfiltered list with the catalog, without a query."""
+        if self.action == 'list' and not int(
+            self.request.query_params.get('assigned_only', 0)
+        ):
+            return [('catalog', fighting_styles_catalog.rows(), None)]
+
+        return super().get_version_stamps()
+
     def get_queryset(self):
         """Filter queryset to authenticated user."""
         assigned_only = bool(
@@ -146,8 +460,165 @@ class FightingStylesViewSet(mixins.UpdateModelMixin,
         )
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(cat__isnull=False)
+            queryset = queryset.filter(cat_count__gt=0)
+
+        return queryset.order_by('-name')
+
+    def list(self, request, *args, **kwargs):
+        """List fighting styles, from the cached catalog when unfiltered."""
+        if not int(request.query_params.get('assigned_only', 0)):
+            return Response(fighting_styles_catalog.rows())
+
+        return Response(fighting_styles_reader.many(
+            self.filter_queryset(self.get_queryset())
+        ))
+
+
+class TournamentViewSet(viewsets.ReadOnlyModelViewSet):
+    """View simulated tournaments, run with the run_tournament command."""
+    serializer_class = serializers.TournamentDetailSerializer
+    queryset = Tournament.objects.all()
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    pagination_class = TournamentCursorPagination
+
+    def get_queryset(self):
+        """Retrieve tournaments for authenticated user."""
+        queryset = self.queryset.filter(
+            user=self.request.user
+        ).order_by('-id')
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(Prefetch(
+                'entries', TournamentEntry.objects.order_by('rank')
+            ))
+
+        return queryset
+
+    def get_serializer_class(self):
+        """Return the serializer class for request."""
+        if self.action == 'list':
+            return serializers.TournamentSerializer
+        elif self.action == 'matches':
+            return serializers.TournamentMatchSerializer
+
+        return self.serializer_class
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'round',
+                OpenApiTypes.INT,
+                description='Round of the matches, the first by default.'
+            ),
+        ]
+    )
+    @action(
+        methods=['GET'],
+        detail=True,
+        url_path='matches',
+        pagination_class=TournamentMatchCursorPagination,
+    )
+    def matches(self, request, pk=None):
+        """List the matches of a tournament round."""
+        tournament = self.get_object()
+        try:
+            round_no = int(request.query_params.get('round', 1))
+        except ValueError:
+            raise ValidationError({'round': 'Must be an integer.'})
+
+        page = self.paginate_queryset(
+            tournament.matches.filter(round=round_no)
+        )
+        serializer = self.get_serializer(page, many=True)
+
+        return self.get_paginated_response(serializer.data)
+
+
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[serializers.LeaderboardQuerySerializer],
+        responses=serializers.LeaderboardEntrySerializer(many=True),
+    )
+)
+class LeaderboardViewSet(viewsets.GenericViewSet):
+    """Rank the cats of the user by rating."""
+    serializer_class = serializers.LeaderboardEntrySerializer
+    queryset = CatRating.objects.all()
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        """List the top ratings, or the ratings around a cat."""
+        query = serializers.LeaderboardQuerySerializer(
+            data=request.query_params
+        )
+        query.is_valid(raise_exception=True)
+        cat_id = query.validated_data.get('cat')
+        if cat_id is None:
+            ratings = list(CatRating.objects.top(
+                request.user, query.validated_data['limit']
+            ))
+            first_rank = 1
+        else:
+            try:
+                rating = self.get_queryset().get(
+                    user=request.user, cat_id=cat_id
+                )
+            except CatRating.DoesNotExist:
+                raise ValidationError({'cat': ['Cat has no rating.']})
+            before, after = CatRating.objects.neighbours(
+                rating, query.validated_data['around']
+            )
+            ratings = [*before, rating, *after]
+            first_rank = CatRating.objects.rank(rating) - len(before)
+
+        for rank, rating in enumerate(ratings, first_rank):
+            rating.rank = rank
+
+        return Response(self.get_serializer(ratings, many=True).data)
 
-        return (queryset
-                .order_by('-name').distinct())
 
+class MatchTicketViewSet(mixins.CreateModelMixin,
+                         mixins.RetrieveModelMixin,
+                         mixins.ListModelMixin,
+                         mixins.DestroyModelMixin,
+                         viewsets.GenericViewSet):
+    """Queue cats for matchmaking and follow their tickets."""
+    serializer_class = serializers.MatchTicketSerializer
+    queryset = MatchTicket.objects.all()
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    pagination_class = MatchTicketCursorPagination
+
+    def get_queryset(self):
+        """Retrieve tickets for authenticated user."""
+        return self.queryset.filter(user=self.request.user).order_by('-id')
+
+    def perform_create(self, serializer):
+        """Queue the cat with its rating and weight class."""
+        cat = serializer.validated_data['cat']
+        rating = CatRating.objects.filter(cat=cat).values_list(
+            'rating', flat=True
+        ).first()
+        with transaction.atomic():
+            try:
+                ticket = serializer.save(
+                    user=self.request.user,
+                    rating=CatRating.INITIAL if rating is None else rating,
+                    weight_class=weight_class(cat.weight),
+                )
+            except IntegrityError:
+                # Queued by a concurrent request since it was validated.
+                raise ValidationError({'cat': ['Cat is already queued.']})
+            if enqueue(ticket):
+                ticket.refresh_from_db()
+
+    def perform_destroy(self, instance):
+        """Cancel a waiting ticket."""
+        if not MatchTicket.objects.filter(
+            pk=instance.pk, status=MatchTicket.WAITING
+        ).update(status=MatchTicket.CANCELLED):
+            raise ValidationError(
+                {'status': ['Only waiting tickets can be cancelled.']}
+            )
+        matchmaker.cancel(instance.pk)
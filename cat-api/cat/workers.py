@@ -0,0 +1,44 @@
+"""
+Local thread pools running work in the background.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+class WorkerPool:
+    """Local thread pool sized by a setting.
+
+    The setting gives the number of threads, with no workers the work is
+    run in the caller.
+    """
+
+    def __init__(self, setting, thread_name_prefix):
+        self.setting = setting
+        self.thread_name_prefix = thread_name_prefix
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _run(self, func, *args):
+        """Run func in a worker with a usable database connection."""
+        close_old_connections()
+        try:
+            func(*args)
+        finally:
+            close_old_connections()
+
+    def submit(self, func, *args):
+        """Run func in the background."""
+        workers = getattr(settings, self.setting)
+        if not workers:
+            return func(*args)
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=workers,
+                    thread_name_prefix=self.thread_name_prefix,
+                )
+        self._executor.submit(self._run, func, *args)
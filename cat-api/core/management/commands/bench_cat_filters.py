@@ -0,0 +1,116 @@
+"""
+Django command to benchmark the cat list filter strategies.
+"""
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cat.filters import MATCH_ALL, MATCH_ANY, filter_by_related
+from core.models import Ability, Cat
+
+
+BENCH_EMAIL = 'bench-cat-filters@example.com'
+
+
+class Command(BaseCommand):
+    """Compare JOIN + DISTINCT against EXISTS filtering of cats."""
+    help = 'Seed cats and compare the plans of the cat list filters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cats', type=int, default=1_000_000)
+        parser.add_argument('--abilities', type=int, default=50)
+        parser.add_argument('--filter-size', type=int, default=3)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the seeded data for another run.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        rng = random.Random(options['seed'])
+        user = get_user_model().objects.filter(email=BENCH_EMAIL).first()
+        if user is None:
+            user = self._seed(rng, options)
+
+        ability_ids = list(
+            Ability.objects.filter(user=user).values_list('id', flat=True)
+        )
+        ids = rng.sample(ability_ids, options['filter_size'])
+        base = Cat.objects.filter(user=user)
+        plans = {
+            'join+distinct': base.filter(
+                abilities__id__in=ids
+            ).order_by('-id').distinct(),
+            'exists (any)': filter_by_related(
+                base, 'abilities', ids, MATCH_ANY
+            ).order_by('-id'),
+            'exists (all)': filter_by_related(
+                base, 'abilities', ids, MATCH_ALL
+            ).order_by('-id'),
+        }
+
+        for name, queryset in plans.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(self._explain(queryset[:options['page_size']]))
+            best = min(
+                self._time(queryset[:options['page_size']])
+                for _ in range(options['repeat'])
+            )
+            self.stdout.write(f'best of {options["repeat"]}: {best:.2f} ms')
+
+        if not options['keep']:
+            user.delete()
+
+    def _seed(self, rng, options):
+        """Create the benchmark user with its cats and abilities."""
+        self.stdout.write(f'Seeding {options["cats"]} cats...')
+        batch_size = options['batch_size']
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email=BENCH_EMAIL,
+                password=None,
+            )
+            abilities = Ability.objects.bulk_create(
+                Ability(user=user, name=f'Ability {i}')
+                for i in range(options['abilities'])
+            )
+            through = Cat.abilities.through
+            for start in range(0, options['cats'], batch_size):
+                count = min(batch_size, options['cats'] - start)
+                cats = Cat.objects.bulk_create(
+                    Cat(
+                        user=user,
+                        name=f'Cat {start + i}',
+                        description='Benchmark cat. ' * 20,
+                        weight=rng.uniform(2, 12),
+                    )
+                    for i in range(count)
+                )
+                through.objects.bulk_create(
+                    through(cat_id=cat.id, ability_id=ability.id)
+                    for cat in cats
+                    for ability in rng.sample(abilities, rng.randint(0, 4))
+                )
+
+        return user
+
+    def _explain(self, queryset):
+        """Return the query plan, measured where the backend allows it."""
+        try:
+            return queryset.explain(analyze=True)
+        except ValueError:
+            return queryset.explain()
+
+    def _time(self, queryset):
+        """Return the time in milliseconds of evaluating the queryset."""
+        start = time.perf_counter()
+        list(queryset.all())
+        return (time.perf_counter() - start) * 1000
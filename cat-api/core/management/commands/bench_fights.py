@@ -0,0 +1,73 @@
+"""
+Django command to benchmark the fight simulation.
+"""
+import gc
+import time
+
+import numpy as np
+
+from django.core.management.base import BaseCommand
+
+from cat.fights import FIGHTER_DTYPE, simulate
+
+
+TARGET = 1000000
+
+
+def random_fighters(count, rng):
+    """Return count fighters with random weights, abilities and styles."""
+    fighters = np.zeros(count, FIGHTER_DTYPE)
+    fighters['weight'] = rng.uniform(2.0, 8.0, count)
+    fighters['abilities'] = rng.integers(0, 6, count)
+    fighters['striking'] = rng.integers(0, 3, count)
+    fighters['grappling'] = rng.integers(0, 3, count)
+    fighters['dangerous'] = rng.random(count) < 0.5
+
+    return fighters
+
+
+class Command(BaseCommand):
+    """Measure simulated bouts per second."""
+    help = 'Report the throughput of the fight simulation on one core.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pairings',
+            type=int,
+            default=100,
+            help='Number of pairings per run.',
+        )
+        parser.add_argument(
+            '--bouts',
+            type=int,
+            default=10000,
+            help='Bouts per pairing.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs, the best one is reported.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        rng = np.random.default_rng(options['seed'])
+        fighters = random_fighters(options['pairings'], rng)
+        opponents = random_fighters(options['pairings'], rng)
+        total = options['pairings'] * options['bouts']
+
+        best = float('inf')
+        for run in range(options['repeat']):
+            gc.collect()
+            start = time.perf_counter()
+            simulate(fighters, opponents, options['bouts'], run)
+            best = min(best, time.perf_counter() - start)
+
+        rate = total / best
+        style = self.style.SUCCESS if rate >= TARGET else self.style.WARNING
+        self.stdout.write(style(
+            f'{total} bouts in {best * 1000:.1f}ms, '
+            f'{rate:,.0f} bouts/sec (target {TARGET:,}).'
+        ))
@@ -0,0 +1,72 @@
+"""
+Django command to benchmark logins at the configured hasher cost.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+
+from user.serializers import AuthTokenSerializer
+
+
+BENCH_EMAIL = 'bench-login@example.com'
+BENCH_PASSWORD = 'bench-login-password'
+
+
+class Command(BaseCommand):
+    """Measure the login throughput of the token endpoint serializer."""
+    help = 'Report logins/sec per core at the configured hasher cost.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200)
+        parser.add_argument(
+            '--clients',
+            type=int,
+            default=settings.LOGIN_CONCURRENCY or 1,
+            help='Number of concurrent clients.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        hasher = get_hasher()
+        self.stdout.write(
+            f'Hasher {hasher.algorithm}, '
+            f'{getattr(hasher, "iterations", "n/a")} iterations, '
+            f'{settings.LOGIN_CONCURRENCY} concurrent logins'
+        )
+        get_user_model().objects.filter(email=BENCH_EMAIL).delete()
+        user = get_user_model().objects.create_user(
+            email=BENCH_EMAIL,
+            password=BENCH_PASSWORD,
+        )
+        try:
+            elapsed = self._run(options['logins'], options['clients'])
+        finally:
+            user.delete()
+
+        rate = options['logins'] / elapsed
+        cores = min(settings.LOGIN_CONCURRENCY or 1, os.cpu_count() or 1)
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["logins"]} logins in {elapsed:.2f}s: '
+            f'{rate:.1f} logins/sec, {rate / cores:.1f} logins/sec per core'
+        ))
+
+    def _login(self, _):
+        """Validate one login."""
+        serializer = AuthTokenSerializer(data={
+            'email': BENCH_EMAIL,
+            'password': BENCH_PASSWORD,
+        })
+        serializer.is_valid(raise_exception=True)
+
+    def _run(self, logins, clients):
+        """Return the time taken by the logins."""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            list(executor.map(self._login, range(logins)))
+
+        return time.perf_counter() - start
@@ -0,0 +1,83 @@
+"""
+Django command to benchmark the matchmaking queue.
+"""
+import gc
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from cat.matchmaking import WEIGHT_CLASSES, RatingQueue, Ticket
+
+
+def random_ticket(ticket_id, rng, queued_at):
+    """Return a ticket of a random user, rating and weight class."""
+    return Ticket(
+        ticket_id,
+        rng.randrange(1000000),
+        ticket_id,
+        rng.gauss(1500, 200),
+        rng.randrange(len(WEIGHT_CLASSES) + 1),
+        queued_at,
+    )
+
+
+class Command(BaseCommand):
+    """Measure matches per second with a full queue."""
+    help = 'Report matches/sec and sweep time of the matchmaking queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queued',
+            type=int,
+            default=100000,
+            help='Tickets kept waiting in the queue.',
+        )
+        parser.add_argument(
+            '--arrivals',
+            type=int,
+            default=100000,
+            help='Tickets matched against the queue.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        rng = random.Random(options['seed'])
+        now = time.time()
+        queue = RatingQueue()
+        ticket_id = 0
+        for _ in range(options['queued']):
+            ticket_id += 1
+            queue.add(random_ticket(ticket_id, rng, now))
+
+        # Each match is replaced by a waiting ticket to keep the queue
+        # full.
+        arrivals, refills = [], []
+        for _ in range(options['arrivals']):
+            arrivals.append(random_ticket(ticket_id + 1, rng, now))
+            refills.append(random_ticket(ticket_id + 2, rng, now))
+            ticket_id += 2
+
+        gc.collect()
+        matches = 0
+        start = time.perf_counter()
+        for ticket, refill in zip(arrivals, refills):
+            if queue.match(ticket, now) is not None:
+                matches += 1
+                queue.add(refill)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{len(arrivals)} arrivals against ~{options["queued"]} queued: '
+            f'{matches} matches, {matches / elapsed:,.0f} matches/sec, '
+            f'{len(arrivals) / elapsed:,.0f} arrivals/sec.'
+        )
+
+        gc.collect()
+        start = time.perf_counter()
+        swept = queue.sweep(now + 30)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Sweep of {len(queue) + 2 * len(swept)} tickets matched '
+            f'{len(swept)} pairs in {elapsed * 1000:.1f}ms.'
+        ))
@@ -0,0 +1,99 @@
+"""
+Django command to benchmark the API renderers and parsers.
+"""
+import gc
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import FastJSONParser, MessagePackParser
+from core.renderers import (
+    FastJSONRenderer,
+    MessagePackRenderer,
+    msgpack,
+    orjson,
+)
+
+
+def cat_payload(count):
+    """Return a list of cats shaped like the cat detail responses."""
+    return [
+        {
+            'id': i,
+            'name': f'Cat {i}',
+            'dangerous': i % 3 == 0,
+            'abilities': [
+                {'id': i * 3 + j, 'name': f'Ability {j}'} for j in range(3)
+            ],
+            'fighting_styles': [
+                {'id': 1, 'name': 'BX', 'ground_allowed': False},
+                {'id': 2, 'name': 'WR', 'ground_allowed': True},
+            ],
+            'description': 'He will get you in five seconds! ' * 2,
+            'weight': 3.5 + i % 7 / 4,
+            'color': 'Black',
+            'image_status': 'ready',
+            'image_variants': {
+                'thumbnail': f'/static/media/uploads/cat/variants/{i}_t.jpg',
+                'web': f'/static/media/uploads/cat/variants/{i}_w.jpg',
+            },
+        }
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    """Measure encoding and decoding of cat lists."""
+    help = 'Report encode/decode times of the API renderers and parsers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[10, 1000, 100000],
+            help='Number of cats per payload.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=0,
+            help='Runs per payload, by default about a million cats.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        codecs = [('json', JSONRenderer(), JSONParser())]
+        if orjson is not None:
+            codecs.append(('orjson', FastJSONRenderer(), FastJSONParser()))
+        if msgpack is not None:
+            codecs.append(
+                ('msgpack', MessagePackRenderer(), MessagePackParser())
+            )
+
+        for size in options['sizes']:
+            data = cat_payload(size)
+            repeat = options['repeat'] or max(1, 1000000 // size // 10)
+            for name, renderer, parser in codecs:
+                encode, body = self._time(repeat, renderer.render, data)
+                decode, _ = self._time(
+                    repeat, lambda: parser.parse(BytesIO(body))
+                )
+                self.stdout.write(
+                    f'{size:>7} cats {name:<8} {len(body):>10} bytes  '
+                    f'encode {encode * 1000:9.3f}ms  '
+                    f'decode {decode * 1000:9.3f}ms'
+                )
+
+    def _time(self, repeat, func, *args):
+        """Return the mean time of func and its last result."""
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = func(*args)
+
+        return (time.perf_counter() - start) / repeat, result
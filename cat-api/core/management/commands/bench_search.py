@@ -0,0 +1,152 @@
+"""
+Django command to benchmark the faceted cat search.
+"""
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Ability, Cat, CatFacet, FightingStyles
+from cat.filters import MATCH_ANY
+from cat.search import (
+    facet_counts,
+    facet_keys,
+    is_filtered,
+    search_cats,
+    stored_facet_counts,
+)
+
+
+COLORS = ['black', 'white', 'grey', 'orange', 'tabby', 'calico', 'cream']
+WORDS = ['alley', 'lazy', 'fast', 'fluffy', 'grumpy', 'sleepy', 'brave']
+
+
+def random_filters(rng, abilities, styles):
+    """Return search filters of a random query."""
+    filters = {'match': MATCH_ANY}
+    if rng.random() < 0.3:
+        filters['q'] = rng.choice(WORDS)
+    if rng.random() < 0.5:
+        low = rng.uniform(1, 8)
+        filters['weight_min'] = low
+        filters['weight_max'] = low + rng.uniform(0.5, 3)
+    if rng.random() < 0.4:
+        filters['color'] = rng.sample(COLORS, 2)
+    if rng.random() < 0.3:
+        filters['dangerous'] = rng.random() < 0.5
+    if rng.random() < 0.3:
+        filters['abilities'] = rng.sample(abilities, 2)
+    if rng.random() < 0.2:
+        filters['fighting_styles'] = rng.sample(styles, 1)
+
+    return filters
+
+
+class Command(BaseCommand):
+    """Measure search latency over the cats of one user."""
+    help = 'Report p50/p95 of cat searches with facet counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cats',
+            type=int,
+            default=100000,
+            help='Cats of the user searched, rolled back afterwards.',
+        )
+        parser.add_argument(
+            '--searches',
+            type=int,
+            default=200,
+            help='Random searches timed.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email=f'bench-search-{time.time_ns()}@example.com',
+            )
+            self._fill(user, options['cats'], rng)
+            timings = self._search(user, options['searches'], rng)
+            transaction.set_rollback(True)
+
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(timings)} searches over {options["cats"]} cats: '
+            f'p50 {p50 * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms, '
+            f'max {timings[-1] * 1000:.1f}ms.'
+        ))
+
+    def _fill(self, user, count, rng):
+        """Create cats with random traits, abilities and styles."""
+        abilities = Ability.objects.bulk_create(
+            Ability(user=user, name=f'Ability {i}') for i in range(20)
+        )
+        styles = list(FightingStyles.objects.all()) or (
+            FightingStyles.objects.bulk_create(
+                FightingStyles(name=name) for name, _ in FightingStyles.CHOICES
+            )
+        )
+        cats = Cat.objects.bulk_create(
+            (
+                Cat(
+                    user=user,
+                    name=f'Cat {i}',
+                    description=' '.join(rng.sample(WORDS, 2)),
+                    weight=round(rng.uniform(1, 10), 1),
+                    color=rng.choice(COLORS),
+                    dangerous=rng.random() < 0.3,
+                )
+                for i in range(count)
+            ),
+            batch_size=5000,
+        )
+        Cat.abilities.through.objects.bulk_create(
+            (
+                Cat.abilities.through(cat_id=cat.id, ability_id=ability.id)
+                for cat in cats
+                for ability in rng.sample(abilities, rng.randrange(3))
+            ),
+            batch_size=5000,
+        )
+        Cat.fighting_styles.through.objects.bulk_create(
+            (
+                Cat.fighting_styles.through(
+                    cat_id=cat.id, fightingstyles_id=rng.choice(styles).id
+                )
+                for cat in cats
+                if rng.random() < 0.5
+            ),
+            batch_size=5000,
+        )
+        # Bulk writes send no signals, the counts are set at once.
+        CatFacet.objects.shift({
+            (user.pk, *key): count
+            for key, count in facet_keys(
+                Cat.objects.filter(user=user)
+            ).items()
+        })
+        self.abilities = [ability.id for ability in abilities]
+        self.styles = [style.id for style in styles]
+
+    def _search(self, user, searches, rng):
+        """Return the seconds taken by random searches with facets."""
+        timings = []
+        for _ in range(searches):
+            filters = random_filters(rng, self.abilities, self.styles)
+            start = time.perf_counter()
+            cats = search_cats(Cat.objects.filter(user=user), filters)
+            list(cats.order_by('-id').only('id', 'document')[:101])
+            if is_filtered(filters):
+                facet_counts(cats)
+            else:
+                stored_facet_counts(user)
+            timings.append(time.perf_counter() - start)
+
+        return timings
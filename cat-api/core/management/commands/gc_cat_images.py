@@ -0,0 +1,65 @@
+"""
+Django command to delete cat image files no cat references.
+"""
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.models import Cat, ImageBlob
+
+
+class Command(BaseCommand):
+    """Django command to garbage collect orphaned cat images."""
+    help = 'Delete stored cat images and variants no cat references.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be deleted.',
+        )
+        parser.add_argument(
+            '--grace',
+            type=int,
+            default=3600,
+            help='Keep files modified in the last seconds, e.g. uploads '
+                 'still being processed.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        storage = Cat._meta.get_field('image').storage
+        referenced = set(
+            ImageBlob.objects.filter(
+                refcount__gt=0
+            ).values_list('name', flat=True)
+        )
+        for image, variants in Cat.objects.values_list(
+            'image', 'image_variants'
+        ).iterator():
+            referenced.update(filter(None, [image, *variants.values()]))
+        if not options['dry_run']:
+            ImageBlob.objects.filter(refcount__lte=0).delete()
+
+        root = storage.path(os.path.join('uploads', 'cat'))
+        cutoff = time.time() - options['grace']
+        files = reclaimed = 0
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, storage.location)
+                name = name.replace(os.sep, '/')
+                stat = os.stat(path)
+                if name in referenced or stat.st_mtime > cutoff:
+                    continue
+
+                files += 1
+                reclaimed += stat.st_size
+                if not options['dry_run']:
+                    os.remove(path)
+
+        action = 'Would reclaim' if options['dry_run'] else 'Reclaimed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {reclaimed} bytes from {files} orphaned files.'
+        ))
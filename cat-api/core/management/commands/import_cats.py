@@ -0,0 +1,161 @@
+"""
+Django command to import cats from an NDJSON or CSV file.
+"""
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.exceptions import ValidationError
+
+from cat.bulk import CatBulkWriter
+from cat.serializers import CatCreateSerializer
+
+
+FORMATS = ['ndjson', 'csv']
+
+
+def read_ndjson(file):
+    """Yield each non empty line of a binary file, undecoded."""
+    for line in file:
+        if line.strip():
+            yield line
+
+
+def parse_ndjson(line):
+    """Return the data of an NDJSON line."""
+    try:
+        return json.loads(line)
+    except ValueError as exc:
+        raise ValidationError({'non_field_errors': [f'Invalid JSON: {exc}']})
+
+
+def read_csv(file):
+    """Yield a dict per CSV row."""
+    yield from csv.DictReader(file)
+
+
+def parse_csv(row):
+    """Return the data of a CSV row, relations given as names joined by |."""
+    data = {k: v for k, v in row.items() if v not in ('', None)}
+    for field in ['abilities', 'fighting_styles']:
+        if field in data:
+            data[field] = [
+                {'name': name} for name in data[field].split('|')
+            ]
+    return data
+
+
+# Rows are read raw and parsed one by one, so skipped rows are never
+# parsed and an invalid row is skipped alone. NDJSON is read in binary
+# to checkpoint the byte position of the rows.
+READERS = {
+    'ndjson': (read_ndjson, parse_ndjson, {'mode': 'rb'}),
+    'csv': (read_csv, parse_csv, {'newline': '', 'encoding': 'utf-8'}),
+}
+
+
+class Command(BaseCommand):
+    """Django command to import cats in batches."""
+    help = 'Import cats for a user from an NDJSON or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help='Owner email.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--offset',
+            type=int,
+            help='Number of rows to skip, defaults to the checkpoint.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='File storing the offset of the last imported batch.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User {options["user"]} does not exist.')
+
+        file_format = options['format'] or \
+            os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f'Unknown format, use one of {FORMATS}.')
+
+        offset, position = options['offset'], None
+        if offset is None:
+            offset, position = self._read_checkpoint(options['checkpoint'])
+
+        read, parse, open_kwargs = READERS[file_format]
+        binary = 'b' in open_kwargs.get('mode', '')
+        writer = CatBulkWriter(user, options['batch_size'])
+        serializer = CatCreateSerializer()
+        imported = skipped = 0
+        start = time.perf_counter()
+        with open(options['path'], **open_kwargs) as file:
+            if binary and position is not None:
+                file.seek(position)
+                rows = read(file)
+            else:
+                rows = islice(read(file), offset, None)
+            while True:
+                chunk = list(islice(rows, options['batch_size']))
+                if not chunk:
+                    break
+
+                batch = []
+                for row in chunk:
+                    try:
+                        batch.append(serializer.run_validation(parse(row)))
+                    except ValidationError as exc:
+                        skipped += 1
+                        self.stderr.write(f'Row {offset}: {exc.detail}')
+                    offset += 1
+
+                writer.create(batch)
+                imported += len(batch)
+                self._write_checkpoint(
+                    options['checkpoint'],
+                    offset,
+                    file.tell() if binary else None,
+                )
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{imported} cats imported, offset {offset}, '
+                    f'{imported / elapsed:.0f} rows/sec'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} cats, skipped {skipped} invalid rows.'
+        ))
+
+    def _read_checkpoint(self, path):
+        """Return the offset and byte position stored in the checkpoint.
+
+        The position is None when only the offset was stored.
+        """
+        if path and os.path.exists(path):
+            with open(path) as file:
+                values = [int(value) for value in file.read().split()]
+            if len(values) > 1:
+                return values[0], values[1]
+            if values:
+                return values[0], None
+        return 0, None
+
+    def _write_checkpoint(self, path, offset, position=None):
+        """Store the offset, and the byte position after it if known."""
+        if path:
+            with open(path, 'w') as file:
+                file.write(' '.join(
+                    str(value) for value in (offset, position)
+                    if value is not None
+                ))
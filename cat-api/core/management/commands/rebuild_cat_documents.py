@@ -0,0 +1,101 @@
+"""
+Django command to rebuild or check the stored cat documents.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.models import Cat
+from cat.documents import build_documents
+
+
+def stale_documents(cat_ids):
+    """Return the fresh documents of the batch that differ."""
+    stored = dict(Cat.objects.filter(
+        pk__in=cat_ids
+    ).values_list('id', 'document'))
+    return [
+        document
+        for document in build_documents(Cat.objects.filter(pk__in=cat_ids))
+        if stored[document['id']] != document
+    ]
+
+
+def check_batch(cat_ids):
+    """Return the ids of cats whose stored document is stale."""
+    return [document['id'] for document in stale_documents(cat_ids)]
+
+
+def rebuild_batch(cat_ids):
+    """Store the documents that changed and return their cat ids."""
+    stale = stale_documents(cat_ids)
+    Cat.objects.bulk_update(
+        [Cat(pk=document['id'], document=document) for document in stale],
+        ['document'],
+    )
+
+    return [document['id'] for document in stale]
+
+
+class Command(BaseCommand):
+    """Django command to rebuild cat documents in parallel batches."""
+    help = 'Rebuild the stored cat documents, or check they are current.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes building batches at once.',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report cats whose stored document is stale.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        batch_size = options['batch_size']
+        cat_ids = list(
+            Cat.objects.order_by('id').values_list('id', flat=True)
+        )
+        batches = [
+            cat_ids[start:start + batch_size]
+            for start in range(0, len(cat_ids), batch_size)
+        ]
+        process = check_batch if options['check'] else rebuild_batch
+
+        start = time.perf_counter()
+        if options['workers'] > 1:
+            # Building documents is CPU bound, batches run in processes
+            # opening their own connections rather than forked ones.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                options['workers'], initializer=django.setup
+            ) as pool:
+                results = list(pool.map(process, batches))
+        else:
+            results = [process(batch) for batch in batches]
+        elapsed = time.perf_counter() - start
+
+        stale = sorted(cat_id for ids in results for cat_id in ids)
+        if options['check']:
+            if stale:
+                raise CommandError(
+                    f'{len(stale)} of {len(cat_ids)} cat documents are '
+                    f'stale: {stale[:20]}'
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f'All {len(cat_ids)} cat documents are current.'
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {len(stale)} of {len(cat_ids)} cat documents in '
+            f'{elapsed:.2f}s.'
+        ))
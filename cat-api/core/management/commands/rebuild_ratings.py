@@ -0,0 +1,70 @@
+"""
+Django command to rebuild the cat ratings from the tournament history.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Cat, CatRating, RatingBucket, TournamentMatch
+from cat.ratings import RatingLedger
+
+
+class Command(BaseCommand):
+    """Django command to replay every match into fresh ratings."""
+    help = 'Rebuild the cat ratings by replaying the tournament matches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Matches read per query.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        start = time.perf_counter()
+        started_at = timezone.now()
+        with transaction.atomic():
+            ledger = RatingLedger.load(Cat.objects.all(), fresh=True)
+            matches = TournamentMatch.objects.filter(
+                opponent__isnull=False
+            ).order_by('tournament_id', 'round', 'id').values_list(
+                'tournament_id', 'round', 'cat_id', 'opponent_id',
+                'wins', 'losses',
+            )
+
+            replayed = 0
+            played = None
+            cats, opponents, outcomes = [], [], []
+            for row in matches.iterator(chunk_size=options['batch_size']):
+                *key, cat_id, opponent_id, wins, losses = row
+                # Each round is recorded at once, as when it was played.
+                if key != played:
+                    self._record(ledger, cats, opponents, outcomes)
+                    played = key
+                    cats, opponents, outcomes = [], [], []
+                cats.append(cat_id)
+                opponents.append(opponent_id)
+                outcomes.append((wins > losses) - (losses > wins))
+                replayed += 1
+            self._record(ledger, cats, opponents, outcomes)
+
+            ledger.save(options['batch_size'])
+            CatRating.objects.filter(updated_at__lt=started_at).delete()
+            RatingBucket.objects.rebuild()
+            rated = CatRating.objects.count()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Replayed {replayed} matches into {rated} ratings in '
+            f'{time.perf_counter() - start:.2f}s.'
+        ))
+
+    def _record(self, ledger, cats, opponents, outcomes):
+        """Record the matches of a round in the ledger."""
+        if cats:
+            ledger.record(
+                ledger.positions(cats), ledger.positions(opponents), outcomes
+            )
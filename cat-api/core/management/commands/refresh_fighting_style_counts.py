@@ -0,0 +1,19 @@
+"""
+Django command to recount the cats of every fighting style.
+"""
+from django.core.management.base import BaseCommand
+
+from core.models import FightingStyles
+
+
+class Command(BaseCommand):
+    """Django command to repair the maintained fighting style counts."""
+    help = 'Recount the cats of every fighting style.'
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        FightingStyles.objects.refresh_cat_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recounted the cats of {FightingStyles.objects.count()} '
+            'fighting styles.'
+        ))
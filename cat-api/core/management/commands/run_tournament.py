@@ -0,0 +1,116 @@
+"""
+Django command to run a tournament between cats of a user.
+"""
+import secrets
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Cat, Tournament
+from cat.tournaments import TournamentRunner
+
+
+class Command(BaseCommand):
+    """Django command to simulate and store a tournament."""
+    help = 'Simulate a tournament between cats of a user.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Owner email.')
+        parser.add_argument('--name', default='Tournament')
+        parser.add_argument(
+            '--format',
+            choices=[choice for choice, _ in Tournament.FORMATS],
+            default=Tournament.SINGLE_ELIMINATION,
+        )
+        parser.add_argument(
+            '--cats',
+            help='Comma separated list of cat IDs, all cats by default.',
+        )
+        parser.add_argument(
+            '--bouts',
+            type=int,
+            default=1,
+            help='Bouts per match.',
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            help='Number of Swiss rounds.',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Seed of the simulation, random by default.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes simulating the matches.',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--resume',
+            type=int,
+            help='ID of an unfinished tournament to resume.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User {options["user"]} does not exist.')
+
+        if options['resume'] is not None:
+            try:
+                tournament = Tournament.objects.get(
+                    pk=options['resume'], user=user
+                )
+            except Tournament.DoesNotExist:
+                raise CommandError(
+                    f'Tournament {options["resume"]} does not exist.'
+                )
+            self._play(
+                options, tournament, lambda runner: runner.resume()
+            )
+            return
+
+        cats = Cat.objects.filter(user=user)
+        if options['cats']:
+            cats = cats.filter(pk__in=[
+                int(str_id) for str_id in options['cats'].split(',')
+            ])
+        seed = options['seed']
+        if seed is None:
+            seed = secrets.randbits(63)
+        tournament = Tournament(
+            user=user,
+            name=options['name'],
+            format=options['format'],
+            seed=seed,
+            bouts=options['bouts'],
+        )
+
+        self._play(
+            options, tournament,
+            lambda runner: runner.run(cats, options['rounds']),
+        )
+
+    def _play(self, options, tournament, play):
+        """Play the tournament with a runner and report the winner."""
+        start = time.perf_counter()
+        try:
+            play(TournamentRunner(
+                tournament, options['workers'], options['batch_size']
+            ))
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Tournament {tournament.id} played {tournament.rounds} rounds '
+            f'in {elapsed:.2f}s, won by cat {tournament.winner_id} '
+            f'(seed {tournament.seed}).'
+        ))
@@ -0,0 +1,199 @@
+"""
+Middleware for the APIs.
+"""
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Media types worth compressing, other bodies such as images are sent
+# as they are.
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/x-ndjson',
+    'application/msgpack',
+    'application/javascript',
+    'application/xml',
+    'application/vnd.oai.openapi',
+)
+
+
+class GzipEncoder:
+    """Incremental gzip compression."""
+    name = 'gzip'
+
+    def __init__(self):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    """Incremental brotli compression, requires the brotli package."""
+    name = 'br'
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=5)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    """Incremental zstd compression, requires the zstandard package."""
+    name = 'zstd'
+
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+# Available encoders in order of preference.
+ENCODERS = {
+    encoder.name: encoder
+    for encoder, available in [
+        (ZstdEncoder, zstandard is not None),
+        (BrotliEncoder, brotli is not None),
+        (GzipEncoder, True),
+    ]
+    if available
+}
+
+
+def negotiate_encoding(accept_encoding):
+    """Return the name of the preferred encoding accepted, or None."""
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        weight = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if coding:
+            weights[coding.strip().lower()] = weight
+
+    default = weights.get('*', 0.0)
+    best, best_weight = None, 0.0
+    for name in ENCODERS:
+        weight = weights.get(name, default)
+        if weight > best_weight:
+            best, best_weight = name, weight
+
+    return best
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses with the best encoding the client accepts.
+
+    Bodies smaller than `COMPRESSION_MIN_SIZE` bytes are sent as they
+    are. Streaming responses are compressed as they are sent, output is
+    flushed every `COMPRESSION_FLUSH_SIZE` bytes of input so that the
+    body is never buffered whole.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not (
+            response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+        ):
+            return response
+        if not response.streaming and (
+            len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        name = negotiate_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if name is None:
+            return response
+
+        encoder = ENCODERS[name]()
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self._compress_async(
+                    encoder, response.streaming_content
+                )
+            else:
+                response.streaming_content = self._compress(
+                    encoder, response.streaming_content
+                )
+            del response['Content-Length']
+        else:
+            content = encoder.compress(response.content) + encoder.finish()
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+
+        # The encoded body differs byte for byte, see RFC 9110 8.8.3.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = name
+
+        return response
+
+    def _compress(self, encoder, chunks):
+        """Yield the compressed chunks, flushing by input size."""
+        pending = 0
+        for chunk in chunks:
+            output = encoder.compress(chunk)
+            pending += len(chunk)
+            if pending >= settings.COMPRESSION_FLUSH_SIZE:
+                output += encoder.flush()
+                pending = 0
+            if output:
+                yield output
+        yield encoder.finish()
+
+    async def _compress_async(self, encoder, chunks):
+        """Yield the compressed chunks of an async stream."""
+        pending = 0
+        async for chunk in chunks:
+            output = encoder.compress(chunk)
+            pending += len(chunk)
+            if pending >= settings.COMPRESSION_FLUSH_SIZE:
+                output += encoder.flush()
+                pending = 0
+            if output:
+                yield output
+        yield encoder.finish()
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.4 on 2026-10-17 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_cat_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cat',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], max_length=10),
+        ),
+        migrations.AddField(
+            model_name='cat',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
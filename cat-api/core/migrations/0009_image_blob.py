@@ -0,0 +1,46 @@
+# Generated by Django 5.0.4 on 2026-10-17 03:49
+
+import core.models
+import core.storage
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def count_image_references(apps, schema_editor):
+    """Create the reference counts of the images already stored."""
+    Cat = apps.get_model('core', 'Cat')
+    ImageBlob = apps.get_model('core', 'ImageBlob')
+    counts = Counter()
+    for image, variants in Cat.objects.values_list('image', 'image_variants'):
+        counts.update(filter(None, [image, *(variants or {}).values()]))
+    ImageBlob.objects.bulk_create(
+        ImageBlob(name=name, refcount=refcount)
+        for name, refcount in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_cat_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('refcount', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='cat',
+            name='image',
+            field=models.ImageField(null=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.models.cat_image_file_path),
+        ),
+        migrations.RunPython(
+            count_image_references, migrations.RunPython.noop
+        ),
+    ]
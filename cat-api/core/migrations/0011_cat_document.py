@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-17 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_resource_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cat',
+            name='document',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
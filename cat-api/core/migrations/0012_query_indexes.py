@@ -0,0 +1,47 @@
+# Generated by Django 5.0.4 on 2026-10-17 04:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_cat_document'),
+    ]
+
+    operations = [
+        # The composite indexes are built before the user indexes they
+        # replace are dropped.
+        migrations.AddIndex(
+            model_name='ability',
+            index=models.Index(fields=['user', 'name'], name='ability_user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cat',
+            index=models.Index(fields=['user', '-id'], name='cat_user_id_idx'),
+        ),
+        migrations.AlterField(
+            model_name='ability',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='cat',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        # Reverse probes of the relations, from an ability or fighting
+        # style to its cats, read the index alone.
+        migrations.RunSQL(
+            'CREATE INDEX cat_abilities_ability_cat_idx '
+            'ON core_cat_abilities (ability_id, cat_id)',
+            'DROP INDEX cat_abilities_ability_cat_idx',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX cat_styles_style_cat_idx '
+            'ON core_cat_fighting_styles (fightingstyles_id, cat_id)',
+            'DROP INDEX cat_styles_style_cat_idx',
+        ),
+    ]
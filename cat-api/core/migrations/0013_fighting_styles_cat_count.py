@@ -0,0 +1,33 @@
+# Generated by Django 5.0.4 on 2026-10-17 04:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_cats(apps, schema_editor):
+    """Set the cat counts of the existing fighting styles."""
+    Cat = apps.get_model('core', 'Cat')
+    FightingStyles = apps.get_model('core', 'FightingStyles')
+    links = Cat.fighting_styles.through.objects.filter(
+        fightingstyles_id=OuterRef('pk')
+    ).values('fightingstyles_id').annotate(count=Count('*'))
+    FightingStyles.objects.update(cat_count=Coalesce(
+        Subquery(links.values('count')), Value(0)
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fightingstyles',
+            name='cat_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(count_cats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.0.4 on 2026-10-17 04:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_fighting_styles_cat_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tournament',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('format', models.CharField(choices=[('single_elimination', 'Single elimination'), ('round_robin', 'Round robin'), ('swiss', 'Swiss')], max_length=20)),
+                ('seed', models.PositiveBigIntegerField()),
+                ('bouts', models.PositiveIntegerField(default=1)),
+                ('rounds', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('winner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.cat')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TournamentEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seed', models.PositiveIntegerField()),
+                ('points', models.PositiveIntegerField(default=0)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('losses', models.PositiveIntegerField(default=0)),
+                ('draws', models.PositiveIntegerField(default=0)),
+                ('rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('cat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.cat')),
+                ('tournament', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='core.tournament')),
+            ],
+            options={
+                'verbose_name_plural': 'tournament entries',
+            },
+        ),
+        migrations.CreateModel(
+            name='TournamentMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('round', models.PositiveIntegerField()),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('losses', models.PositiveIntegerField(default=0)),
+                ('draws', models.PositiveIntegerField(default=0)),
+                ('cat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.cat')),
+                ('opponent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.cat')),
+                ('tournament', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='core.tournament')),
+            ],
+            options={
+                'verbose_name_plural': 'tournament matches',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['user', '-id'], name='tournament_user_id_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tournamententry',
+            constraint=models.UniqueConstraint(fields=('tournament', 'seed'), name='tournament_entry_seed'),
+        ),
+        migrations.AddIndex(
+            model_name='tournamentmatch',
+            index=models.Index(fields=['tournament', 'round', 'id'], name='tournament_match_round_idx'),
+        ),
+    ]
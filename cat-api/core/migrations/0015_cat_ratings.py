@@ -0,0 +1,41 @@
+# Generated by Django 5.0.4 on 2026-10-17 04:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_tournaments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CatRating',
+            fields=[
+                ('cat', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating', serialize=False, to='core.cat')),
+                ('rating', models.FloatField(default=1500.0)),
+                ('matches', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-rating', 'cat'], name='cat_rating_leaderboard_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ratingbucket',
+            constraint=models.UniqueConstraint(fields=('user', 'bucket'), name='rating_bucket_user_bucket'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.4 on 2026-10-17 04:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_cat_ratings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchTicket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.FloatField()),
+                ('weight_class', models.PositiveSmallIntegerField()),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('matched', 'Matched'), ('cancelled', 'Cancelled')], default='waiting', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('matched_at', models.DateTimeField(blank=True, null=True)),
+                ('cat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.cat')),
+                ('opponent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.cat')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-id'], name='match_ticket_user_id_idx'), models.Index(condition=models.Q(('status', 'waiting')), fields=['weight_class', 'rating'], name='match_ticket_waiting_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='matchticket',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'waiting')), fields=('cat',), name='match_ticket_waiting_cat'),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.0.4 on 2026-10-17 05:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models import Case, CharField, Count, Value, When
+from django.db.models.functions import Cast
+
+
+# Upper weights of the weight classes when the counts were first set.
+WEIGHT_CLASSES = (3.0, 4.5, 6.0)
+
+# Full-text index of the vector searched by cat.search, built on
+# Postgres only as other databases search without it.
+SEARCH_INDEX = GinIndex(
+    SearchVector('name', 'description', config='english'),
+    name='cat_search_idx',
+)
+
+
+def add_search_index(apps, schema_editor):
+    """Index the search vector of the cats on Postgres."""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('core', 'Cat'), SEARCH_INDEX)
+
+
+def remove_search_index(apps, schema_editor):
+    """Drop the search vector index on Postgres."""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_index(
+            apps.get_model('core', 'Cat'), SEARCH_INDEX
+        )
+
+
+def count_facets(apps, schema_editor):
+    """Set the facet counts of the existing cats."""
+    Cat = apps.get_model('core', 'Cat')
+    CatFacet = apps.get_model('core', 'CatFacet')
+    weight_class = Case(
+        *[
+            When(weight__lte=upper, then=Value(klass))
+            for klass, upper in enumerate(WEIGHT_CLASSES)
+        ],
+        default=Value(len(WEIGHT_CLASSES)),
+    )
+    dangerous = Case(When(dangerous=True, then=Value(1)), default=Value(0))
+    groups = [
+        ('weight_class', Cat.objects.all(), 'user_id', weight_class),
+        ('color', Cat.objects.exclude(color=''), 'user_id', 'color'),
+        ('dangerous', Cat.objects.all(), 'user_id', dangerous),
+        ('abilities', Cat.abilities.through.objects.all(),
+         'cat__user_id', 'ability_id'),
+        ('fighting_styles', Cat.fighting_styles.through.objects.all(),
+         'cat__user_id', 'fightingstyles_id'),
+    ]
+    for facet, rows, user, value in groups:
+        CatFacet.objects.bulk_create(
+            (
+                CatFacet(user_id=user_id, facet=facet, value=value, count=n)
+                for user_id, value, n in rows.values_list(
+                    user, Cast(value, CharField())
+                ).annotate(n=Count('*')).order_by()
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_match_tickets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=50)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='cat',
+            index=models.Index(fields=['user', 'weight'], name='cat_user_weight_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cat',
+            index=models.Index(fields=['user', 'color'], name='cat_user_color_idx'),
+        ),
+        migrations.AddField(
+            model_name='catfacet',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='catfacet',
+            constraint=models.UniqueConstraint(fields=('user', 'facet', 'value'), name='cat_facet_user_value'),
+        ),
+        migrations.RunPython(count_facets, migrations.RunPython.noop),
+        migrations.RunPython(add_search_index, remove_search_index),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.0.4 on 2026-10-17 06:12
+
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+from django.db import migrations
+
+
+BATCH_SIZE = 1000
+
+
+def build_documents(apps, schema_editor):
+    """Store the documents of the cats created before 0011.
+
+    Documents hold the detail representation of the cats at the time,
+    as built by cat.documents.
+    """
+    Cat = apps.get_model('core', 'Cat')
+    cat_ids = list(
+        Cat.objects.filter(document={}).order_by('pk').values_list(
+            'pk', flat=True
+        )
+    )
+    for start in range(0, len(cat_ids), BATCH_SIZE):
+        batch = cat_ids[start:start + BATCH_SIZE]
+        abilities = defaultdict(list)
+        for cat_id, ability_id, name in Cat.abilities.through.objects.filter(
+            cat_id__in=batch
+        ).order_by('ability_id').values_list(
+            'cat_id', 'ability_id', 'ability__name'
+        ):
+            abilities[cat_id].append({'id': ability_id, 'name': name})
+        styles = defaultdict(list)
+        for cat_id, style_id, name, ground_allowed in (
+            Cat.fighting_styles.through.objects.filter(
+                cat_id__in=batch
+            ).order_by('fightingstyles_id').values_list(
+                'cat_id', 'fightingstyles_id', 'fightingstyles__name',
+                'fightingstyles__ground_allowed',
+            )
+        ):
+            styles[cat_id].append({
+                'id': style_id,
+                'name': name,
+                'ground_allowed': ground_allowed,
+            })
+
+        cats = list(Cat.objects.filter(pk__in=batch).only(
+            'name', 'dangerous', 'description', 'weight', 'color',
+            'image_status', 'image_variants',
+        ))
+        for cat in cats:
+            cat.document = {
+                'id': cat.pk,
+                'name': cat.name,
+                'dangerous': cat.dangerous,
+                'abilities': abilities[cat.pk],
+                'fighting_styles': styles[cat.pk],
+                'description': cat.description,
+                'weight': cat.weight,
+                'color': cat.color,
+                'image_status': cat.image_status,
+                'image_variants': {
+                    variant: default_storage.url(name)
+                    for variant, name in cat.image_variants.items()
+                },
+            }
+        Cat.objects.bulk_update(cats, ['document'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_cat_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.0.4 on 2026-10-17 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_backfill_cat_documents'),
+    ]
+
+    operations = [
+        # The relation tables become explicit models, as they already
+        # are in the database, with the composite indexes of 0012.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='CatAbility',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('ability', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.ability')),
+                        ('cat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.cat')),
+                    ],
+                    options={
+                        'db_table': 'core_cat_abilities',
+                        'indexes': [models.Index(fields=['ability', 'cat'], name='cat_abilities_ability_cat_idx')],
+                        'unique_together': {('cat', 'ability')},
+                    },
+                ),
+                migrations.CreateModel(
+                    name='CatFightingStyle',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('cat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.cat')),
+                        ('fightingstyles', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.fightingstyles')),
+                    ],
+                    options={
+                        'db_table': 'core_cat_fighting_styles',
+                        'indexes': [models.Index(fields=['fightingstyles', 'cat'], name='cat_styles_style_cat_idx')],
+                        'unique_together': {('cat', 'fightingstyles')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='cat',
+                    name='abilities',
+                    field=models.ManyToManyField(through='core.CatAbility', to='core.ability'),
+                ),
+                migrations.AlterField(
+                    model_name='cat',
+                    name='fighting_styles',
+                    field=models.ManyToManyField(through='core.CatFightingStyle', to='core.fightingstyles'),
+                ),
+            ],
+        ),
+        # The composite indexes lead with the foreign keys, their own
+        # indexes only cost writes to the relations.
+        migrations.AlterField(
+            model_name='catability',
+            name='ability',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.ability'),
+        ),
+        migrations.AlterField(
+            model_name='catfightingstyle',
+            name='fightingstyles',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.fightingstyles'),
+        ),
+    ]
@@ -1,18 +1,25 @@
 """
 Database models.
 """
+import math
 import uuid
 import os
+from collections import defaultdict
 
 from django.core.exceptions import ValidationError
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Floor
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin
 )
 
+from core.storage import ContentAddressedStorage
+
 
 def cat_image_file_path(instance, filename):
     """Generate file path for cat image."""
@@ -58,18 +65,57 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 class Cat(models.Model):
     """Cat object."""
+    IMAGE_PENDING = 'pending'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUSES = (
+        (IMAGE_PENDING, 'Pending'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Failed'),
+    )
+
+    # Indexed by the composite indexes leading with the user.
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
     name = models.CharField(max_length=50)
     description = models.TextField(blank=True)
     weight = models.FloatField(blank=True)
     color = models.CharField(max_length=50, blank=True)
     dangerous = models.BooleanField(default=True)
-    abilities = models.ManyToManyField('Ability')
-    fighting_styles = models.ManyToManyField('FightingStyles')
-    image = models.ImageField(null=True, upload_to=cat_image_file_path)
+    abilities = models.ManyToManyField('Ability', through='CatAbility')
+    fighting_styles = models.ManyToManyField(
+        'FightingStyles', through='CatFightingStyle'
+    )
+    image = models.ImageField(
+        null=True,
+        upload_to=cat_image_file_path,
+        storage=ContentAddressedStorage(),
+    )
+    image_status = models.CharField(
+        max_length=10,
+        choices=IMAGE_STATUSES,
+        blank=True,
+    )
+    image_variants = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Detail representation kept up to date by cat.documents.
+    document = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Cats of a user, newest first.
+            models.Index(fields=['user', '-id'], name='cat_user_id_idx'),
+            # Weight range filters and facet counts of the search.
+            models.Index(
+                fields=['user', 'weight'], name='cat_user_weight_idx'
+            ),
+            models.Index(
+                fields=['user', 'color'], name='cat_user_color_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -78,14 +124,88 @@ class Cat(models.Model):
 class Ability(models.Model):
     """Abilities for cat objects."""
     name = models.CharField(max_length=255)
+    # Indexed by the composite indexes leading with the user.
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
 
+    class Meta:
+        indexes = [
+            # Abilities of a user by name, for lists and name lookups.
+            models.Index(
+                fields=['user', 'name'], name='ability_user_name_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
+
+class CatAbility(models.Model):
+    """Link of a cat to one of its abilities."""
+    cat = models.ForeignKey(Cat, on_delete=models.CASCADE, related_name='+')
+    # Indexed by the composite index leading with the ability.
+    ability = models.ForeignKey(
+        Ability,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False,
+    )
+
+    class Meta:
+        db_table = 'core_cat_abilities'
+        unique_together = [('cat', 'ability')]
+        indexes = [
+            # Reverse probes, from an ability to its cats.
+            models.Index(
+                fields=['ability', 'cat'], name='cat_abilities_ability_cat_idx'
+            ),
+        ]
+
+
+class FightingStylesManager(models.Manager):
+    """Fighting styles with their maintained cat counts."""
+
+    def shift_cat_counts(self, deltas):
+        """Add the cat count deltas of fighting style ids.
+
+        Return the ids of the styles which gained their first cat or
+        lost their last one.
+        """
+        styles = defaultdict(list)
+        for style_id, delta in deltas.items():
+            if delta:
+                styles[delta].append(style_id)
+        if not styles:
+            return set()
+
+        crossed = Q()
+        for delta, style_ids in styles.items():
+            self.filter(pk__in=style_ids).update(
+                cat_count=F('cat_count') + delta
+            )
+            crossed |= Q(pk__in=style_ids, cat_count=max(delta, 0))
+
+        return set(self.filter(crossed).values_list('pk', flat=True))
+
+    def refresh_cat_counts(self, style_ids=None):
+        """Recount the cats of fighting styles, of all without ids.
+
+        Writes shift the counts, this repairs counts which drifted.
+        """
+        links = Cat.fighting_styles.through.objects.filter(
+            fightingstyles_id=OuterRef('pk')
+        ).values('fightingstyles_id').annotate(count=Count('*'))
+        queryset = self.all() if style_ids is None else self.filter(
+            pk__in=style_ids
+        )
+        queryset.update(cat_count=Coalesce(
+            Subquery(links.values('count')), Value(0)
+        ))
+
+
 class FightingStyles(models.Model):
     """Fighting styles for cat objects."""
     CHOICES = (
@@ -98,11 +218,536 @@ class FightingStyles(models.Model):
 
     name = models.CharField(max_length=50, choices=CHOICES)
     ground_allowed = models.BooleanField(default=False)
+    # Number of cats using the style, kept up to date by cat.signals.
+    cat_count = models.PositiveIntegerField(
+        default=0, db_index=True, editable=False
+    )
+
+    objects = FightingStylesManager()
 
     def save(self, *args, **kwargs):
         if not any(self.name == choice[0] for choice in self.CHOICES):
             raise ValidationError(f'{self.name} is not a valid choice.')
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # The cat count is only written by the manager.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'cat_count'
+            ]
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
+
+
+class CatFightingStyle(models.Model):
+    """Link of a cat to one of its fighting styles."""
+    cat = models.ForeignKey(Cat, on_delete=models.CASCADE, related_name='+')
+    # Indexed by the composite index leading with the fighting style.
+    fightingstyles = models.ForeignKey(
+        FightingStyles,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False,
+    )
+
+    class Meta:
+        db_table = 'core_cat_fighting_styles'
+        unique_together = [('cat', 'fightingstyles')]
+        indexes = [
+            # Reverse probes, from a fighting style to its cats.
+            models.Index(
+                fields=['fightingstyles', 'cat'],
+                name='cat_styles_style_cat_idx',
+            ),
+        ]
+
+
+class ImageBlobManager(models.Manager):
+    """Reference counts of stored image files."""
+
+    def retain(self, names):
+        """Add a reference to each stored file."""
+        names = {name for name in names if name}
+        if not names:
+            return
+
+        with transaction.atomic():
+            # Locked until committed, so that delete_files sees the new
+            # references. Rows it deleted meanwhile are inserted again.
+            missing = names
+            while missing:
+                self.bulk_create(
+                    [self.model(name=name) for name in missing],
+                    ignore_conflicts=True,
+                )
+                missing = missing - set(self.select_for_update().filter(
+                    name__in=missing
+                ).values_list('name', flat=True))
+            self.filter(name__in=names).update(refcount=F('refcount') + 1)
+
+    def release(self, names, storage=None):
+        """Remove a reference to each file, deleting unused files.
+
+        Without a storage unused files are left to the garbage
+        collection.
+        """
+        names = {name for name in names if name}
+        if not names:
+            return
+
+        self.filter(name__in=names).update(refcount=F('refcount') - 1)
+        if storage is not None and self.filter(
+            name__in=names, refcount__lte=0
+        ).exists():
+            transaction.on_commit(lambda: self.delete_files(names, storage))
+
+    def delete_files(self, names, storage):
+        """Delete the files still not referenced, with their blobs.
+
+        The blobs are locked and checked again, as a file may have been
+        retained by another upload since it was released.
+        """
+        with transaction.atomic():
+            unused = list(self.select_for_update().filter(
+                name__in=names, refcount__lte=0
+            ).values_list('name', flat=True))
+            for name in unused:
+                storage.delete(name)
+            self.filter(name__in=unused).delete()
+
+
+class ImageBlob(models.Model):
+    """Stored image file shared by the cats referencing it."""
+    name = models.CharField(max_length=255, unique=True)
+    refcount = models.IntegerField(default=0)
+
+    objects = ImageBlobManager()
+
+    def __str__(self):
+        return self.name
+
+
+class ResourceVersionManager(models.Manager):
+    """Version stamps of API resources."""
+
+    def bump(self, *scopes):
+        """Increase the version of each scope."""
+        scopes = set(scopes)
+        now = timezone.now()
+        changed = self.filter(scope__in=scopes).update(
+            version=F('version') + 1,
+            updated_at=now,
+        )
+        if changed < len(scopes):
+            missing = scopes - set(
+                self.filter(scope__in=scopes).values_list('scope', flat=True)
+            )
+            self.bulk_create(
+                [self.model(scope=scope, updated_at=now) for scope in missing],
+                ignore_conflicts=True,
+            )
+            self.filter(scope__in=missing).update(
+                version=F('version') + 1,
+                updated_at=now,
+            )
+
+    def stamps(self, scopes):
+        """Return (scope, version, updated_at) of each existing scope."""
+        return sorted(self.filter(scope__in=scopes).values_list(
+            'scope', 'version', 'updated_at'
+        ))
+
+
+class ResourceVersion(models.Model):
+    """Version of a group of resources, increased on every write.
+
+    The cats and abilities of a user share the scope of the user, the
+    global fighting styles have their own scope. Which styles have cats
+    is versioned apart, as it changes with the cats of every user.
+    """
+    FIGHTING_STYLES = 'fighting_styles'
+    ASSIGNED_FIGHTING_STYLES = 'fighting_styles:assigned'
+
+    scope = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    objects = ResourceVersionManager()
+
+    @staticmethod
+    def user_scope(user_id):
+        """Return the scope of the resources of a user."""
+        return f'user:{user_id}'
+
+    def __str__(self):
+        return f'{self.scope}@{self.version}'
+
+
+class Tournament(models.Model):
+    """Tournament between cats of a user, simulated by cat.tournaments."""
+    SINGLE_ELIMINATION = 'single_elimination'
+    ROUND_ROBIN = 'round_robin'
+    SWISS = 'swiss'
+    FORMATS = (
+        (SINGLE_ELIMINATION, 'Single elimination'),
+        (ROUND_ROBIN, 'Round robin'),
+        (SWISS, 'Swiss'),
+    )
+
+    # Indexed by the composite index leading with the user.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    name = models.CharField(max_length=100)
+    format = models.CharField(max_length=20, choices=FORMATS)
+    # Entropy of the random streams, results are reproducible from it.
+    seed = models.PositiveBigIntegerField()
+    # Bouts simulated per match, the match goes to the most bouts won.
+    bouts = models.PositiveIntegerField(default=1)
+    rounds = models.PositiveIntegerField(default=0)
+    winner = models.ForeignKey(
+        Cat,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-id'], name='tournament_user_id_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class TournamentEntry(models.Model):
+    """Cat taking part in a tournament, with its standing."""
+    # Indexed by the unique seed constraint leading with the tournament.
+    tournament = models.ForeignKey(
+        Tournament,
+        on_delete=models.CASCADE,
+        related_name='entries',
+        db_index=False,
+    )
+    cat = models.ForeignKey(Cat, on_delete=models.CASCADE, related_name='+')
+    # Position in the draw, 1 is the strongest cat.
+    seed = models.PositiveIntegerField()
+    # Two points per match won or bye, one per draw.
+    points = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    draws = models.PositiveIntegerField(default=0)
+    rank = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tournament', 'seed'], name='tournament_entry_seed'
+            ),
+        ]
+        verbose_name_plural = 'tournament entries'
+
+    def __str__(self):
+        return f'{self.tournament_id}#{self.seed}'
+
+
+class TournamentMatch(models.Model):
+    """Simulated match of a tournament round, a bye without opponent."""
+    # Indexed by the round index leading with the tournament.
+    tournament = models.ForeignKey(
+        Tournament,
+        on_delete=models.CASCADE,
+        related_name='matches',
+        db_index=False,
+    )
+    round = models.PositiveIntegerField()
+    cat = models.ForeignKey(Cat, on_delete=models.CASCADE, related_name='+')
+    opponent = models.ForeignKey(
+        Cat,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    # Bouts won, lost and drawn by cat.
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    draws = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Matches of a tournament in the order they were played.
+            models.Index(
+                fields=['tournament', 'round', 'id'],
+                name='tournament_match_round_idx',
+            ),
+        ]
+        verbose_name_plural = 'tournament matches'
+
+    def __str__(self):
+        return f'{self.cat_id} vs {self.opponent_id}'
+
+
+class RatingBucketManager(models.Manager):
+    """Counts of rated cats per rating bucket."""
+
+    def shift(self, deltas):
+        """Add the count deltas of (user_id, bucket) keys."""
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        # Buckets losing cats hold them already, only gaining ones may be
+        # missing.
+        self.bulk_create(
+            [self.model(user_id=user_id, bucket=bucket)
+             for (user_id, bucket), delta in deltas.items() if delta > 0],
+            ignore_conflicts=True,
+        )
+        buckets = defaultdict(list)
+        for (user_id, bucket), delta in deltas.items():
+            buckets[user_id, delta].append(bucket)
+        for (user_id, delta), user_buckets in buckets.items():
+            self.filter(user_id=user_id, bucket__in=user_buckets).update(
+                count=F('count') + delta
+            )
+
+    def rebuild(self):
+        """Recount the buckets of every rating."""
+        self.all().delete()
+        self.bulk_create(
+            self.model(**row)
+            for row in CatRating.objects.values(
+                'user_id',
+                bucket=Floor(F('rating') / CatRating.BUCKET_WIDTH),
+            ).annotate(count=Count('*')).order_by()
+        )
+
+
+class RatingBucket(models.Model):
+    """Number of rated cats of a user whose rating falls in a bucket."""
+    # Indexed by the unique bucket constraint leading with the user.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    bucket = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    objects = RatingBucketManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'bucket'], name='rating_bucket_user_bucket'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}:{self.bucket}={self.count}'
+
+
+class CatFacetManager(models.Manager):
+    """Counts of the cats of each user per facet value."""
+
+    def shift(self, deltas):
+        """Add the count deltas of (user_id, facet, value) keys."""
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        # Values losing cats are counted already, and cats deleted with
+        # their user must not recreate the user's rows.
+        self.bulk_create(
+            [self.model(user_id=user_id, facet=facet, value=value)
+             for (user_id, facet, value), delta in deltas.items()
+             if delta > 0],
+            ignore_conflicts=True,
+        )
+        values = defaultdict(list)
+        for (user_id, facet, value), delta in deltas.items():
+            values[user_id, facet, delta].append(value)
+        for (user_id, facet, delta), facet_values in values.items():
+            self.filter(
+                user_id=user_id, facet=facet, value__in=facet_values
+            ).update(count=F('count') + delta)
+
+
+class CatFacet(models.Model):
+    """Number of cats of a user with a value of a search facet."""
+    # Indexed by the unique value constraint leading with the user.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=50)
+    count = models.IntegerField(default=0)
+
+    objects = CatFacetManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'facet', 'value'],
+                name='cat_facet_user_value',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}:{self.facet}:{self.value}={self.count}'
+
+
+class CatRatingManager(models.Manager):
+    """Leaderboards of the cat ratings of a user.
+
+    Cats are ranked by rating, then id. Positions are counted from the
+    rating buckets above a rating and the ratings ahead in its own
+    bucket, so a rank never counts the whole leaderboard.
+    """
+
+    def top(self, user, limit):
+        """Return the first ratings of the leaderboard of a user."""
+        return self.filter(user=user).order_by('-rating', 'cat_id')[:limit]
+
+    def _ahead(self, rating):
+        """Return the condition of ratings ranked before rating."""
+        return Q(rating__gt=rating.rating) | Q(
+            rating=rating.rating, cat_id__lt=rating.cat_id
+        )
+
+    def rank(self, rating):
+        """Return the position of rating on the leaderboard of its user."""
+        bucket = CatRating.bucket(rating.rating)
+        higher = RatingBucket.objects.filter(
+            user_id=rating.user_id, bucket__gt=bucket
+        ).aggregate(total=Sum('count'))['total'] or 0
+        within = self.filter(
+            self._ahead(rating),
+            user_id=rating.user_id,
+            rating__lt=(bucket + 1) * CatRating.BUCKET_WIDTH,
+        ).count()
+
+        return higher + within + 1
+
+    def neighbours(self, rating, count):
+        """Return up to count ratings ranked before and after rating."""
+        ratings = self.filter(user_id=rating.user_id)
+        before = ratings.filter(self._ahead(rating)).order_by(
+            'rating', '-cat_id'
+        )[:count]
+        after = ratings.exclude(self._ahead(rating)).exclude(
+            cat_id=rating.cat_id
+        ).order_by('-rating', 'cat_id')[:count]
+
+        return list(before)[::-1], list(after)
+
+
+class CatRating(models.Model):
+    """Elo rating of a cat, updated as tournament matches are stored."""
+    INITIAL = 1500.0
+    # Rating points per bucket of RatingBucket.
+    BUCKET_WIDTH = 25
+
+    cat = models.OneToOneField(
+        Cat,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rating',
+    )
+    # The user of the cat, copied for the leaderboard index.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    rating = models.FloatField(default=INITIAL)
+    matches = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CatRatingManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-rating', 'cat'],
+                name='cat_rating_leaderboard_idx',
+            ),
+        ]
+
+    @classmethod
+    def bucket(cls, rating):
+        """Return the bucket of a rating."""
+        return math.floor(rating / cls.BUCKET_WIDTH)
+
+    def __str__(self):
+        return f'{self.cat_id}@{self.rating:.0f}'
+
+
+class MatchTicket(models.Model):
+    """Cat waiting in the matchmaking queue, and the match it got."""
+    WAITING = 'waiting'
+    MATCHED = 'matched'
+    CANCELLED = 'cancelled'
+    STATUSES = (
+        (WAITING, 'Waiting'),
+        (MATCHED, 'Matched'),
+        (CANCELLED, 'Cancelled'),
+    )
+
+    # Indexed by the composite index leading with the user.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    cat = models.ForeignKey(Cat, on_delete=models.CASCADE, related_name='+')
+    opponent = models.ForeignKey(
+        Cat,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+    )
+    # Rating and weight class of the cat when it was queued.
+    rating = models.FloatField()
+    weight_class = models.PositiveSmallIntegerField()
+    status = models.CharField(
+        max_length=10, choices=STATUSES, default=WAITING
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    matched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['cat'],
+                condition=Q(status='waiting'),
+                name='match_ticket_waiting_cat',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-id'], name='match_ticket_user_id_idx'
+            ),
+            # Waiting tickets by rating within a weight class.
+            models.Index(
+                fields=['weight_class', 'rating'],
+                condition=Q(status='waiting'),
+                name='match_ticket_waiting_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.cat_id} {self.status}'
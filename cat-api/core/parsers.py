@@ -0,0 +1,43 @@
+"""
+Parsers for the APIs.
+"""
+from django.conf import settings
+
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from core.renderers import (
+    FastJSONRenderer,
+    MessagePackRenderer,
+    msgpack,
+    orjson,
+)
+
+
+class FastJSONParser(parsers.JSONParser):
+    """JSON parser decoding UTF-8 bodies with orjson when installed."""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get(
+            'encoding', settings.DEFAULT_CHARSET
+        )
+        if orjson is None or encoding.lower() not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackParser(parsers.BaseParser):
+    """Parser for MessagePack, requires the msgpack package."""
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (TypeError, ValueError) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
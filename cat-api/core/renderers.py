@@ -0,0 +1,64 @@
+"""
+Renderers for the APIs.
+"""
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# Types orjson and msgpack do not encode, e.g. Decimal or lazy strings,
+# are converted as the DRF encoder would.
+_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSON renderer encoding with orjson when it is installed.
+
+    Output decodes to the same values as `JSONRenderer` with the default
+    compact and unicode settings, only float exponents may be spelled
+    differently. Indented output, as asked by the browsable API, and
+    installs without orjson use `JSONRenderer`.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(
+            accepted_media_type or '', renderer_context or {}
+        ) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=_encoder.default,
+            option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+        )
+        # Escaped as JSONRenderer does, for JSON embedded in JavaScript.
+        return ret.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace('\u2029'.encode(), b'\\u2029')
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """Renderer for MessagePack, requires the msgpack package."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return msgpack.packb(
+            data, default=_encoder.default, use_bin_type=True
+        )
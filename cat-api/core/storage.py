@@ -0,0 +1,75 @@
+"""
+File storages.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming files by the SHA-256 of their content.
+
+    The requested name only gives the directory and extension, so
+    identical uploads are stored once. The hash is computed while the
+    content is streamed to a temporary file, which is then renamed.
+
+    A save references the file until its transaction is committed, and
+    takes the reference before reusing an existing copy, so the copy is
+    not deleted by a release until the model referencing it is saved in
+    the same transaction.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        full_directory = self.path(directory)
+        os.makedirs(full_directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=full_directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            hexdigest = digest.hexdigest()
+            name = os.path.join(
+                directory, hexdigest[:2], f'{hexdigest}{extension}'
+            )
+            full_path = self.path(name)
+            self._retain(name)
+            if os.path.exists(full_path):
+                os.remove(temp_path)
+                # Reused files are recent again for the garbage collection.
+                os.utime(full_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.chmod(temp_path, self.file_permissions_mode or 0o644)
+                os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return name.replace('\\', '/')
+
+    def _retain(self, name):
+        """Reference the file until the transaction is committed.
+
+        The file is not deleted on release, as outside a transaction the
+        model referencing it is saved after the commit.
+        """
+        # The models use this storage.
+        from core.models import ImageBlob
+
+        ImageBlob.objects.retain([name])
+        transaction.on_commit(lambda: ImageBlob.objects.release([name]))
@@ -1,13 +1,29 @@
 """
 Test Django management commands.
 """
+import json
+import os
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2Error
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+
+from cat.tournaments import TournamentRunner
+from core.models import (
+    Ability,
+    Cat,
+    CatRating,
+    FightingStyles,
+    RatingBucket,
+    Tournament,
+)
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -32,3 +48,290 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class ImportCatsCommandTests(TestCase):
+    """Test the import_cats command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='pass123',
+        )
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def _write(self, name, content):
+        """Write content to a file of the temporary directory."""
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def test_import_ndjson(self):
+        """Test importing cats with nested relations from NDJSON."""
+        rows = [
+            {
+                'name': f'Cat {i}',
+                'weight': 5,
+                'abilities': [{'name': 'Fireball'}],
+                'fighting_styles': [{'name': 'BX', 'ground_allowed': False}],
+            }
+            for i in range(5)
+        ] + [{'name': 'Invalid', 'weight': 'heavy'}]
+        path = self._write('cats.ndjson', '\n'.join(map(json.dumps, rows)))
+
+        call_command(
+            'import_cats', path, user=self.user.email, batch_size=2,
+            stdout=StringIO(), stderr=StringIO(),
+        )
+
+        cats = Cat.objects.filter(user=self.user)
+        self.assertEqual(cats.count(), 5)
+        self.assertEqual(Ability.objects.filter(user=self.user).count(), 1)
+        for cat in cats:
+            self.assertEqual(cat.abilities.count(), 1)
+            self.assertEqual(cat.fighting_styles.count(), 1)
+
+    def test_import_csv(self):
+        """Test importing cats from CSV."""
+        path = self._write(
+            'cats.csv',
+            'name,weight,dangerous,abilities,fighting_styles\n'
+            'Tom,4.5,False,Fireball|Hypnosis,WR\n',
+        )
+
+        call_command(
+            'import_cats', path, user=self.user.email, stdout=StringIO(),
+        )
+
+        cat = Cat.objects.get(user=self.user)
+        self.assertEqual(cat.name, 'Tom')
+        self.assertFalse(cat.dangerous)
+        self.assertEqual(cat.abilities.count(), 2)
+        self.assertEqual(cat.fighting_styles.get().name, 'WR')
+
+    def test_import_resumes_from_checkpoint(self):
+        """Test the import starts from the stored checkpoint offset."""
+        rows = [{'name': f'Cat {i}', 'weight': 5} for i in range(4)]
+        path = self._write('cats.ndjson', '\n'.join(map(json.dumps, rows)))
+        checkpoint = self._write('checkpoint', '3')
+
+        call_command(
+            'import_cats', path, user=self.user.email,
+            checkpoint=checkpoint, stdout=StringIO(),
+        )
+
+        self.assertEqual(
+            list(Cat.objects.values_list('name', flat=True)), ['Cat 3']
+        )
+        with open(checkpoint) as file:
+            self.assertEqual(file.read(), f'4 {os.path.getsize(path)}')
+
+    def test_import_resumes_from_checkpoint_position(self):
+        """Test the import seeks to the stored position, not parsing."""
+        rows = [{'name': f'Cat {i}', 'weight': 5} for i in range(3)]
+        lines = [json.dumps(row) + '\n' for row in rows]
+        path = self._write('cats.ndjson', 'not json\n' + ''.join(lines))
+        checkpoint = self._write('checkpoint', f'2 {9 + len(lines[0])}')
+
+        call_command(
+            'import_cats', path, user=self.user.email,
+            checkpoint=checkpoint, stdout=StringIO(),
+        )
+
+        self.assertEqual(
+            list(Cat.objects.values_list('name', flat=True)),
+            ['Cat 1', 'Cat 2'],
+        )
+        with open(checkpoint) as file:
+            self.assertEqual(file.read(), f'4 {os.path.getsize(path)}')
+
+    def test_import_skips_invalid_rows(self):
+        """Test malformed lines and rows without weight are skipped."""
+        path = self._write('cats.ndjson', '\n'.join([
+            json.dumps({'name': 'Tom', 'weight': 4}),
+            '{"name": "Broken"',
+            json.dumps({'name': 'Light'}),
+            json.dumps({'name': 'Rex', 'weight': 6}),
+        ]))
+        out, err = StringIO(), StringIO()
+
+        call_command(
+            'import_cats', path, user=self.user.email, batch_size=4,
+            stdout=out, stderr=err,
+        )
+
+        self.assertEqual(
+            sorted(Cat.objects.values_list('name', flat=True)),
+            ['Rex', 'Tom'],
+        )
+        self.assertIn('skipped 2 invalid rows', out.getvalue())
+        self.assertIn('Row 1: ', err.getvalue())
+        self.assertIn('Row 2: ', err.getvalue())
+
+
+class RebuildCatDocumentsCommandTests(TestCase):
+    """Test the rebuild_cat_documents command."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='pass123',
+        )
+        for i in range(3):
+            cat = Cat.objects.create(user=user, name=f'Cat {i}', weight=4)
+            cat.abilities.add(Ability.objects.create(user=user, name='Bite'))
+
+    def test_check_current_documents(self):
+        """Test the check passes when documents are maintained."""
+        out = StringIO()
+
+        call_command('rebuild_cat_documents', check=True, stdout=out)
+
+        self.assertIn('All 3 cat documents are current.', out.getvalue())
+
+    def test_rebuild_stale_documents(self):
+        """Test stale documents are reported and rebuilt."""
+        Cat.objects.filter(name='Cat 1').update(name='Renamed')
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_cat_documents', check=True)
+
+        out = StringIO()
+        call_command('rebuild_cat_documents', batch_size=2, stdout=out)
+
+        self.assertIn('Rebuilt 1 of 3', out.getvalue())
+        self.assertEqual(
+            Cat.objects.get(name='Renamed').document['name'], 'Renamed'
+        )
+        call_command('rebuild_cat_documents', check=True, stdout=StringIO())
+
+
+class RefreshFightingStyleCountsCommandTests(TestCase):
+    """Test the refresh_fighting_style_counts command."""
+
+    def test_repair_drifted_counts(self):
+        """Test drifted cat counts are recounted from the links."""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='pass123',
+        )
+        style = FightingStyles.objects.create(name='BX')
+        for i in range(2):
+            Cat.objects.create(
+                user=user, name=f'Cat {i}', weight=4
+            ).fighting_styles.add(style)
+        FightingStyles.objects.update(cat_count=7)
+        out = StringIO()
+
+        call_command('refresh_fighting_style_counts', stdout=out)
+
+        style.refresh_from_db()
+        self.assertEqual(style.cat_count, 2)
+        self.assertIn('1 fighting styles', out.getvalue())
+
+
+class RunTournamentCommandTests(TestCase):
+    """Test the run_tournament command."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='pass123',
+        )
+        for i in range(5):
+            Cat.objects.create(user=user, name=f'Cat {i}', weight=3 + i)
+
+    def test_run_tournament(self):
+        """Test a seeded tournament is stored with its standings."""
+        out = StringIO()
+
+        call_command(
+            'run_tournament', user='user@example.com', format='swiss',
+            seed=3, stdout=out,
+        )
+
+        tournament = Tournament.objects.get()
+        self.assertEqual(tournament.seed, 3)
+        self.assertEqual(tournament.entries.count(), 5)
+        self.assertIn(f'Tournament {tournament.id} played 3', out.getvalue())
+
+    def test_resume_tournament(self):
+        """Test an unfinished tournament is resumed, a finished refused."""
+        with patch.object(
+            TournamentRunner, '_finish', side_effect=RuntimeError
+        ), self.assertRaises(RuntimeError):
+            call_command(
+                'run_tournament', user='user@example.com', seed=3,
+                stdout=StringIO(),
+            )
+        tournament = Tournament.objects.get()
+        self.assertIsNone(tournament.finished_at)
+        out = StringIO()
+
+        call_command(
+            'run_tournament', user='user@example.com',
+            resume=tournament.id, stdout=out,
+        )
+
+        tournament.refresh_from_db()
+        self.assertIsNotNone(tournament.finished_at)
+        winner = tournament.entries.get(rank=1)
+        self.assertEqual(winner.cat_id, tournament.winner_id)
+        self.assertIn('(seed 3)', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command(
+                'run_tournament', user='user@example.com',
+                resume=tournament.id, stdout=StringIO(),
+            )
+
+    def test_run_tournament_unknown_user(self):
+        """Test an unknown user is reported."""
+        with self.assertRaises(CommandError):
+            call_command('run_tournament', user='nobody@example.com')
+
+
+class RebuildRatingsCommandTests(TestCase):
+    """Test the rebuild_ratings command."""
+
+    def test_rebuild_matches_incremental_ratings(self):
+        """Test replaying the matches gives the incremental ratings."""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='pass123',
+        )
+        for i in range(6):
+            Cat.objects.create(user=user, name=f'Cat {i}', weight=3 + i)
+        for seed, tournament_format in enumerate(
+            [Tournament.ROUND_ROBIN, Tournament.SWISS]
+        ):
+            TournamentRunner(Tournament(
+                user=user, name='Cup', format=tournament_format, seed=seed,
+            )).run(Cat.objects.all())
+        incremental = list(CatRating.objects.order_by('cat_id').values_list(
+            'cat_id', 'rating', 'matches'
+        ))
+        buckets = list(RatingBucket.objects.filter(count__gt=0).order_by(
+            'bucket'
+        ).values_list('bucket', 'count'))
+        CatRating.objects.update(rating=1000, matches=0)
+        out = StringIO()
+
+        call_command('rebuild_ratings', batch_size=4, stdout=out)
+
+        rebuilt = list(CatRating.objects.order_by('cat_id').values_list(
+            'cat_id', 'rating', 'matches'
+        ))
+        self.assertEqual(len(rebuilt), len(incremental))
+        for (_, expected, matches), (_, rating, rebuilt_matches) in zip(
+            incremental, rebuilt
+        ):
+            self.assertAlmostEqual(rating, expected)
+            self.assertEqual(rebuilt_matches, matches)
+        self.assertEqual(list(RatingBucket.objects.order_by(
+            'bucket'
+        ).values_list('bucket', 'count')), buckets)
+        self.assertIn('into 6 ratings', out.getvalue())
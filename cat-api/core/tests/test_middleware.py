@@ -0,0 +1,118 @@
+"""
+Tests for the response compression middleware.
+"""
+import gzip
+import unittest
+import zlib
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.middleware import (
+    CompressionMiddleware,
+    brotli,
+    negotiate_encoding,
+    zstandard,
+)
+
+
+BODY = b'{"name": "Cat", "abilities": [{"name": "Bite"}]}' * 100
+
+
+def compress(response, accept_encoding='gzip'):
+    """Return response passed through the middleware."""
+    request = RequestFactory().get(
+        '/', HTTP_ACCEPT_ENCODING=accept_encoding
+    )
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024, COMPRESSION_FLUSH_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test compression of responses."""
+
+    def test_negotiate_encoding(self):
+        """Test the accepted encoding with the highest weight wins."""
+        self.assertEqual(negotiate_encoding('gzip'), 'gzip')
+        self.assertEqual(negotiate_encoding('identity'), None)
+        self.assertEqual(negotiate_encoding(''), None)
+        self.assertEqual(negotiate_encoding('gzip;q=0, *;q=0'), None)
+        self.assertEqual(negotiate_encoding('deflate, GZIP;q=0.5'), 'gzip')
+
+    def test_compress_json(self):
+        """Test a large JSON body is gzip compressed."""
+        response = HttpResponse(BODY, content_type='application/json')
+        response['ETag'] = '"abc"'
+
+        response = compress(response)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertEqual(
+            int(response['Content-Length']), len(response.content)
+        )
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    def test_small_body_not_compressed(self):
+        """Test bodies under the threshold are sent as they are."""
+        response = compress(
+            HttpResponse(b'{"id": 1}', content_type='application/json')
+        )
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, b'{"id": 1}')
+
+    def test_images_not_compressed(self):
+        """Test bodies of incompressible types are sent as they are."""
+        response = compress(HttpResponse(BODY, content_type='image/jpeg'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_compressed_incrementally(self):
+        """Test streams are compressed without reading them first."""
+        consumed = []
+
+        def lines():
+            for i in range(100):
+                consumed.append(i)
+                yield BODY[:100]
+
+        response = compress(StreamingHttpResponse(
+            lines(), content_type='application/x-ndjson'
+        ))
+        chunks = iter(response.streaming_content)
+        first = next(chunks)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertLess(len(consumed), 100)
+        self.assertEqual(
+            zlib.decompress(first + b''.join(chunks), 31), BODY[:100] * 100
+        )
+
+    @unittest.skipUnless(brotli, 'brotli is not installed')
+    def test_brotli(self):
+        """Test brotli is preferred to gzip when accepted."""
+        response = compress(
+            HttpResponse(BODY, content_type='application/json'),
+            'gzip, deflate, br',
+        )
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), BODY)
+
+    @unittest.skipUnless(zstandard, 'zstandard is not installed')
+    def test_zstd(self):
+        """Test zstd is preferred when accepted with the same weight."""
+        response = compress(
+            HttpResponse(BODY, content_type='text/csv'), 'br, zstd, gzip'
+        )
+
+        self.assertEqual(response['Content-Encoding'], 'zstd')
+        self.assertEqual(
+            zstandard.ZstdDecompressor().decompressobj().decompress(
+                response.content
+            ),
+            BODY,
+        )
@@ -0,0 +1,185 @@
+"""
+Tests for the query plans of the hot API queries.
+"""
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Ability, Cat, FightingStyles, ResourceVersion
+from cat.filters import MATCH_ALL, MATCH_ANY, filter_by_related
+from cat.search import facet_rows, search_cats
+
+
+# Tables growing with the users, which hot queries must not read whole.
+LARGE_TABLES = {
+    'core_cat',
+    'core_ability',
+    'core_cat_abilities',
+    'core_cat_fighting_styles',
+    'core_resourceversion',
+}
+# Rows of the test data, large enough for the planner to prefer an
+# index over reading a table whole when one applies.
+USERS = 400
+CATS_PER_USER = 50
+ABILITIES_PER_USER = 20
+# Each cat has one in ABILITY_SPREAD of the abilities of its user.
+ABILITY_SPREAD = 5
+# Users with versions stamped, most of them without cats here.
+VERSIONED_USERS = 10000
+
+
+def full_scans(queryset):
+    """Return the large tables read whole by the plan of queryset."""
+    plan = queryset.explain()
+    if connection.vendor == 'sqlite':
+        pattern = r'\bSCAN (\w+)'
+    else:
+        pattern = r'\bSeq Scan on (\w+)'
+
+    return set(re.findall(pattern, plan)) & LARGE_TABLES
+
+
+class QueryPlanTests(TestCase):
+    """Test the hot queries are answered from indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            return
+
+        styles = FightingStyles.objects.bulk_create(
+            FightingStyles(name=name) for name, _ in FightingStyles.CHOICES
+        )
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f'user{u}@example.com')
+            for u in range(USERS)
+        )
+        for user in users:
+            abilities = Ability.objects.bulk_create(
+                Ability(user=user, name=f'Ability {i}')
+                for i in range(ABILITIES_PER_USER)
+            )
+            Cat.objects.bulk_create(
+                Cat(user=user, name=f'Cat {i}', weight=4)
+                for i in range(CATS_PER_USER)
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO core_cat_abilities (cat_id, ability_id) '
+                'SELECT c.id, a.id FROM core_cat c '
+                'JOIN core_ability a ON a.user_id = c.user_id '
+                'WHERE (c.id + a.id) %% %s = 0',
+                [ABILITY_SPREAD],
+            )
+            # Most cats fight in two or three styles, few in the first one.
+            cursor.execute(
+                'INSERT INTO core_cat_fighting_styles '
+                '(cat_id, fightingstyles_id) '
+                'SELECT c.id, s.id FROM core_cat c '
+                'JOIN core_fightingstyles s ON CASE WHEN s.id = %s '
+                'THEN c.id %% 50 = 0 ELSE (c.id + s.id) %% 3 <> 0 END',
+                [styles[0].id],
+            )
+        ResourceVersion.objects.bulk_create(
+            ResourceVersion(
+                scope=ResourceVersion.user_scope(user.id + n),
+                updated_at=timezone.now(),
+            )
+            for n in range(VERSIONED_USERS)
+        )
+        cls.user = user
+        cls.ability_ids = [ability.id for ability in abilities[:2]]
+        cls.style_id = styles[0].id
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.skipTest(f'No plan checks for {connection.vendor}.')
+
+    def assertNoFullScans(self, queryset):
+        """Assert the plan of queryset reads no large table whole."""
+        self.assertEqual(full_scans(queryset), set(), queryset.explain())
+
+    def test_cat_list(self):
+        """Test listing and paging the cats of a user."""
+        cats = Cat.objects.filter(user=self.user).order_by('-id')
+
+        self.assertNoFullScans(cats.only('id', 'document')[:101])
+        self.assertNoFullScans(cats.filter(id__lt=cats[25].id)[:101])
+
+    def test_cat_list_filtered(self):
+        """Test filtering the cats of a user by abilities."""
+        for match in [MATCH_ANY, MATCH_ALL]:
+            with self.subTest(match=match):
+                cats = filter_by_related(
+                    Cat.objects.all(), 'abilities', self.ability_ids, match
+                )
+                self.assertNoFullScans(
+                    cats.filter(user=self.user).order_by('-id')[:101]
+                )
+
+    def test_cat_search(self):
+        """Test searching the cats of a user and counting facets."""
+        cats = search_cats(
+            Cat.objects.filter(user=self.user),
+            {'weight_min': 3, 'weight_max': 5, 'match': MATCH_ANY},
+        )
+
+        self.assertNoFullScans(cats.order_by('-id')[:101])
+        self.assertNoFullScans(facet_rows(cats))
+
+    def test_ability_list(self):
+        """Test listing the abilities of a user."""
+        abilities = Ability.objects.filter(user=self.user)
+
+        self.assertNoFullScans(abilities.order_by('-name', '-id')[:101])
+        self.assertNoFullScans(abilities.filter(Exists(
+            Cat.abilities.through.objects.filter(ability_id=OuterRef('pk'))
+        )).order_by('-name', '-id'))
+
+    def test_assigned_fighting_styles(self):
+        """Test listing the fighting styles assigned to cats."""
+        self.assertNoFullScans(
+            FightingStyles.objects.filter(cat_count__gt=0).order_by('-name')
+        )
+
+    def test_relation_reverse_probes(self):
+        """Test reading the cats of an ability or fighting style."""
+        self.assertNoFullScans(
+            Cat.abilities.through.objects.filter(
+                ability_id=self.ability_ids[0]
+            ).values('cat_id')
+        )
+        self.assertNoFullScans(
+            Cat.fighting_styles.through.objects.filter(
+                fightingstyles_id=self.style_id
+            ).values('cat_id')
+        )
+
+    def test_version_stamps(self):
+        """Test the version stamp lookup of conditional requests."""
+        self.assertNoFullScans(ResourceVersion.objects.filter(
+            scope__in=[ResourceVersion.user_scope(self.user.id)]
+        ))
+
+    def test_relation_foreign_key_indexes_dropped(self):
+        """Test the relations index their targets with the cats only."""
+        for through, column in [
+            (Cat.abilities.through, 'ability_id'),
+            (Cat.fighting_styles.through, 'fightingstyles_id'),
+        ]:
+            with connection.cursor() as cursor:
+                constraints = connection.introspection.get_constraints(
+                    cursor, through._meta.db_table
+                )
+            indexes = [
+                constraint['columns'] for constraint in constraints.values()
+                if constraint['index'] and constraint['columns'][0] == column
+            ]
+            self.assertEqual(indexes, [[column, 'cat_id']])
@@ -0,0 +1,111 @@
+"""
+Tests for API renderers and parsers.
+"""
+import datetime
+import json
+import unittest
+from decimal import Decimal
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.parsers import FastJSONParser, MessagePackParser
+from core.renderers import FastJSONRenderer, MessagePackRenderer, msgpack
+
+
+CAT_URL = reverse('cat:cat-list')
+
+DATA = {
+    'id': 1,
+    'name': 'Zoë \u2028 \u2029 🐾',
+    'weight': 4.25,
+    'price': Decimal('1.50'),
+    'dangerous': True,
+    'missing': None,
+    'label': gettext_lazy('Name'),
+    'born': datetime.datetime(2024, 1, 2, 3, 4, 5, 6, tzinfo=datetime.UTC),
+    'day': datetime.date(2024, 1, 2),
+    'abilities': [{'id': 2, 'name': 'Bite'}],
+}
+
+
+class RendererTests(SimpleTestCase):
+    """Test the renderers encode like the DRF JSON renderer."""
+
+    def test_fast_json_matches_json_renderer(self):
+        """Test the fast renderer output matches JSONRenderer."""
+        expected = JSONRenderer().render(DATA)
+
+        rendered = FastJSONRenderer().render(DATA)
+
+        self.assertEqual(rendered, expected)
+
+    def test_fast_json_indent(self):
+        """Test indented output is rendered as JSONRenderer does."""
+        media_type = 'application/json; indent=2'
+
+        rendered = FastJSONRenderer().render(DATA, media_type)
+
+        self.assertEqual(rendered, JSONRenderer().render(DATA, media_type))
+
+    def test_fast_json_parser(self):
+        """Test the fast parser decodes and rejects bad JSON."""
+        parser = FastJSONParser()
+
+        self.assertEqual(parser.parse(BytesIO(b'{"a": [1]}')), {'a': [1]})
+        with self.assertRaises(ParseError):
+            parser.parse(BytesIO(b'{"a": NaN}'))
+
+    @unittest.skipUnless(msgpack, 'msgpack is not installed')
+    def test_msgpack_round_trip(self):
+        """Test MessagePack encodes values as the JSON renderer does."""
+        rendered = MessagePackRenderer().render(DATA)
+
+        self.assertEqual(
+            MessagePackParser().parse(BytesIO(rendered)),
+            json.loads(JSONRenderer().render(DATA)),
+        )
+        with self.assertRaises(ParseError):
+            MessagePackParser().parse(BytesIO(b'\xc1'))
+
+
+@unittest.skipUnless(msgpack, 'msgpack is not installed')
+class MessagePackApiTests(TestCase):
+    """Test MessagePack content negotiation of the APIs."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='pass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_create_and_list_cats(self):
+        """Test cats are created and listed in MessagePack."""
+        payload = {'name': 'Tom', 'weight': 4.5, 'abilities': [
+            {'name': 'Bite'},
+        ]}
+
+        res = self.client.post(
+            CAT_URL,
+            msgpack.packb(payload),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(res.content)['name'], 'Tom')
+
+        res = self.client.get(CAT_URL, HTTP_ACCEPT='application/msgpack')
+        results = msgpack.unpackb(res.content)['results']
+
+        self.assertEqual(results[0]['abilities'][0]['name'], 'Bite')
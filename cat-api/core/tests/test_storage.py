@@ -0,0 +1,146 @@
+"""
+Tests for the content addressed storage of cat images.
+"""
+import hashlib
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import Cat, ImageBlob
+from core.storage import ContentAddressedStorage
+
+
+def create_cat(user, **params):
+    """Create and return a cat."""
+    return Cat.objects.create(user=user, name='Cat', weight=5, **params)
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Test storing and reference counting cat images."""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.settings = override_settings(MEDIA_ROOT=self.media.name)
+        self.settings.enable()
+        self.storage = Cat._meta.get_field('image').storage
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='pass123',
+        )
+
+    def tearDown(self):
+        self.settings.disable()
+        self.media.cleanup()
+
+    def test_identical_content_stored_once(self):
+        """Test saving the same content twice gives one file."""
+        storage = ContentAddressedStorage()
+        digest = hashlib.sha256(b'meow').hexdigest()
+
+        first = storage.save('uploads/cat/a.JPG', ContentFile(b'meow'))
+        second = storage.save('uploads/cat/b.jpg', ContentFile(b'meow'))
+
+        self.assertEqual(first, f'uploads/cat/{digest[:2]}/{digest}.jpg')
+        self.assertEqual(first, second)
+        self.assertEqual(
+            os.listdir(os.path.dirname(storage.path(first))),
+            [f'{digest}.jpg'],
+        )
+
+    def test_shared_image_reference_counted(self):
+        """Test a shared image is deleted once no cat references it."""
+        c1 = create_cat(self.user)
+        c2 = create_cat(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            c1.image.save('one.jpg', ContentFile(b'meow'))
+            c2.image.save('two.jpg', ContentFile(b'meow'))
+        name = c1.image.name
+
+        self.assertEqual(c2.image.name, name)
+        self.assertEqual(ImageBlob.objects.get(name=name).refcount, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            c1.image.save('other.jpg', ContentFile(b'purr'))
+        self.assertEqual(ImageBlob.objects.get(name=name).refcount, 1)
+        self.assertTrue(self.storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            c2.delete()
+        self.assertFalse(ImageBlob.objects.filter(name=name).exists())
+        self.assertFalse(self.storage.exists(name))
+
+    def test_file_retained_after_release_kept(self):
+        """Test a file uploaded again before its deletion is kept."""
+        cat = create_cat(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            cat.image.save('one.jpg', ContentFile(b'meow'))
+        name = cat.image.name
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            cat.delete()
+        self.assertEqual(ImageBlob.objects.get(name=name).refcount, 0)
+        other = create_cat(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            other.image.save('two.jpg', ContentFile(b'meow'))
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(ImageBlob.objects.get(name=name).refcount, 1)
+        self.assertTrue(self.storage.exists(name))
+
+    def test_reused_file_retained_by_save(self):
+        """Test a reused file is kept until its save is committed."""
+        cat = create_cat(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            cat.image.save('one.jpg', ContentFile(b'meow'))
+        name = cat.image.name
+        with self.captureOnCommitCallbacks() as callbacks:
+            cat.delete()
+
+        with self.captureOnCommitCallbacks() as saved:
+            self.assertEqual(
+                self.storage.save('uploads/cat/two.jpg', ContentFile(b'meow')),
+                name,
+            )
+        for callback in callbacks:
+            callback()
+
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(ImageBlob.objects.get(name=name).refcount, 1)
+        for callback in saved:
+            callback()
+        self.assertEqual(ImageBlob.objects.get(name=name).refcount, 0)
+
+    def test_reused_file_touched(self):
+        """Test reusing a file makes it recent for the collection."""
+        with self.captureOnCommitCallbacks(execute=True):
+            name = self.storage.save('uploads/cat/a.jpg', ContentFile(b'x'))
+        os.utime(self.storage.path(name), (0, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.save('uploads/cat/b.jpg', ContentFile(b'x'))
+
+        self.assertGreater(os.stat(self.storage.path(name)).st_mtime, 0)
+
+    def test_gc_deletes_orphaned_files(self):
+        """Test the garbage collection deletes unreferenced files."""
+        cat = create_cat(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            cat.image.save('kept.jpg', ContentFile(b'meow'))
+            orphan = self.storage.save(
+                'uploads/cat/lost.jpg', ContentFile(b'x' * 10)
+            )
+        out = StringIO()
+
+        call_command('gc_cat_images', grace=0, stdout=out)
+
+        self.assertTrue(self.storage.exists(cat.image.name))
+        self.assertFalse(self.storage.exists(orphan))
+        self.assertIn(
+            'Reclaimed 10 bytes from 1 orphaned files.', out.getvalue()
+        )
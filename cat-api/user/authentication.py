@@ -0,0 +1,166 @@
+"""
+Authentication for the APIs.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router, transaction
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def _values(instance, exclude=()):
+    """Return the concrete field values of a model instance by attname."""
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if field.attname not in exclude
+    }
+
+
+def _instance(model, values):
+    """Build a model instance from field values, deferring the others."""
+    return model.from_db(
+        router.db_for_read(model), list(values), list(values.values())
+    )
+
+
+class TokenCache:
+    """Cache of token keys to the field values of their user and token.
+
+    At most `TOKEN_AUTH_CACHE_SIZE` entries are kept per process, and
+    expire after `TOKEN_AUTH_CACHE_TTL` seconds. Changes only evict them
+    in the process making them. When `TOKEN_AUTH_CACHE` names a cache
+    alias, entries live there instead, and evictions reach the other
+    processes only if that cache is shared by them.
+
+    Values rather than instances are cached, each lookup builds its own
+    user without the password hash, which is loaded when accessed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        """Return the share of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _shared_cache(self):
+        """Return the shared cache, if configured."""
+        alias = getattr(settings, 'TOKEN_AUTH_CACHE', None)
+        return caches[alias] if alias else None
+
+    def _cache_key(self, key):
+        """Return the shared cache key of a token key."""
+        return f'token_auth:{key}'
+
+    def _lookup(self, key):
+        """Return the cached values for key, None on a miss."""
+        shared = self._shared_cache()
+        if shared is not None:
+            return shared.get(self._cache_key(key))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                self._entries.pop(key, None)
+                return None
+
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def get(self, key):
+        """Return a (user, token) pair for key, None on a miss."""
+        entry = self._lookup(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        user_values, token_values = entry
+        return (
+            _instance(get_user_model(), user_values),
+            _instance(Token, token_values),
+        )
+
+    def set(self, key, value):
+        """Cache a (user, token) pair for key."""
+        user, token = value
+        entry = (_values(user, exclude=['password']), _values(token))
+        ttl = getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 60)
+        shared = self._shared_cache()
+        if shared is not None:
+            shared.set(self._cache_key(key), entry, ttl)
+            return
+
+        max_size = getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 10000)
+        with self._lock:
+            self._entries[key] = (entry, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def _drop(self, keys=(), user_id=None):
+        """Remove the entries of token keys or of the tokens of a user."""
+        keys = set(keys)
+        shared = self._shared_cache()
+        if shared is not None:
+            if user_id is not None:
+                keys.update(Token.objects.filter(
+                    user_id=user_id
+                ).values_list('key', flat=True))
+            shared.delete_many([self._cache_key(key) for key in keys])
+            return
+
+        pk = get_user_model()._meta.pk.attname
+        with self._lock:
+            for key, ((user_values, _), _) in list(self._entries.items()):
+                if key in keys or user_values[pk] == user_id:
+                    del self._entries[key]
+
+    def evict(self, key):
+        """Remove the entry of a token key, now and once committed.
+
+        Evicting again after the commit drops an entry cached meanwhile
+        from the state before the change.
+        """
+        self._drop([key])
+        transaction.on_commit(lambda: self._drop([key]))
+
+    def evict_user(self, user_id):
+        """Remove the entries of every token of a user, as evict does."""
+        self._drop(user_id=user_id)
+        transaction.on_commit(lambda: self._drop(user_id=user_id))
+
+    def clear(self):
+        """Remove the entries of this process and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication keeping recent lookups in memory."""
+
+    def authenticate_credentials(self, key):
+        credentials = token_cache.get(key)
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            token_cache.set(key, credentials)
+
+        return credentials
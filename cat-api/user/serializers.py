@@ -9,6 +9,8 @@ from django.utils.translation import gettext_lazy as _
 
 from rest_framework import serializers
 
+from .throttling import login_limiter
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for the user object."""
@@ -46,7 +48,8 @@ class AuthTokenSerializer(serializers.Serializer):
         """Validate and authenticate the user."""
         email = attrs.get('email')
         password = attrs.get('password')
-        user = authenticate(
+        user = login_limiter.run(
+            authenticate,
             request=self.context.get('request'),
             email=email,
             password=password,
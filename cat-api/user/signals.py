@@ -0,0 +1,23 @@
+"""
+Signal handlers for the user API.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import token_cache
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    """Stop authenticating with a deleted token."""
+    token_cache.evict(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def evict_changed_user(sender, instance, **kwargs):
+    """Drop cached tokens of a changed, deactivated or deleted user."""
+    token_cache.evict_user(instance.pk)
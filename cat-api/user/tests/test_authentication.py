@@ -0,0 +1,107 @@
+"""
+Tests for the cached token authentication.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import TokenCache, token_cache
+
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating requests with cached tokens."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='test123',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_lookup_cached(self):
+        """Test the token is only looked up on the first request."""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(token_cache.hits, 1)
+        self.assertEqual(token_cache.misses, 1)
+        self.assertEqual(token_cache.hit_rate, 0.5)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops authenticating."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user stops authenticating."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_updated_user_refreshed(self):
+        """Test updating the profile refreshes the cached user."""
+        self.client.patch(ME_URL, {'name': 'New Name'})
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New Name')
+
+    def test_lookups_build_own_users(self):
+        """Test each lookup builds its user, without the password."""
+        self.client.get(ME_URL)
+
+        user, token = token_cache.get(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token.key, self.token.key)
+        self.assertIsNot(user, token_cache.get(self.token.key)[0])
+        self.assertEqual(user.get_deferred_fields(), {'password'})
+
+    @override_settings(TOKEN_AUTH_CACHE='default')
+    def test_evicted_from_other_processes(self):
+        """Test changes evict the entries of a shared cache alias."""
+        other_process = TokenCache()
+        self.client.get(ME_URL)
+        self.assertIsNotNone(other_process.get(self.token.key))
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertIsNone(other_process.get(self.token.key))
+
+    @override_settings(TOKEN_AUTH_CACHE_SIZE=1)
+    def test_cache_bounded(self):
+        """Test the least recently used tokens are evicted."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='test123',
+        )
+        other_token = Token.objects.create(user=other)
+        self.client.get(ME_URL)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {other_token.key}')
+        self.client.get(ME_URL)
+
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertIsNotNone(token_cache.get(other_token.key))
@@ -0,0 +1,116 @@
+"""
+Tests for the login throttling.
+"""
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.exceptions import Throttled
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.throttling import LoginLimiter
+
+
+TOKEN_URL = reverse('user:token')
+
+
+@override_settings(LOGIN_CONCURRENCY=0)
+class LoginRateThrottleTests(TestCase):
+    """Test limiting the rate of logins per email."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        get_user_model().objects.create_user(
+            email='test@example.com',
+            password='test-user-password123',
+        )
+
+    def test_logins_throttled_per_email(self):
+        """Test too many logins for an email are rejected."""
+        payload = {'email': 'test@example.com', 'password': 'wrong'}
+        for _ in range(10):
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(TOKEN_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        payload['email'] = 'other@example.com'
+        res = self.client.post(TOKEN_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(LOGIN_CONCURRENCY=2)
+class LimitedLoginTests(TestCase):
+    """Test limited logins against the database."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='test-user-password123',
+        )
+
+    def test_login_sees_caller_transaction(self):
+        """Test logins authenticate users of the open transaction."""
+        payload = {'email': 'test@example.com'}
+
+        res = self.client.post(
+            TOKEN_URL, {**payload, 'password': 'test-user-password123'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            Token.objects.get(key=res.data['token']).user, self.user
+        )
+
+        res = self.client.post(TOKEN_URL, {**payload, 'password': 'wrong'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('token', res.data)
+
+
+@override_settings(LOGIN_CONCURRENCY=1)
+class LoginLimiterTests(SimpleTestCase):
+    """Test bounding the logins running at once."""
+
+    def setUp(self):
+        self.limiter = LoginLimiter()
+
+    def test_run_returns_result(self):
+        """Test the result of the function is returned."""
+        self.assertEqual(self.limiter.run(sum, [1, 2]), 3)
+
+    def test_saturated_limiter_rejects(self):
+        """Test logins beyond the limit are throttled."""
+        started, release = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        thread = threading.Thread(target=self.limiter.run, args=[block])
+        thread.start()
+        started.wait(5)
+        try:
+            with self.assertRaises(Throttled):
+                self.limiter.run(sum, [1, 2])
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(self.limiter.run(sum, [1, 2]), 3)
+
+    def test_slot_released_on_error(self):
+        """Test a failing login frees its slot."""
+        with self.assertRaises(ZeroDivisionError):
+            self.limiter.run(divmod, 1, 0)
+
+        self.assertEqual(self.limiter.run(sum, [1, 2]), 3)
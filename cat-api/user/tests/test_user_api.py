@@ -1,6 +1,7 @@
 """
 Tests for the user API.
 """
+from django.core.cache import cache
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
@@ -23,6 +24,7 @@ class PublicUserApiTest(TestCase):
 
     def setUp(self):
         self.client = APIClient()
+        cache.clear()
 
     def test_create_user_ok(self):
         """Test creating a user is ok."""
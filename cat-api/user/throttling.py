@@ -0,0 +1,69 @@
+"""
+Throttling of the user API logins.
+"""
+import threading
+
+from django.conf import settings
+
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginRateThrottle(SimpleRateThrottle):
+    """Limit the rate of login attempts per email."""
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if hasattr(
+            request.data, 'get'
+        ) else None
+        if not email:
+            return None
+
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': str(email).strip().lower(),
+        }
+
+
+class LoginLimiter:
+    """Bound the logins verifying passwords at once.
+
+    Logins run in the request thread, at most `LOGIN_CONCURRENCY` of them
+    at a time. Further logins are rejected with a 429 instead of waiting
+    for a slot. Logins are not limited when it is 0.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots = None
+        self._size = None
+
+    def _get_slots(self):
+        """Return the semaphore sized by the current setting."""
+        size = settings.LOGIN_CONCURRENCY
+        with self._lock:
+            if self._size != size:
+                self._slots = threading.BoundedSemaphore(size)
+                self._size = size
+
+            return self._slots
+
+    def run(self, func, *args, **kwargs):
+        """Run func when a slot is free and return its result."""
+        if not settings.LOGIN_CONCURRENCY:
+            return func(*args, **kwargs)
+
+        slots = self._get_slots()
+        if not slots.acquire(blocking=False):
+            raise Throttled(
+                wait=1,
+                detail='Too many logins in progress, try again later.',
+            )
+        try:
+            return func(*args, **kwargs)
+        finally:
+            slots.release()
+
+
+login_limiter = LoginLimiter()